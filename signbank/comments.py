@@ -16,9 +16,10 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.utils import OperationalError, ProgrammingError
 from django.contrib.auth.models import User
+from django.db.models import TextField
+from django.db.models.functions import Cast
 
 from tagging.models import Tag, TaggedItem
-from guardian.shortcuts import get_objects_for_user
 from django_comments.models import Comment
 from django_comments.signals import comment_was_posted
 from django_comments.forms import CommentForm
@@ -26,7 +27,9 @@ from django_comments import get_model as django_comments_get_model
 from django_comments.admin import CommentsAdmin
 from notifications.signals import notify
 
-from .dictionary.models import AllowedTags
+from .dictionary.datasetpermissions import get_allowed_dataset_ids
+from .dictionary.models import AllowedTags, Gloss
+from .dictionary.tagquery import filter_by_tag_query, tagged_q
 from .dictionary.admin import TagAdminInline, TagListFilter
 
 
@@ -125,16 +128,18 @@ class CommentListView(ListView):
         if 'user_name' in get and get['user_name'] != '':
             qs = qs.filter(user_name__icontains=get['user_name'])
         if 'tag' in get and get['tag'] != '':
-            tags = Tag.objects.filter(name=get['tag'])
-            tagged = TaggedItem.objects.get_intersection_by_model(Comment, tags)
-            qs = qs.filter(id__in=tagged)
+            qs = qs.filter(tagged_q(Comment, name=get['tag']))
+        if 'tag_query' in get and get['tag_query'].strip() != '':
+            qs = filter_by_tag_query(self.request, qs, get['tag_query'])
 
         qs = qs.filter(is_removed=False)
 
         qs = qs.prefetch_related('content_object', 'content_object__dataset', 'user')
         # Filter in only objects in the datasets the user has permissions to.
-        allowed_datasets = get_objects_for_user(self.request.user, 'dictionary.view_dataset')
-        qs = qs.filter(id__in=[x.id for x in qs if hasattr(x.content_object, 'dataset') and x.content_object.dataset in allowed_datasets])
+        # Only Glosses have datasets, Comment.object_pk is a text field so the gloss ids are compared as text.
+        allowed_glosses = Gloss.objects.filter(dataset__in=get_allowed_dataset_ids(self.request.user)).annotate(
+            pk_text=Cast('pk', output_field=TextField())).values('pk_text')
+        qs = qs.filter(content_type=ContentType.objects.get_for_model(Gloss), object_pk__in=allowed_glosses)
 
         return qs.order_by('-submit_date')
 
@@ -142,6 +147,8 @@ class CommentListView(ListView):
 class CommentSearchForm(forms.Form):
     comment = forms.CharField(label=_lazy('Comment'), required=False)
     user_name = forms.CharField(label=_lazy('Username'), required=False)
+    tag_query = forms.CharField(label=_lazy('Tag query'), required=False,
+                                widget=forms.TextInput(attrs={'placeholder': _lazy('tag1 AND (tag2 OR NOT tag3)')}))
 
 
 class CommentRemoveTagForm(forms.Form):
@@ -15,10 +15,13 @@ from modeltranslation.admin import TranslationAdmin as ModelTranslationAdmin
 from reversion.admin import VersionAdmin
 from tagging.models import Tag, TaggedItem
 
-from .models import (AllowedTags, Dataset, Dialect, FieldChoice, Gloss, Lemma,
+from .conditionalget import record_dataset_changes
+from .models import (AllowedTags, Dataset, Dialect, ExportJob, FieldChoice, Gloss, Lemma,
                      GlossRelation, GlossTranslations, GlossURL, Language,
                      ManualValidationAggregation, ShareValidationAggregation,
                      SignLanguage, Translation, ValidationRecord)
+from .publicindex import invalidate_first_letters
+from .publicsearch import update_public_search_entries
 from ..video.admin import GlossVideoInline
 
 
@@ -153,11 +156,21 @@ class GlossTranslationsInline(admin.TabularInline):
 
 
 def publish(modeladmin, request, queryset):
+    # update() does not send signals, rebuild the first letters and search entries of the public gloss list and
+    # record the changes of the datasets for the conditional GETs.
+    glosses = list(queryset.values_list('pk', 'dataset'))
     queryset.update(published=True)
+    invalidate_first_letters({dataset_id for pk, dataset_id in glosses})
+    update_public_search_entries([pk for pk, dataset_id in glosses])
+    record_dataset_changes({dataset_id for pk, dataset_id in glosses})
 
 
 def unpublish(modeladmin, request, queryset):
+    glosses = list(queryset.values_list('pk', 'dataset'))
     queryset.update(published=False)
+    invalidate_first_letters({dataset_id for pk, dataset_id in glosses})
+    update_public_search_entries([pk for pk, dataset_id in glosses])
+    record_dataset_changes({dataset_id for pk, dataset_id in glosses})
 
 
 publish.short_description = _("Publish selected glosses")
@@ -165,11 +178,16 @@ unpublish.short_description = _("Unpublish selected glosses")
 
 
 def exclude_from_ecv(modeladmin, request, queryset):
+    # The stored ECVs are named after the change counts of the datasets.
+    dataset_ids = set(queryset.values_list('dataset', flat=True))
     queryset.update(exclude_from_ecv=True)
+    record_dataset_changes(dataset_ids)
 
 
 def include_in_ecv(modeladmin, request, queryset):
+    dataset_ids = set(queryset.values_list('dataset', flat=True))
     queryset.update(exclude_from_ecv=False)
+    record_dataset_changes(dataset_ids)
 
 
 exclude_from_ecv.short_description = _("Exclude glosses from ECV")
@@ -339,6 +357,13 @@ class ValidationRecordAdmin(admin.ModelAdmin):
     list_filter = [GlossFilter, "sign_seen"]
 
 
+class ExportJobAdmin(admin.ModelAdmin):
+    model = ExportJob
+    list_display = ("user", "format", "status", "created_at", "finished_at")
+    list_filter = ["format", "status"]
+    readonly_fields = ("query_hash", "data_state", "created_at", "started_at", "finished_at")
+
+
 class UserAdmin(AuthUserAdmin):
     inlines = [AssignedGlossInline]
 
@@ -354,6 +379,7 @@ admin.site.register(Lemma)
 admin.site.register(ShareValidationAggregation, ShareValidationAggregationAdmin)
 admin.site.register(ManualValidationAggregation, ManualValidationAggregationAdmin)
 admin.site.register(ValidationRecord, ValidationRecordAdmin)
+admin.site.register(ExportJob, ExportJobAdmin)
 
 admin.site.unregister(User)
 admin.site.register(User, UserAdmin)
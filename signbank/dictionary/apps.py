@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.apps import AppConfig
+
+
+class DictionaryConfig(AppConfig):
+    name = 'signbank.dictionary'
+
+    def ready(self):
+        # Connect the signal handlers.
+        from . import signals  # noqa: F401
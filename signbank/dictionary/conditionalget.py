@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP conditional GET for the public gloss pages, the public ECVs and the sitemap, which crawlers and ELAN clients
+poll: unchanged resources are answered with 304 Not Modified before the view runs its queries or renders anything.
+
+The validators are derived from Gloss.updated_at and the DatasetChangeCounters, which the signal handlers in
+signals.py increment when the Glosses, Translations, GlossTranslations, GlossVideos or GlossRelations of a Dataset
+change, once per transaction after it is committed. The HTML pages also depend on the flatpages of the menu, the latest admin LogEntry stands for them, and on
+the language. They are only validated for anonymous users, the pages of logged in users show their notifications.
+"""
+from __future__ import unicode_literals
+
+import hashlib
+from calendar import timegm
+from functools import wraps
+
+from django.contrib.admin.models import LogEntry
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.translation import get_language
+
+from .models import Dataset, DatasetChangeCounter, Gloss
+
+# Increments the DatasetChangeCounters of the Datasets dataset_ids and of the Glosses gloss_ids, creating the missing
+# ones. The rows are locked in the order of dataset_id, so concurrent increments can not deadlock.
+RECORD_CHANGES_SQL = """
+INSERT INTO dictionary_datasetchangecounter (dataset_id, count, changed_at)
+SELECT id, 1, %(now)s FROM dictionary_dataset
+WHERE id = ANY(%(dataset_ids)s) OR id IN (SELECT dataset_id FROM dictionary_gloss WHERE id = ANY(%(gloss_ids)s))
+ORDER BY id
+ON CONFLICT (dataset_id) DO UPDATE SET count = dictionary_datasetchangecounter.count + 1,
+    changed_at = EXCLUDED.changed_at
+"""
+
+
+def get_pending_changes():
+    """Returns the (Dataset ids, Gloss ids) whose changes are recorded when the transaction is committed."""
+    if not hasattr(connection, 'pending_dataset_changes'):
+        connection.pending_dataset_changes = (set(), set())
+    return connection.pending_dataset_changes
+
+
+def flush_changes():
+    """
+    Increments the DatasetChangeCounters of the pending changes, once per Dataset. Changes left over from a rolled
+    back transaction are counted with the next one, an extra increment only makes clients fetch again.
+    """
+    pending_dataset_ids, pending_gloss_ids = get_pending_changes()
+    if not pending_dataset_ids and not pending_gloss_ids:
+        return
+    params = {'dataset_ids': sorted(pending_dataset_ids), 'gloss_ids': sorted(pending_gloss_ids),
+              'now': timezone.now()}
+    pending_dataset_ids.clear()
+    pending_gloss_ids.clear()
+    with connection.cursor() as cursor:
+        cursor.execute(RECORD_CHANGES_SQL, params)
+
+
+def record_changes(dataset_ids=(), gloss_ids=()):
+    """
+    Increments the DatasetChangeCounters of dataset_ids and of the Datasets of gloss_ids after the transaction is
+    committed. The counters are not locked while the transaction runs, so the editors of a Dataset, and long imports,
+    do not wait for each other.
+    """
+    pending_dataset_ids, pending_gloss_ids = get_pending_changes()
+    pending_dataset_ids.update(dataset_id for dataset_id in dataset_ids if dataset_id is not None)
+    pending_gloss_ids.update(gloss_id for gloss_id in gloss_ids if gloss_id is not None)
+    # The first callback increments the counters of all the changes of the transaction, the others find none.
+    transaction.on_commit(flush_changes)
+
+
+def record_dataset_changes(dataset_ids):
+    """Increments the DatasetChangeCounters of dataset_ids when the transaction is committed."""
+    record_changes(dataset_ids=dataset_ids)
+
+
+def record_gloss_changes(gloss_ids):
+    """Increments the DatasetChangeCounters of the Datasets of gloss_ids when the transaction is committed."""
+    record_changes(gloss_ids=gloss_ids)
+
+
+def get_dataset_change_count(dataset):
+    """Returns the count of the DatasetChangeCounter of dataset, 0 if it has not changed yet."""
+    return DatasetChangeCounter.objects.filter(dataset=dataset).values_list('count', flat=True).first() or 0
+
+
+def get_etag(*values):
+    """Returns a weak ETag of values, the HTML pages are only semantically equivalent (csrf tokens)."""
+    return 'W/"%s"' % hashlib.sha1(":".join(str(value) for value in values).encode('utf-8')).hexdigest()
+
+
+def get_site_version():
+    """Returns (the id, the time) of the latest admin LogEntry, which changes when the flatpages change."""
+    latest = LogEntry.objects.aggregate(pk=Max('pk'), action_time=Max('action_time'))
+    return latest['pk'], latest['action_time']
+
+
+def get_public_datasets_version():
+    """Returns the (id, count) pairs of the public Datasets, and when the latest of them changed."""
+    datasets = list(Dataset.objects.filter(is_public=True).order_by('pk').values_list(
+        'pk', 'change_counter__count', 'change_counter__changed_at'))
+    changed_at = [dataset_changed_at for pk, count, dataset_changed_at in datasets if dataset_changed_at]
+    return [(pk, count) for pk, count, dataset_changed_at in datasets], max(changed_at, default=None)
+
+
+def latest(*datetimes):
+    return max((value for value in datetimes if value is not None), default=None)
+
+
+def public_gloss_validators(request, pk, **kwargs):
+    """The validators of the public page of Gloss pk."""
+    if request.user.is_authenticated:
+        return None
+    gloss = Gloss.objects.filter(pk=pk, published=True).values_list(
+        'updated_at', 'dataset__change_counter__count', 'dataset__change_counter__changed_at').first()
+    if gloss is None:
+        return None
+    updated_at, count, changed_at = gloss
+    site_pk, site_changed_at = get_site_version()
+    return (get_etag('gloss', pk, updated_at.isoformat(), count, site_pk, get_language()),
+            latest(updated_at, changed_at, site_changed_at))
+
+
+def public_gloss_list_validators(request, **kwargs):
+    """The validators of the public gloss list, with the search in the query string."""
+    if request.user.is_authenticated:
+        return None
+    datasets, changed_at = get_public_datasets_version()
+    site_pk, site_changed_at = get_site_version()
+    return (get_etag('list', request.get_full_path(), datasets, site_pk, get_language()),
+            latest(changed_at, site_changed_at))
+
+
+def public_ecv_validators(request, dataset_id, **kwargs):
+    """The validators of the public ECV of a Dataset."""
+    dataset = Dataset.objects.filter(pk=dataset_id, is_public=True).values_list(
+        'change_counter__count', 'change_counter__changed_at').first()
+    if dataset is None:
+        return None
+    count, changed_at = dataset
+    return get_etag('ecv', dataset_id, count), changed_at
+
+
+def sitemap_validators(request, **kwargs):
+    """The validators of the sitemap, the published glosses of the public Datasets and the flatpages."""
+    datasets, changed_at = get_public_datasets_version()
+    site_pk, site_changed_at = get_site_version()
+    return get_etag('sitemap', request.get_full_path(), datasets, site_pk), latest(changed_at, site_changed_at)
+
+
+def conditional_get(get_validators):
+    """
+    Decorator answering GET and HEAD requests with 304 Not Modified when the validators are the ones the client has.
+    get_validators(request, *args, **kwargs) returns (etag, last modified datetime), or None to run the view anyway.
+    The view finds the ETag in request.etag, e.g. to cache its response under it.
+    """
+    def decorator(view):
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            validators = None
+            if request.method in ('GET', 'HEAD'):
+                validators = get_validators(request, *args, **kwargs)
+            if validators is None:
+                return view(request, *args, **kwargs)
+            etag, last_modified = validators
+            request.etag = etag
+            timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            if timestamp and not response.has_header('Last-Modified'):
+                response['Last-Modified'] = http_date(timestamp)
+            response.setdefault('ETag', etag)
+            return response
+        return inner
+    return decorator
@@ -22,12 +22,16 @@ from django.shortcuts import render, reverse
 from django.utils.timezone import get_current_timezone
 from django.utils.translation import ugettext as _
 from django_comments.models import Comment
-from guardian.shortcuts import get_objects_for_user, get_perms
 from tagging.models import Tag, TaggedItem
 
+from .conditionalget import record_dataset_changes
+from .datasetpermissions import get_allowed_dataset_ids, has_dataset_perm
+from .fieldchoices import get_field_choices, invalidate_field_choices
 from .forms import CSVFileOnlyUpload, CSVUploadForm
 from .models import (Dataset, FieldChoice, Gloss, GlossTranslations, Language,
                      ManualValidationAggregation, ShareValidationAggregation, ValidationRecord)
+from .search import update_search_documents
+from .validationsummary import update_validation_summaries
 from .tasks import retrieve_videos_for_glosses
 from ..video.models import GlossVideo
 
@@ -51,7 +55,7 @@ def import_gloss_csv(request):
         form = CSVUploadForm(request.POST, request.FILES)
         if form.is_valid():
             dataset = form.cleaned_data['dataset']
-            if 'view_dataset' not in get_perms(request.user, dataset):
+            if not has_dataset_perm(request.user, 'view_dataset', dataset):
                 # If user has no permissions to dataset, raise PermissionDenied to show 403 template.
                 msg = _("You do not have permissions to import glosses to this lexicon.")
                 messages.error(request, msg)
@@ -102,10 +106,10 @@ def import_gloss_csv(request):
     else:
         # If request type is not POST, return to the original form.
         csv_form = CSVUploadForm()
-        allowed_datasets = get_objects_for_user(request.user, 'dictionary.view_dataset')
+        allowed_datasets = get_allowed_dataset_ids(request.user)
         # Make sure we only list datasets the user has permissions to.
         csv_form.fields["dataset"].queryset = csv_form.fields["dataset"].queryset.filter(
-            id__in=[x.id for x in allowed_datasets])
+            id__in=allowed_datasets)
         return render(request, "dictionary/import_gloss_csv.html",
                       {'import_csv_form': csv_form}, )
 
@@ -189,10 +193,10 @@ def import_nzsl_share_gloss_csv(request):
     if not request.method == "POST":
         # If request type is not POST, return to the original form.
         csv_form = CSVUploadForm()
-        allowed_datasets = get_objects_for_user(request.user, "dictionary.view_dataset")
+        allowed_datasets = get_allowed_dataset_ids(request.user)
         # Make sure we only list datasets the user has permissions to.
         csv_form.fields["dataset"].queryset = csv_form.fields["dataset"].queryset.filter(
-            id__in=[x.id for x in allowed_datasets])
+            id__in=allowed_datasets)
         return render(request, "dictionary/import_nzsl_share_gloss_csv.html",
                       {"import_csv_form": csv_form}, )
 
@@ -208,7 +212,7 @@ def import_nzsl_share_gloss_csv(request):
 
     new_glosses = []
     dataset = form.cleaned_data["dataset"]
-    if "view_dataset" not in get_perms(request.user, dataset):
+    if not has_dataset_perm(request.user, "view_dataset", dataset):
         # If user has no permissions to dataset, raise PermissionDenied to show 403 template.
         msg = _("You do not have permissions to import glosses to this lexicon.")
         messages.error(request, msg)
@@ -369,12 +373,12 @@ def confirm_import_nzsl_share_gloss_csv(request):
         gloss_content_type = ContentType.objects.get_for_model(Gloss)
         site = Site.objects.get_current()
         comment_submit_date = datetime.datetime.now(tz=get_current_timezone())
-        semantic_fields = FieldChoice.objects.filter(
-            field="semantic_field"
-        ).values_list("english_name", "pk")
-        semantic_fields_dict = {field[0]: field[1] for field in semantic_fields}
-        signers = FieldChoice.objects.filter(field="signer")
-        signer_dict = {signer.english_name: signer for signer in signers}
+        field_choices = get_field_choices()
+        semantic_fields_dict = {
+            field.english_name: field.pk for field in field_choices.get_choices("semantic_field")
+        }
+        signer_dict = {signer.english_name: signer for signer in field_choices.get_choices("signer")}
+        # The new signers need machine values that are not in use, check the database instead of the registry.
         existing_machine_values = [
             mv for mv in FieldChoice.objects.all().values_list("machine_value", flat=True)
         ]
@@ -436,6 +440,9 @@ def confirm_import_nzsl_share_gloss_csv(request):
                     machine_value=new_machine_value
                 ))
         new_signers = FieldChoice.objects.bulk_create(create_signers)
+        if new_signers:
+            # bulk_create does not send the signals that update the FieldChoiceRegistry.
+            invalidate_field_choices()
         for signer in new_signers:
             signer_dict[signer.english_name] = signer
 
@@ -564,6 +571,11 @@ def confirm_import_nzsl_share_gloss_csv(request):
         Gloss.semantic_field.through.objects.bulk_create(bulk_semantic_fields)
         TaggedItem.objects.bulk_create(bulk_tagged_items)
         ShareValidationAggregation.objects.bulk_create(bulk_share_validation_aggregations)
+        # Bulk operations do not send signals, update the search documents and validation summaries of the
+        # imported glosses.
+        update_search_documents({gloss.pk for gloss in bulk_created + bulk_update_glosses})
+        update_validation_summaries({aggregation.gloss_id for aggregation in bulk_share_validation_aggregations})
+        record_dataset_changes([dataset.pk])
 
         # Add the video-update only glosses
         for video_import_gloss_data in video_import_only_glosses_data:
@@ -765,6 +777,7 @@ def confirm_import_qualtrics_csv(request):
         # ignoring conflicts so the unique together on the model filters out potential duplicates
         ValidationRecord.objects.bulk_create(validation_records_added, ignore_conflicts=True)
         TaggedItem.objects.bulk_create(bulk_tagged_items, ignore_conflicts=True)
+        update_validation_summaries(gloss_pks)
         TaggedItem.objects.filter(
             content_type=gloss_content_type,
             object_id__in=gloss_pks,
@@ -950,6 +963,7 @@ def confirm_import_manual_validation(request):
                 ))
 
         ManualValidationAggregation.objects.bulk_create(manual_validation_aggregations)
+        update_validation_summaries({aggregation.gloss_id for aggregation in manual_validation_aggregations})
 
         del request.session["group_row_map"]
         del request.session["glosses"]
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+The Dataset permissions of users, resolved from the django-guardian object permissions once per user and cached.
+
+get_dataset_perms() and get_allowed_dataset_ids() replace guardian's get_perms() and get_objects_for_user() for
+Datasets. The permissions of a user are kept on the user object for the rest of the request. When the cache is shared
+between the processes (e.g. Redis or memcached) they are also cached for settings.DATASET_PERMISSIONS_CACHE_TIMEOUT
+seconds, and the signal handlers in signals.py invalidate them in all processes when object permissions, group
+memberships, superusers or Datasets change. A cache of each process (LocMemCache) could not be invalidated in the
+others, so revoked permissions would still be used there, the permissions are not cached across requests with it.
+"""
+from __future__ import unicode_literals
+
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import Permission, User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from guardian.models import GroupObjectPermission, UserObjectPermission
+from guardian.utils import get_anonymous_user
+
+from .models import Dataset
+
+#: The cache key of the generation token of the cached Dataset permissions.
+GENERATION_CACHE_KEY = 'dataset_perms_generation'
+#: The cache backends of a single process, the permissions are not cached across requests with them.
+PROCESS_CACHE_BACKENDS = (
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+def is_cache_shared():
+    """Returns True if the default cache is shared between processes, so that invalidating it reaches all of them."""
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_CACHE_BACKENDS
+
+
+def get_generation():
+    generation = cache.get(GENERATION_CACHE_KEY)
+    if generation is None:
+        cache.add(GENERATION_CACHE_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(GENERATION_CACHE_KEY, '')
+    return generation
+
+
+def get_user_cache_key(user_id):
+    return 'dataset_perms:{generation}:{user}'.format(generation=get_generation(), user=user_id)
+
+
+def get_dataset_content_type():
+    return ContentType.objects.get_for_model(Dataset)
+
+
+def load_dataset_perms(user):
+    """Returns {dataset id: [codenames]} of the Dataset object permissions of user, directly and through groups."""
+    if not user.is_active:
+        return {}
+    content_type = get_dataset_content_type()
+    if user.is_superuser:
+        codenames = sorted(Permission.objects.filter(content_type=content_type).values_list('codename', flat=True))
+        return {pk: codenames for pk in Dataset.objects.values_list('pk', flat=True)}
+    user_perms = UserObjectPermission.objects.filter(user=user, content_type=content_type).values_list(
+        'object_pk', 'permission__codename')
+    group_perms = GroupObjectPermission.objects.filter(group__user=user, content_type=content_type).values_list(
+        'object_pk', 'permission__codename')
+    perms = defaultdict(set)
+    for object_pk, codename in user_perms.union(group_perms):
+        perms[int(object_pk)].add(codename)
+    return {pk: sorted(codenames) for pk, codenames in perms.items()}
+
+
+def get_user(user):
+    if user.is_anonymous:
+        # Like guardian, use the User guardian has for anonymous users.
+        return get_anonymous_user()
+    return user
+
+
+def get_user_dataset_perms(user):
+    """
+    Returns {dataset id: frozenset(codenames)} of user, from the user object or the shared cache if they are there.
+    """
+    user = get_user(user)
+    if not hasattr(user, '_dataset_perms_cache'):
+        if is_cache_shared():
+            cache_key = get_user_cache_key(user.pk)
+            perms = cache.get(cache_key)
+            if perms is None:
+                perms = load_dataset_perms(user)
+                cache.set(cache_key, perms, settings.DATASET_PERMISSIONS_CACHE_TIMEOUT)
+        else:
+            perms = load_dataset_perms(user)
+        user._dataset_perms_cache = {pk: frozenset(codenames) for pk, codenames in perms.items()}
+    return user._dataset_perms_cache
+
+
+def get_codename(perm):
+    # 'dictionary.view_dataset' and 'view_dataset' are the same permission.
+    return perm.split('.', 1)[-1]
+
+
+def get_dataset_perms(user, dataset):
+    """Returns the codenames of the permissions user has for dataset (a Dataset or its id), like get_perms()."""
+    dataset_id = dataset.pk if isinstance(dataset, Dataset) else int(dataset)
+    return get_user_dataset_perms(user).get(dataset_id, frozenset())
+
+
+def has_dataset_perm(user, perm, dataset):
+    return get_codename(perm) in get_dataset_perms(user, dataset)
+
+
+def get_allowed_dataset_ids(user, perm='dictionary.view_dataset'):
+    """
+    Returns the ordered ids of the Datasets user has perm for, like get_objects_for_user(): superusers and users with
+    the global permission have it for all Datasets.
+    """
+    user = get_user(user)
+    codename = get_codename(perm)
+    if user.is_active and user.has_perm('dictionary.' + codename):
+        return list(Dataset.objects.order_by('pk').values_list('pk', flat=True))
+    return sorted(pk for pk, codenames in get_user_dataset_perms(user).items() if codename in codenames)
+
+
+def get_allowed_datasets(user, perm='dictionary.view_dataset'):
+    """Returns a QuerySet of the Datasets user has perm for."""
+    return Dataset.objects.filter(pk__in=get_allowed_dataset_ids(user, perm))
+
+
+def get_users_with_dataset_perms(datasets, with_superusers=False):
+    """
+    Returns {dataset id: [users]} of the users that have any permissions for each of datasets, directly or through
+    groups, like get_users_with_perms() for each Dataset but in two queries.
+    """
+    dataset_ids = [dataset.pk if isinstance(dataset, Dataset) else int(dataset) for dataset in datasets]
+    object_pks = [str(pk) for pk in dataset_ids]
+    content_type = get_dataset_content_type()
+    user_perms = UserObjectPermission.objects.filter(content_type=content_type, object_pk__in=object_pks).values_list(
+        'object_pk', 'user_id')
+    group_perms = GroupObjectPermission.objects.filter(
+        content_type=content_type, object_pk__in=object_pks, group__user__isnull=False).values_list(
+        'object_pk', 'group__user')
+    user_ids = defaultdict(set)
+    for object_pk, user_id in user_perms.union(group_perms):
+        user_ids[int(object_pk)].add(user_id)
+
+    users = User.objects.filter(pk__in=set().union(*user_ids.values()))
+    if with_superusers:
+        users = users | User.objects.filter(is_superuser=True)
+    users = list(users.order_by('username'))
+    return {pk: [user for user in users if user.pk in user_ids[pk] or (with_superusers and user.is_superuser)]
+            for pk in dataset_ids}
+
+
+def new_generation():
+    cache.set(GENERATION_CACHE_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_dataset_perms():
+    """Makes the cached Dataset permissions of all users out of date."""
+    new_generation()
+    # Other processes may cache the permissions again before the transaction is committed.
+    transaction.on_commit(new_generation)
+
+
+def invalidate_user_dataset_perms(user_ids):
+    """Deletes the cached Dataset permissions of the users in user_ids."""
+    def delete_cached_perms():
+        cache.delete_many([get_user_cache_key(user_id) for user_id in user_ids])
+    delete_cached_perms()
+    transaction.on_commit(delete_cached_perms)
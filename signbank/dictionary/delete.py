@@ -5,8 +5,8 @@ from django.contrib import messages
 from django.utils.translation import ugettext as _
 from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotAllowed
 
-from guardian.shortcuts import get_perms
 
+from .datasetpermissions import has_dataset_perm
 from .models import GlossURL
 
 
@@ -14,7 +14,7 @@ from .models import GlossURL
 def glossurl(request, glossurl):
     if request.method == 'POST':
         glossurl = get_object_or_404(GlossURL, id=glossurl)
-        if 'view_dataset' not in get_perms(request.user, glossurl.gloss.dataset):
+        if not has_dataset_perm(request.user, 'view_dataset', glossurl.gloss.dataset_id):
             # If user has no permissions to dataset, raise PermissionDenied to show 403 template.
             msg = _("You do not have permissions to add tags to glosses of this lexicon.")
             messages.error(request, msg)
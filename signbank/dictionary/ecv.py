@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+ELAN ECVs (externally controlled vocabularies) of the Datasets, built once per change of a Dataset and stored as
+files in the default storage, which all processes share.
+
+The files are named after the count of the DatasetChangeCounter of the Dataset, which the signal handlers increment
+when its glosses or their translations change (see conditionalget.py), so a changed Dataset gets a new file. The
+count only goes up, the files of the older counts are deleted by the delete_old_ecvs command, not by the requests
+that may still be serving them. A file is written with a streaming XML writer from one query of the glosses.
+"""
+from __future__ import unicode_literals
+
+import re
+import tempfile
+from xml.sax.saxutils import XMLGenerator
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+from django.utils import timezone
+
+from .conditionalget import get_dataset_change_count
+from .models import DatasetChangeCounter, Gloss
+
+#: The directory of the ECV files in the default storage.
+ECV_DIRECTORY = 'ecv'
+
+
+def get_ecv_glosses(dataset, public):
+    """Returns the glosses in the ECV of dataset, the public ECV only has the published ones."""
+    glosses = Gloss.objects.filter(dataset=dataset, exclude_from_ecv=False)
+    if public:
+        glosses = glosses.filter(published=True)
+    return glosses
+
+
+def write_ecv(dataset, glosses, out):
+    """Writes the ECV of the glosses of dataset to the binary file out."""
+    xml = XMLGenerator(out, encoding='utf-8', short_empty_elements=True)
+
+    def element(name, attrs, text=None, indent=''):
+        xml.ignorableWhitespace('\n' + indent)
+        xml.startElement(name, attrs)
+        if text is not None:
+            xml.characters(text)
+            xml.endElement(name)
+
+    xml.startDocument()
+    element('CV_RESOURCE', {
+        'AUTHOR': '', 'DATE': timezone.localtime().isoformat(), 'VERSION': '0.2',
+        'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+        'xsi:noNamespaceSchemaLocation': 'http://www.mpi.nl/tools/elan/EAFv2.8.xsd'})
+    for lang_def, lang_id, lang_label in (('http://cdb.iso.org/lg/CDB-00138502-001', 'eng', 'English (eng)'),
+                                          ('http://cdb.iso.org/lg/CDB-00138567-001', 'mri', 'Maori (mri)')):
+        element('LANGUAGE', {'LANG_DEF': lang_def, 'LANG_ID': lang_id, 'LANG_LABEL': lang_label}, indent='    ')
+        xml.endElement('LANGUAGE')
+    element('CONTROLLED_VOCABULARY', {'CV_ID': 'signbank-dataset-%s' % dataset.pk}, indent='    ')
+    for lang_ref in ('eng', 'mri'):
+        element('DESCRIPTION', {'LANG_REF': lang_ref}, indent='        ')
+        xml.endElement('DESCRIPTION')
+    for pk, idgloss, idgloss_mi in glosses.values_list('pk', 'idgloss', 'idgloss_mi').iterator():
+        element('CV_ENTRY_ML', {'CVE_ID': 'glossid%s' % pk}, indent='        ')
+        element('CVE_VALUE', {'DESCRIPTION': '', 'LANG_REF': 'eng'}, idgloss or '', indent='            ')
+        element('CVE_VALUE', {'DESCRIPTION': '', 'LANG_REF': 'mri'}, idgloss_mi or '', indent='            ')
+        xml.ignorableWhitespace('\n        ')
+        xml.endElement('CV_ENTRY_ML')
+    xml.ignorableWhitespace('\n    ')
+    xml.endElement('CONTROLLED_VOCABULARY')
+    xml.ignorableWhitespace('\n')
+    xml.endElement('CV_RESOURCE')
+    xml.endDocument()
+
+
+def get_ecv_prefix(dataset, public):
+    return 'dataset-{dataset}-{kind}-'.format(dataset=dataset.pk, kind='public' if public else 'all')
+
+
+def get_ecv_name(dataset, public):
+    """Returns the name of the up to date ECV file of dataset in the default storage, building it if needed."""
+    prefix = get_ecv_prefix(dataset, public)
+    name = '{directory}/{prefix}{count}.xml'.format(
+        directory=ECV_DIRECTORY, prefix=prefix, count=get_dataset_change_count(dataset))
+    if default_storage.exists(name):
+        return name
+
+    with tempfile.TemporaryFile() as ecv_file:
+        write_ecv(dataset, get_ecv_glosses(dataset, public), ecv_file)
+        ecv_file.seek(0)
+        saved_name = default_storage.save(name, File(ecv_file))
+    if saved_name != name:
+        # Another process saved the same file meanwhile.
+        default_storage.delete(saved_name)
+    return name
+
+
+def delete_old_ecv_files():
+    """Deletes the ECV files of the counts older than the current counts of their Datasets, returns how many."""
+    if not default_storage.exists(ECV_DIRECTORY):
+        return 0
+    counts = dict(DatasetChangeCounter.objects.values_list('dataset_id', 'count'))
+    pattern = re.compile(r'^dataset-(\d+)-(?:public|all)-(\d+)\.xml$')
+    deleted = 0
+    for filename in default_storage.listdir(ECV_DIRECTORY)[1]:
+        match = pattern.match(filename)
+        if match and int(match.group(2)) < counts.get(int(match.group(1)), 0):
+            default_storage.delete('%s/%s' % (ECV_DIRECTORY, filename))
+            deleted += 1
+    return deleted
+
+
+def ecv_response(dataset, public):
+    """Returns a response streaming the ECV file of dataset."""
+    return FileResponse(default_storage.open(get_ecv_name(dataset, public), 'rb'), content_type='text/xml')
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""Background CSV exports of the advanced gloss search, see ExportJob and the run_export_jobs command."""
+from __future__ import unicode_literals
+
+import csv
+import hashlib
+import io
+import tempfile
+from urllib.parse import urlsplit
+
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from django.utils.translation import ugettext as _
+from django_comments.models import Comment
+from notifications.signals import notify
+from reversion.models import Revision
+from tagging.models import TaggedItem
+
+from ..video.models import GlossVideo
+from .datasetpermissions import get_allowed_dataset_ids
+from .models import (ExportJob, Gloss, GlossTranslations, ManualValidationAggregation,
+                     ShareValidationAggregation, ValidationRecord)
+from .searchresults import normalize_search_query
+
+
+
+def get_export_query_hash(user, export_format, query):
+    """Returns a hash identifying the rows an export would contain for user."""
+    # Users with access to different datasets get different results for the same search.
+    dataset_ids = get_allowed_dataset_ids(user)
+    key = "|".join([export_format, query, ",".join(str(pk) for pk in dataset_ids)])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def get_export_data_state():
+    """Returns a fingerprint of the data the exports are built from, it changes whenever that data changes."""
+    state = [
+        Gloss.objects.aggregate(Count('pk'), Max('pk'), Max('updated_at')),
+        GlossTranslations.objects.aggregate(Count('pk'), Max('pk')),
+        GlossVideo.objects.aggregate(Count('pk'), Max('pk')),
+        TaggedItem.objects.aggregate(Count('pk'), Max('pk')),
+        ValidationRecord.objects.aggregate(Count('pk'), Max('pk')),
+        ShareValidationAggregation.objects.aggregate(Count('pk'), Max('pk')),
+        ManualValidationAggregation.objects.aggregate(Count('pk'), Max('pk')),
+        Comment.objects.aggregate(Count('pk'), Max('pk')),
+        # Edits of FieldChoices, Translations etc. are recorded as revisions.
+        Revision.objects.aggregate(Max('pk')),
+    ]
+    return hashlib.sha256(repr(state).encode('utf-8')).hexdigest()
+
+
+def request_export_job(request, export_format):
+    """
+    Returns an ExportJob for the search in request.
+    A finished artifact of an identical search is reused if the data has not changed since it was made.
+    """
+    query = normalize_search_query(request.GET)
+    query_hash = get_export_query_hash(request.user, export_format, query)
+    data_state = get_export_data_state()
+    matching_jobs = ExportJob.objects.filter(query_hash=query_hash, data_state=data_state)
+
+    # The user already has this export queued.
+    queued_job = matching_jobs.filter(
+        user=request.user, status__in=[ExportJob.Status.PENDING, ExportJob.Status.RUNNING]).first()
+    if queued_job:
+        return queued_job
+
+    job = ExportJob(user=request.user, format=export_format, query=query, query_hash=query_hash,
+                    data_state=data_state, base_url=request.build_absolute_uri('/'))
+    finished_job = matching_jobs.filter(status=ExportJob.Status.FINISHED).exclude(artifact='').first()
+    if finished_job and finished_job.artifact.storage.exists(finished_job.artifact.name):
+        # Share the existing file instead of exporting again.
+        job.artifact = finished_job.artifact.name
+        job.status = ExportJob.Status.FINISHED
+        job.started_at = job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+class ExportJobRequest(HttpRequest):
+    """A request recreated from an ExportJob, so that the GlossListView can be used outside of the request cycle."""
+
+    def __init__(self, job):
+        super(ExportJobRequest, self).__init__()
+        self.GET = QueryDict(job.query)
+        self.user = job.user
+        self.session = {}
+        base_url = urlsplit(job.base_url)
+        self._scheme = base_url.scheme or 'http'
+        self.META['HTTP_HOST'] = base_url.netloc
+
+    def _get_scheme(self):
+        return self._scheme
+
+
+def claim_next_export_job():
+    """Marks the oldest pending ExportJob as running and returns it, or None if there is nothing to do."""
+    with transaction.atomic():
+        # Rows locked by other workers are skipped, so several workers can run at the same time.
+        job = (ExportJob.objects.select_for_update(skip_locked=True)
+               .filter(status=ExportJob.Status.PENDING).order_by('created_at').first())
+        if job is None:
+            return None
+        job.status = ExportJob.Status.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+    return job
+
+
+def run_export_job(job):
+    """Writes the CSV of job to storage and notifies the user who requested it."""
+    # Imported here, adminviews imports this module.
+    from .adminviews import GlossListView
+
+    try:
+        view = GlossListView()
+        view.setup(ExportJobRequest(job))
+        # Rows are written to a temporary file first, the storage may not support appending.
+        with tempfile.TemporaryFile() as artifact_file:
+            csv_file = io.TextIOWrapper(artifact_file, encoding='utf-8', newline='')
+            csv.writer(csv_file).writerows(view.csv_export_rows(job.format))
+            # Detach so that closing the wrapper does not close the file, the storage reads bytes from it.
+            csv_file.detach()
+            artifact_file.seek(0)
+            filename = "{format}-{pk}.csv".format(format=job.format.lower(), pk=job.pk)
+            job.artifact.save(filename, File(artifact_file), save=False)
+    except Exception as e:
+        job.status = ExportJob.Status.FAILED
+        job.error = str(e)
+        job.finished_at = timezone.now()
+        job.save()
+        notify.send(sender=job.user, recipient=job.user, verb=_("could not finish a CSV export"),
+                    description=job.error, public=False)
+        raise
+
+    job.status = ExportJob.Status.FINISHED
+    job.finished_at = timezone.now()
+    job.save()
+    notify.send(sender=job.user, recipient=job.user, verb=_("finished a CSV export"), action_object=job,
+                description=job.get_format_display(), public=False)
+    return job
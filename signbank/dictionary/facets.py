@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Facet counts of the advanced gloss search: how many of the glosses matching the current search have each value
+of the FieldChoice ForeignKeys, ManyToManyFields and tags listed in settings.GLOSS_LIST_FACETS.
+
+The counts of all facets are computed in one query, a UNION ALL of a grouped count per facet over the ids of
+the matching glosses, and cached under the normalized search query.
+"""
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import CharField, Count, F, IntegerField, Value
+from django.utils.translation import ugettext as _
+from tagging.models import TaggedItem
+
+from .filters import gloss_filters
+from .models import Gloss
+from .searchresults import normalize_search_query
+
+#: The name of the tags facet in settings.GLOSS_LIST_FACETS.
+TAGS_FACET = 'tags'
+
+
+def get_facet_param(name):
+    """Returns the GET parameter of the advanced search that filters by the values of facet name."""
+    if name == TAGS_FACET:
+        return 'tags'
+    for gloss_filter in gloss_filters.filters:
+        if gloss_filter.lookup == name:
+            return gloss_filter.param
+    return None
+
+
+def get_facet_label(name):
+    if name == TAGS_FACET:
+        return _("Tags")
+    return str(Gloss._meta.get_field(name).verbose_name)
+
+
+def facet_count_queryset(name, gloss_ids):
+    """Returns a values queryset of (facet, value, label, count) rows of facet name, for the glosses in gloss_ids."""
+    facet = Value(name, output_field=CharField())
+    if name == TAGS_FACET:
+        qs = TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(Gloss),
+                                       object_id__in=gloss_ids)
+        value, label = F('tag_id'), F('tag__name')
+    else:
+        field = Gloss._meta.get_field(name)
+        if field.many_to_many:
+            qs = field.remote_field.through.objects.filter(gloss__in=gloss_ids)
+            value, label = F('fieldchoice_id'), F('fieldchoice__english_name')
+        else:
+            # The FieldChoice ForeignKeys refer to the machine_value of the FieldChoice.
+            qs = Gloss.objects.filter(pk__in=gloss_ids, **{name + '__isnull': False})
+            value, label = F(field.attname), F(name + '__english_name')
+    return qs.order_by().values(facet=facet, value=value, label=label).annotate(
+        count=Count('pk', output_field=IntegerField()))
+
+
+def compute_facets(queryset, names):
+    """Returns the facet counts of names for the glosses in queryset, in one query."""
+    gloss_ids = queryset.order_by().prefetch_related(None).values('pk')
+    counts = {name: [] for name in names}
+    if names:
+        querysets = [facet_count_queryset(name, gloss_ids) for name in names]
+        for row in querysets[0].union(*querysets[1:], all=True):
+            counts[row['facet']].append({'value': row['value'], 'label': row['label'], 'count': row['count']})
+    return [{'name': name, 'label': get_facet_label(name), 'param': get_facet_param(name),
+             'values': sorted(counts[name], key=lambda row: (-row['count'], row['label']))}
+            for name in names]
+
+
+def get_facets_cache_key(user, query):
+    query_hash = hashlib.sha256(query.encode('utf-8')).hexdigest()
+    return "search_facets:{user}:{hash}".format(user=user.pk, hash=query_hash)
+
+
+def get_search_facets(view):
+    """Returns the facet counts of the search of a GlossListView, cached under the normalized search query."""
+    request = view.request
+    cache_key = get_facets_cache_key(request.user, normalize_search_query(request.GET))
+    facets = cache.get(cache_key)
+    if facets is None:
+        facets = compute_facets(view.get_queryset(), list(settings.GLOSS_LIST_FACETS))
+        cache.set(cache_key, facets, settings.SEARCH_FACETS_CACHE_TIMEOUT)
+    return facets
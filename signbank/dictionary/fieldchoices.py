@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+An in-memory registry of all FieldChoices, so that looking up a FieldChoice by its machine_value or english_name
+does not query the database.
+
+The registry is loaded once per process. Saving or deleting a FieldChoice clears it (see signals.py) and changes
+a generation token in the cache, so that other processes sharing the cache reload theirs. A process also reloads
+its registry when it is older than settings.FIELDCHOICE_REGISTRY_TIMEOUT, which bounds how stale it can get when
+the cache is not shared between processes (e.g. LocMemCache).
+"""
+from __future__ import unicode_literals
+
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import FieldChoice
+
+#: The cache key of the generation token of the FieldChoices.
+GENERATION_CACHE_KEY = 'fieldchoice_registry_generation'
+
+
+class FieldChoiceRegistry(object):
+    """All FieldChoices, by machine_value, by pk, by field and by (field, english_name)."""
+
+    def __init__(self, choices):
+        self.by_machine_value = {}
+        self.by_pk = {}
+        self.by_field = defaultdict(list)
+        self.by_name = {}
+        # FieldChoices are ordered by field and english_name.
+        for choice in choices:
+            self.by_machine_value[choice.machine_value] = choice
+            self.by_pk[choice.pk] = choice
+            self.by_field[choice.field].append(choice)
+            self.by_name.setdefault((choice.field, choice.english_name), choice)
+
+    def get(self, machine_value):
+        """Returns the FieldChoice with machine_value, or None."""
+        try:
+            return self.by_machine_value.get(int(machine_value))
+        except (TypeError, ValueError):
+            return None
+
+    def get_by_pk(self, pk):
+        try:
+            return self.by_pk.get(int(pk))
+        except (TypeError, ValueError):
+            return None
+
+    def get_by_name(self, field, english_name):
+        """Returns the FieldChoice of field with english_name, or None."""
+        return self.by_name.get((field, english_name))
+
+    def get_choices(self, field):
+        """Returns the FieldChoices of field, ordered by english_name."""
+        return list(self.by_field.get(field, []))
+
+    def filter(self, field, machine_values):
+        """Returns the FieldChoices of field with one of machine_values."""
+        choices = (self.get(machine_value) for machine_value in machine_values)
+        return [choice for choice in choices if choice is not None and choice.field == field]
+
+    def get_name(self, machine_value, default=''):
+        choice = self.get(machine_value)
+        return choice.english_name if choice is not None else default
+
+
+_lock = threading.Lock()
+_registry = None
+_generation = None
+_loaded_at = 0
+
+
+def get_generation():
+    """Returns the generation token of the FieldChoices shared through the cache, None if the cache is a dummy."""
+    generation = cache.get(GENERATION_CACHE_KEY)
+    if generation is None:
+        # Another process may add it first.
+        cache.add(GENERATION_CACHE_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(GENERATION_CACHE_KEY)
+    return generation
+
+
+def get_field_choices():
+    """Returns the FieldChoiceRegistry of this process, reloaded if the FieldChoices have changed."""
+    global _registry, _generation, _loaded_at
+    generation = get_generation()
+    registry = _registry
+    if (registry is None or (generation is not None and generation != _generation)
+            or time.monotonic() - _loaded_at > settings.FIELDCHOICE_REGISTRY_TIMEOUT):
+        with _lock:
+            registry = FieldChoiceRegistry(FieldChoice.objects.all())
+            _registry, _generation, _loaded_at = registry, generation, time.monotonic()
+    return registry
+
+
+def get_fieldchoice(machine_value):
+    """Returns the FieldChoice with machine_value from the registry, like FieldChoice.objects.get(machine_value=...)."""
+    choice = get_field_choices().get(machine_value)
+    if choice is None:
+        raise FieldChoice.DoesNotExist("FieldChoice matching query does not exist.")
+    return choice
+
+
+def clear_field_choices():
+    """Clears the FieldChoiceRegistry of this process."""
+    global _registry
+    _registry = None
+
+
+def new_generation():
+    cache.set(GENERATION_CACHE_KEY, uuid.uuid4().hex, None)
+    clear_field_choices()
+
+
+def invalidate_field_choices():
+    """Makes all processes reload their FieldChoiceRegistry, called when a FieldChoice is saved or deleted."""
+    new_generation()
+    # The registries may be loaded again before the transaction is committed.
+    transaction.on_commit(new_generation)
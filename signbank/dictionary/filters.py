@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+The filters of the advanced gloss search (GlossListView).
+
+Every filter reads one or more GET parameters and compiles them into a Q object. Filters on multi-valued
+relations (translations, videos, topics, relations etc.) are compiled to correlated EXISTS subqueries, so
+a filtered queryset never contains duplicate glosses and never needs DISTINCT.
+"""
+from __future__ import unicode_literals
+
+from django.db.models import Exists, OuterRef, Q
+
+from ..video.models import GlossVideo
+from .models import Gloss, MorphologyDefinition, Relation, RelationToForeignSign, Translation
+from .search import search_glosses
+from .tagquery import compile_tag_query, tagged_q
+
+
+def exists(queryset):
+    """Returns a Q object for an EXISTS subquery."""
+    return Q(Exists(queryset))
+
+
+class GlossFilter(object):
+    """A filter of the advanced gloss search, applied when its GET parameter has a non-empty value."""
+
+    def __init__(self, param, lookup=None):
+        #: The GET parameter of the filter.
+        self.param = param
+        #: The field lookup the value is compared with, used by the generic filters.
+        self.lookup = lookup
+
+    def get_values(self, get):
+        return [value for value in get.getlist(self.param) if value != '']
+
+    def is_applied(self, get):
+        return bool(self.get_values(get))
+
+    def compile(self, values, get):
+        """Returns a Q object for the values of the parameter."""
+        raise NotImplementedError
+
+    def apply(self, queryset, get):
+        return queryset.filter(self.compile(self.get_values(get), get))
+
+
+class ValueFilter(GlossFilter):
+    """Compares a single valued field with the (last) value of the parameter."""
+
+    def compile(self, values, get):
+        return Q(**{self.lookup: values[-1]})
+
+
+class ChoicesFilter(GlossFilter):
+    """Matches any of the values of the parameter."""
+
+    def compile(self, values, get):
+        return Q(**{self.lookup + '__in': values})
+
+
+class CheckboxFilter(GlossFilter):
+    """A boolean field that is True when the checkbox is 'on'."""
+
+    def compile(self, values, get):
+        return Q(**{self.lookup: values[-1] == 'on'})
+
+
+def through_target(through):
+    """Returns the name of the field pointing to the related model in an automatically created through model."""
+    return [field.name for field in through._meta.get_fields()
+            if field.is_relation and field.name != 'gloss'][0]
+
+
+class ManyToManyFilter(GlossFilter):
+    """Glosses with any of the values in a ManyToManyField, as an EXISTS subquery on the through table."""
+
+    def compile(self, values, get):
+        through = Gloss._meta.get_field(self.lookup).remote_field.through
+        return exists(through.objects.filter(gloss=OuterRef('pk'), **{'%s__in' % through_target(through): values}))
+
+
+class FunctionFilter(GlossFilter):
+    """A filter compiled by a function(values, get) that returns a Q object."""
+
+    def __init__(self, param, function):
+        super(FunctionFilter, self).__init__(param)
+        self.function = function
+
+    def compile(self, values, get):
+        return self.function(values, get)
+
+
+class SearchFilter(GlossFilter):
+    """The free text search, done by the configured search backend, see search.py."""
+
+    def apply(self, queryset, get):
+        return search_glosses(queryset, self.get_values(get)[-1])
+
+
+def keyword_filter(values, get):
+    # The keyword is only searched for when a language is chosen.
+    languages = [value for value in get.getlist('trans_lang') if value != '']
+    if not languages:
+        return Q()
+    return exists(Translation.objects.filter(gloss=OuterRef('pk'), keyword__text__icontains=values[-1],
+                                             language__in=languages))
+
+
+def video_filter(has_video):
+    """Returns a function for the hasvideo or hasnovideo checkbox, they are ignored when both are given."""
+    def compile_video_filter(values, get):
+        if 'hasvideo' in get and 'hasnovideo' in get:
+            return Q()
+        videos = exists(GlossVideo.objects.filter(gloss=OuterRef('pk')))
+        return videos if (values[-1] == 'on') == has_video else ~videos
+    return compile_video_filter
+
+
+def multiple_videos_filter(values, get):
+    if values[-1] != 'on':
+        return Q()
+    # A video of the gloss, for which another video of the same gloss exists.
+    other_videos = GlossVideo.objects.filter(gloss=OuterRef('gloss')).exclude(pk=OuterRef('pk'))
+    return exists(GlossVideo.objects.filter(gloss=OuterRef('pk')).filter(Exists(other_videos)))
+
+
+def example_search_filter(values, get):
+    """
+    This search is intended to search for gloss IDs in fields videoexample1 to videoexample4. In these
+    fields, gloss IDs are within square brackets (eg: cat[123], 123 is the gloss ID).
+    When we search for a gloss ID (eg: 123), the search should return all the glosses that contain gloss ID
+    123 in one of their videoexample fields.
+    Search parameter is just the gloss id, so we are adding []s before doing the search.
+    """
+    val = '[' + values[-1] + ']'
+    return (Q(videoexample1__icontains=val) | Q(videoexample2__icontains=val) | Q(videoexample3__icontains=val) |
+            Q(videoexample4__icontains=val))
+
+
+def tags_filter(values, get):
+    # search is an implicit AND, the glosses must have all of the tags
+    query = Q()
+    for tag_pk in values:
+        query &= tagged_q(Gloss, pk=tag_pk)
+    return query
+
+
+def nottags_filter(values, get):
+    # exclude the glosses that have all of the tags
+    query = Q()
+    for tag_name in values:
+        query &= tagged_q(Gloss, name=tag_name)
+    return ~query
+
+
+def tag_query_filter(values, get):
+    # Raises TagQueryError for invalid queries, the view shows the error.
+    return compile_tag_query(Gloss, values[-1])
+
+
+def relation_filter(values, get):
+    return exists(Relation.objects.filter(source=OuterRef('pk'), target__idgloss__icontains=values[-1]))
+
+
+def has_relation_filter(values, get):
+    relations = Relation.objects.filter(source=OuterRef('pk'))
+    if values[-1] != 'all':
+        relations = relations.filter(role=values[-1])
+    return exists(relations)
+
+
+def morpheme_filter(values, get):
+    return exists(MorphologyDefinition.objects.filter(parent_gloss=OuterRef('pk'),
+                                                      morpheme__idgloss__icontains=values[-1]))
+
+
+def has_morpheme_of_type_filter(values, get):
+    return exists(MorphologyDefinition.objects.filter(parent_gloss=OuterRef('pk'), role=values[-1]))
+
+
+def relation_to_foreign_signs_filter(values, get):
+    return exists(RelationToForeignSign.objects.filter(gloss=OuterRef('pk'), other_lang=values[-1]))
+
+
+class GlossFilterRegistry(object):
+    """The filters of the advanced gloss search, in the order they are applied."""
+
+    def __init__(self, filters=()):
+        self.filters = list(filters)
+
+    def register(self, gloss_filter):
+        self.filters.append(gloss_filter)
+        return gloss_filter
+
+    def get_applied(self, get):
+        """Returns the filters that have a value in get."""
+        return [gloss_filter for gloss_filter in self.filters if gloss_filter.is_applied(get)]
+
+    def apply(self, queryset, get):
+        """Applies all the filters that have a value in get to queryset."""
+        for gloss_filter in self.get_applied(get):
+            queryset = gloss_filter.apply(queryset, get)
+        return queryset
+
+
+gloss_filters = GlossFilterRegistry([
+    # Search for multiple datasets (if provided)
+    ChoicesFilter('dataset', 'dataset'),
+    SearchFilter('search'),
+    # Search for glosses starting with a string
+    ValueFilter('gloss', 'idgloss__istartswith'),
+    ValueFilter('idgloss_mi', 'idgloss_mi__istartswith'),
+    FunctionFilter('keyword', keyword_filter),
+    CheckboxFilter('published', 'published'),
+    FunctionFilter('hasvideo', video_filter(has_video=True)),
+    FunctionFilter('hasnovideo', video_filter(has_video=False)),
+    FunctionFilter('multiplevideos', multiple_videos_filter),
+    # Language and basic property filters
+    ManyToManyFilter('dialect', 'dialect'),
+    ChoicesFilter('language', 'dataset__signlanguage'),
+    ValueFilter('notes', 'notes__icontains'),
+    ManyToManyFilter('semantic_field', 'semantic_field'),
+    FunctionFilter('tags', tags_filter),
+    FunctionFilter('nottags', nottags_filter),
+    FunctionFilter('tag_query', tag_query_filter),
+    FunctionFilter('relation_to_foreign_signs', relation_to_foreign_signs_filter),
+    ValueFilter('location', 'location'),
+    CheckboxFilter('one_or_two_handed', 'one_or_two_hand'),
+    FunctionFilter('example_search', example_search_filter),
+    ValueFilter('age_variation', 'age_variation'),
+    ValueFilter('handedness', 'handedness'),
+    ValueFilter('strong_handshape', 'strong_handshape'),
+    ManyToManyFilter('word_classes', 'wordclasses'),
+    CheckboxFilter('number_incorporated', 'number_incorporated'),
+    CheckboxFilter('locatable', 'locatable'),
+    CheckboxFilter('directional', 'directional'),
+    CheckboxFilter('fingerspelling', 'fingerspelling'),
+    CheckboxFilter('inflection_temporal', 'inflection_temporal'),
+    CheckboxFilter('inflection_manner_degree', 'inflection_manner_degree'),
+    CheckboxFilter('inflection_plural', 'inflection_plural'),
+    FunctionFilter('relation', relation_filter),
+    FunctionFilter('hasRelation', has_relation_filter),
+    FunctionFilter('morpheme', morpheme_filter),
+    FunctionFilter('hasMorphemeOfType', has_morpheme_of_type_filter),
+    ManyToManyFilter('usage', 'usage'),
+])
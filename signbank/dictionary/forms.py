@@ -3,16 +3,85 @@ from __future__ import unicode_literals
 
 from django import forms
 from django.contrib.contenttypes.models import ContentType
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.db.utils import OperationalError, ProgrammingError
+from django.forms.models import ModelChoiceIterator
 from django.utils.translation import ugettext_lazy as _
 from tagging.models import Tag
 
+from .fieldchoices import get_field_choices
 from .models import (AllowedTags, Dataset, FieldChoice, Gloss, Lemma, GlossRelation,
                      GlossURL, Language, MorphologyDefinition, Relation,
                      RelationToForeignSign, SignLanguage)
 
 
+class FieldChoiceIterator(ModelChoiceIterator):
+    """Iterates over the FieldChoices of a field from the FieldChoiceRegistry, instead of querying them."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for choice in self.field.get_choices():
+            yield self.choice(choice)
+
+    def __len__(self):
+        return len(self.field.get_choices()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.get_choices())
+
+
+class FieldChoiceFormFieldMixin(object):
+    """Looks up the FieldChoices of field (FieldChoice.field) in the FieldChoiceRegistry."""
+    iterator = FieldChoiceIterator
+
+    def __init__(self, field, **kwargs):
+        self.choice_field = field
+        super(FieldChoiceFormFieldMixin, self).__init__(queryset=FieldChoice.objects.filter(field=field), **kwargs)
+
+    def get_choices(self):
+        return get_field_choices().get_choices(self.choice_field)
+
+    def get_choice(self, value):
+        if isinstance(value, FieldChoice):
+            value = getattr(value, self.to_field_name or 'pk')
+        registry = get_field_choices()
+        choice = registry.get(value) if self.to_field_name == 'machine_value' else registry.get_by_pk(value)
+        if choice is None or choice.field != self.choice_field:
+            return None
+        return choice
+
+
+class FieldChoiceField(FieldChoiceFormFieldMixin, forms.ModelChoiceField):
+    """A ModelChoiceField of the FieldChoices of field."""
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        choice = self.get_choice(value)
+        if choice is None:
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+        return choice
+
+
+class FieldChoiceMultipleField(FieldChoiceFormFieldMixin, forms.ModelMultipleChoiceField):
+    """A ModelMultipleChoiceField of the FieldChoices of field, cleaned to a list instead of a QuerySet."""
+
+    def _check_values(self, value):
+        try:
+            value = frozenset(value)
+        except TypeError:
+            raise ValidationError(self.error_messages['invalid_list'], code='invalid_list')
+        choices = []
+        for val in value:
+            choice = self.get_choice(val)
+            if choice is None:
+                raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice',
+                                      params={'value': val})
+            choices.append(choice)
+        return choices
+
+
 class GlossCreateForm(forms.ModelForm):
     """
     Form for creating a new gloss.
@@ -95,8 +164,7 @@ class GlossSearchForm(forms.ModelForm):
     trans_lang = forms.ModelChoiceField(required=False, empty_label=_('Choose language'), queryset=Language.objects.all())
 
     # Adding topics
-    semantic_field = forms.ModelMultipleChoiceField(label=_('Topic'), queryset=FieldChoice.objects.filter(field='semantic_field').order_by('english_name'),
-                                            required=False)
+    semantic_field = FieldChoiceMultipleField('semantic_field', label=_('Topic'), required=False)
 
     try:
         qs = AllowedTags.objects.get(content_type=ContentType.objects.get_for_model(Gloss)).allowed_tags.all()
@@ -104,6 +172,9 @@ class GlossSearchForm(forms.ModelForm):
         qs = Tag.objects.all()
     tags = forms.ModelMultipleChoiceField(queryset=qs, required=False)
     nottags = forms.ModelMultipleChoiceField(queryset=qs)
+    # Translators: GlossSearchForm label
+    tag_query = forms.CharField(label=_('Tag query'), required=False,
+                                widget=forms.TextInput(attrs={'placeholder': _('tag1 AND (tag2 OR NOT tag3)')}))
 
     published = forms.BooleanField(label=_('Is published'), required=False)
 
@@ -115,22 +186,17 @@ class GlossSearchForm(forms.ModelForm):
     relation_to_foreign_signs = forms.ChoiceField(label=_('Relation to foreign signs'), choices=build_related_to_choices,
                                                   required=False, widget=forms.Select(attrs=ATTRS_FOR_FORMS))
     # Adding usage
-    usage = forms.ModelMultipleChoiceField(label=_('Usage'), queryset=FieldChoice.objects.filter(field='usage').order_by('english_name'),
-                                           required=False)
-    location = forms.ModelChoiceField(label=_('Location'), queryset=FieldChoice.objects.filter(field='location').order_by('english_name'),
-                                      to_field_name='machine_value', required=False)
+    usage = FieldChoiceMultipleField('usage', label=_('Usage'), required=False)
+    location = FieldChoiceField('location', label=_('Location'), to_field_name='machine_value', required=False)
 
-    age_variation = forms.ModelChoiceField(label=_('Age Variation'), queryset=FieldChoice.objects.filter(field='age_variation'),
-                                           to_field_name='machine_value', required=False)
+    age_variation = FieldChoiceField('age_variation', label=_('Age Variation'), to_field_name='machine_value',
+                                     required=False)
     example_search = forms.CharField(label=_('Example Field search'), required=False)
-    strong_handshape = forms.ModelChoiceField(label=_('Strong handshape'), queryset=FieldChoice.objects.filter(field='strong_handshape').order_by('english_name'),
-                                              to_field_name='machine_value', required=False)
+    strong_handshape = FieldChoiceField('strong_handshape', label=_('Strong handshape'), to_field_name='machine_value',
+                                        required=False)
     one_or_two_handed = forms.BooleanField(label=_('One or two handed'), required=False)
-    word_classes = forms.ModelMultipleChoiceField(label=_('Word classes'),
-                                                  queryset=FieldChoice.objects.filter(field='wordclass'),
-                                                  required=False)
-    handedness = forms.ModelChoiceField(label=_('Handedness'), queryset=FieldChoice.objects.filter(field='handedness'),
-                                        to_field_name='machine_value', required=False)
+    word_classes = FieldChoiceMultipleField('wordclass', label=_('Word classes'), required=False)
+    handedness = FieldChoiceField('handedness', label=_('Handedness'), to_field_name='machine_value', required=False)
 
     # Adding morphology fields
     number_incorporated = forms.BooleanField(label=_('Number incorporated'), required=False)
@@ -204,6 +270,8 @@ class GlossRelationSearchForm(forms.Form):
     except (ObjectDoesNotExist, OperationalError, ProgrammingError):
         qs = Tag.objects.all()
     tags = forms.ModelMultipleChoiceField(queryset=qs, required=False, label=_("Relation type"))
+    tag_query = forms.CharField(label=_('Tag query'), required=False,
+                                widget=forms.TextInput(attrs={'placeholder': _('tag1 AND (tag2 OR NOT tag3)')}))
 
     class Meta:
         ATTRS_FOR_FORMS = {'class': 'form-control'}
@@ -245,9 +313,8 @@ class RelationForm(forms.ModelForm):
     # Translators: RelationForm label
     targetid = forms.CharField(label=_('Target Gloss'))
     # Note that to_field_name has to be unique!
-    role = forms.ModelChoiceField(label=_('Type'), queryset=FieldChoice.objects.filter(field='MorphologyType'),
-                                  to_field_name='machine_value', empty_label=None,
-                                  widget=forms.Select(attrs=ATTRS_FOR_FORMS))
+    role = FieldChoiceField('MorphologyType', label=_('Type'), to_field_name='machine_value', empty_label=None,
+                            widget=forms.Select(attrs=ATTRS_FOR_FORMS))
 
     class Meta:
         model = Relation
@@ -279,9 +346,8 @@ class MorphologyForm(forms.ModelForm):
     #    'MorphologyType'), widget=forms.Select(attrs=ATTRS_FOR_FORMS))
 
     # Note that to_field_name has to be unique!
-    role = forms.ModelChoiceField(label=_('Type'), queryset=FieldChoice.objects.filter(field='MorphologyType'),
-                                  to_field_name='machine_value', empty_label=None,
-                                  widget=forms.Select(attrs=ATTRS_FOR_FORMS))
+    role = FieldChoiceField('MorphologyType', label=_('Type'), to_field_name='machine_value', empty_label=None,
+                            widget=forms.Select(attrs=ATTRS_FOR_FORMS))
 
     # role = forms.ChoiceField(label=_('Type'), widget=forms.Select(attrs=ATTRS_FOR_FORMS))
     # Translators: MorphologyForm label
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+The fields of many Glosses at once, the same dictionaries Gloss.get_fields_dict() returns for each of them, from a
+fixed number of queries: the Glosses, the translation languages of their Datasets, their GlossTranslations, the
+related objects of each related model, their wordclasses and their first videos. The field metadata is computed once.
+"""
+from __future__ import unicode_literals
+
+from collections import defaultdict
+
+from django.contrib.sites.models import Site
+from django.urls import reverse
+from django.utils.translation import ugettext as _
+
+from ..video.models import GlossVideo
+from .models import Dataset, Gloss, GlossTranslations
+
+
+def get_field_columns(fieldnames):
+    """Returns (field, verbose name, fieldchoice category) of the concrete Gloss fields that are in fieldnames."""
+    columns = []
+    for field in (Gloss.get_field(name) for name in Gloss.get_field_names()):
+        verbose_name = field.verbose_name.title()
+        if verbose_name in fieldnames:
+            columns.append((field, verbose_name, getattr(field, 'field_choice_category', None)))
+    return columns
+
+
+def load_related_objects(glosses, columns):
+    """Returns {field name: {value: related object}} of the ForeignKey columns, one query per related model."""
+    values = defaultdict(set)
+    fields = {}
+    for field, verbose_name, fieldchoice_category in columns:
+        if field.many_to_one:
+            target = field.target_field.attname
+            key = (field.related_model, target)
+            fields[field.name] = key
+            values[key].update(getattr(gloss, field.attname) for gloss in glosses)
+    objects = {}
+    for (model, target), model_values in values.items():
+        model_values.discard(None)
+        objects[(model, target)] = {getattr(obj, target): obj for obj in model._base_manager.filter(
+            **{target + '__in': model_values}).order_by()} if model_values else {}
+    return {name: objects[key] for name, key in fields.items()}
+
+
+def load_translation_fields(glosses, fieldnames):
+    """Returns {gloss id: {field name: translations}} of the GlossTranslations fields in fieldnames."""
+    languages = defaultdict(list)
+    through = Dataset.translation_languages.through
+    for dataset_id, language in ((item.dataset_id, item.language) for item in through.objects.filter(
+            dataset_id__in={gloss.dataset_id for gloss in glosses}).select_related('language').order_by(
+            'language__name')):
+        languages[dataset_id].append(language)
+    field_names = {language.pk: f"{_('Gloss')}: {language.name}"
+                   for dataset_languages in languages.values() for language in dataset_languages}
+    translation_fields = defaultdict(dict)
+    if not any(name in fieldnames for name in field_names.values()):
+        return translation_fields
+    translations = {(item.gloss_id, item.language_id): item.translations for item in GlossTranslations.objects.filter(
+        gloss__in=glosses, language__in=field_names.keys())}
+    for gloss in glosses:
+        for language in languages[gloss.dataset_id]:
+            key = (gloss.pk, language.pk)
+            if key in translations and field_names[language.pk] in fieldnames:
+                translation_fields[gloss.pk][field_names[language.pk]] = translations[key]
+    return translation_fields
+
+
+def load_wordclasses(glosses):
+    """Returns {gloss id: the wordclasses like Gloss.get_wordclasses_display()}."""
+    wordclasses = defaultdict(list)
+    for gloss_id, english_name in Gloss.wordclasses.through.objects.filter(gloss__in=glosses).order_by(
+            'fieldchoice__field', 'fieldchoice__english_name').values_list('gloss_id', 'fieldchoice__english_name'):
+        wordclasses[gloss_id].append(english_name)
+    return {gloss_id: ", ".join(names) for gloss_id, names in wordclasses.items()}
+
+
+def load_video_paths(glosses):
+    """Returns {gloss id: the path like Gloss.get_video_path()}, the first GlossVideo of version 0."""
+    video_paths = {}
+    for gloss_id, videofile in GlossVideo.objects.filter(gloss__in=glosses, version=0).order_by(
+            'pk').values_list('gloss_id', 'videofile'):
+        video_paths.setdefault(gloss_id, str(videofile))
+    return video_paths
+
+
+def get_glosses_fields(glosses, fieldnames):
+    """Returns {gloss id: gloss.get_fields_dict(fieldnames)} of the Glosses of the queryset glosses."""
+    glosses = list(glosses)
+    if not glosses:
+        return {}
+    site = Site.objects.get_current()
+    columns = get_field_columns(fieldnames)
+    column_names = {field.name for field, verbose_name, fieldchoice_category in columns}
+    related_objects = load_related_objects(glosses, columns)
+    translation_fields = load_translation_fields(glosses, fieldnames)
+    wordclasses = load_wordclasses(glosses) if 'wordclasses' in column_names else {}
+    video_paths = load_video_paths(glosses) if "Video" in fieldnames else {}
+
+    glosses_fields = {}
+    for gloss in glosses:
+        fields = {}
+        if 'idgloss' in fieldnames:
+            fields['idgloss'] = gloss.idgloss
+        fields.update(translation_fields.get(gloss.pk, {}))
+
+        for field, verbose_name, fieldchoice_category in columns:
+            if field.name == 'updated_at':
+                field_value = gloss.updated_at.date()
+            elif field.name == 'created_by':
+                field_value = ""
+                created_by = related_objects['created_by'].get(gloss.created_by_id)
+                if created_by and created_by.first_name:
+                    field_value = created_by.first_name
+            elif field.name == 'wordclasses':
+                field_value = wordclasses.get(gloss.pk, "")
+            elif field.many_to_one:
+                related_object = related_objects[field.name].get(getattr(gloss, field.attname))
+                if fieldchoice_category:
+                    if related_object is None or related_object.machine_value == 0:
+                        continue
+                    field_value = related_object.name
+                else:
+                    field_value = str(related_object)
+            else:
+                field_value = str(getattr(gloss, field.name))
+            if field_value not in ['', '-', "None"]:
+                fields[verbose_name] = field_value
+
+        if "Link" in fieldnames:
+            fields["Link"] = f"{site.domain}{reverse('dictionary:public_gloss_view', kwargs={'pk': gloss.pk})}"
+
+        if "Video" in fieldnames:
+            video_path = video_paths.get(gloss.pk)
+            if video_path:
+                fields["Video"] = (
+                    f"{site.domain}/{reverse('dictionary:protected_media', kwargs={'filename': video_path})}"
+                )
+        glosses_fields[gloss.pk] = fields
+    return glosses_fields
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""This command builds the full packages of the package endpoint for the Datasets that have changed, and deletes the
+older ones"""
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from signbank.dictionary.models import Dataset
+from signbank.dictionary.packages import delete_old_packages, get_package
+
+
+class Command(BaseCommand):
+    help = 'build the full packages of the datasets that changed since their last package, and delete the old ones'
+    args = ''
+
+    def handle(self, *args, **options):
+        for dataset in Dataset.objects.order_by('pk'):
+            artifact = get_package(dataset)
+            delete_old_packages(dataset)
+            self.stdout.write("%s: %s" % (dataset.name, artifact.artifact.name))
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""This command deletes the stored ECV files of the Datasets that have changed since they were built"""
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from signbank.dictionary.ecv import delete_old_ecv_files
+
+
+class Command(BaseCommand):
+    help = 'delete the ECV files of the older versions of the datasets'
+    args = ''
+
+    def handle(self, *args, **options):
+        count = delete_old_ecv_files()
+        self.stdout.write("Deleted %s old ECV files" % count)
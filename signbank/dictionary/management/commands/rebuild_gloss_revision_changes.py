@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""This command rebuilds the GlossRevisionChanges shown in the revision history of glosses"""
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from signbank.dictionary.revisionhistory import rebuild_gloss_revision_changes
+
+
+class Command(BaseCommand):
+    help = 'rebuild the revision history changes of glosses from their reversion versions'
+    args = ''
+
+    def add_arguments(self, parser):
+        parser.add_argument('gloss_ids', nargs='*', type=int,
+                            help='ids of the glosses to rebuild, all glosses if none are given')
+
+    def handle(self, *args, **options):
+        count = rebuild_gloss_revision_changes(options['gloss_ids'] or None)
+        self.stdout.write("Rebuilt %s revision changes" % count)
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""This command rebuilds the PublicSearchEntries used by the public gloss list"""
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from signbank.dictionary.models import PublicSearchEntry
+from signbank.dictionary.publicsearch import update_public_search_entries
+
+
+class Command(BaseCommand):
+    help = 'rebuild the public search entries of all published glosses of public datasets'
+    args = ''
+
+    def handle(self, *args, **options):
+        update_public_search_entries()
+        self.stdout.write("Rebuilt %s public search entries" % PublicSearchEntry.objects.count())
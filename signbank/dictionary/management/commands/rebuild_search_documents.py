@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""This command rebuilds the GlossSearchDocuments used by the advanced gloss search"""
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from signbank.dictionary.models import GlossSearchDocument
+from signbank.dictionary.search import update_search_documents
+
+
+class Command(BaseCommand):
+    help = 'rebuild the search documents of all glosses'
+    args = ''
+
+    def handle(self, *args, **options):
+        update_search_documents()
+        self.stdout.write("Rebuilt %s search documents" % GlossSearchDocument.objects.count())
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""This command rebuilds the GlossValidationSummaries of all glosses"""
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from signbank.dictionary.validationsummary import update_validation_summaries
+
+
+class Command(BaseCommand):
+    help = 'rebuild the validation summaries of all glosses'
+    args = ''
+
+    def handle(self, *args, **options):
+        count = update_validation_summaries()
+        self.stdout.write("Rebuilt %s validation summaries" % count)
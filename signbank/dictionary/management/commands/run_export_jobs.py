@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""This command runs the queued background CSV exports (ExportJobs)"""
+from __future__ import unicode_literals
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from signbank.dictionary.exports import claim_next_export_job, run_export_job
+
+
+class Command(BaseCommand):
+    help = 'poll the database for queued CSV exports and run them'
+    args = ''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='run the queued exports and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='seconds to wait between polls when the queue is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_export_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+            try:
+                run_export_job(job)
+                self.stdout.write("Finished export job %s" % job.pk)
+            except Exception as e:
+                # The job has been marked as failed, carry on with the next one.
+                self.stderr.write("Export job %s failed: %s" % (job.pk, e))
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Serving the protected media files, the videos and images of the glosses, with conditional GETs and byte ranges, so
+that video players can seek and clients can resume downloads without fetching the whole file again.
+
+The ETag and Last-Modified of a file are derived from its size and modification time. Range requests are answered
+with 206 Partial Content, a multipart/byteranges body for several ranges, or 416 Range Not Satisfiable.
+
+With settings.MEDIA_SENDFILE the web server in front sends the files: 'x-sendfile' sets the X-Sendfile header to
+the path of the file (Apache mod_xsendfile), 'x-accel-redirect' sets the X-Accel-Redirect header to the path of the
+file under settings.MEDIA_ACCEL_REDIRECT_PREFIX (an internal location of nginx), and the web server handles the
+ranges. Otherwise the files are sent with FileResponse, which the WSGI server sends with sendfile when it provides
+wsgi.file_wrapper, also for a single range.
+"""
+from __future__ import unicode_literals
+
+import mimetypes
+import os
+import uuid
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+#: The most ranges a request can ask for, requests with more get the whole file.
+MAX_RANGES = 16
+BLOCK_SIZE = 64 * 1024
+
+
+class FileRange(object):
+    """A file object that reads length bytes of file from start, FileResponse streams it until the end of the range."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        # The WSGI server sends the range with sendfile from the position of the file.
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def get_file_etag(stat):
+    """Returns the ETag of a file from its os.stat() result."""
+    return '"%x-%x"' % (stat.st_size, stat.st_mtime_ns)
+
+
+def parse_range(header, size):
+    """
+    Returns the list of (first byte, last byte) of the Range header for a file of size bytes, None when the whole
+    file should be sent and [] when no range can be satisfied.
+    """
+    unit, _, ranges = (header or '').partition('=')
+    if unit.strip().lower() != 'bytes':
+        return None
+    specs = [spec.strip() for spec in ranges.split(',') if spec.strip()]
+    if not specs or len(specs) > MAX_RANGES:
+        return None
+    satisfiable = []
+    for spec in specs:
+        first, dash, last = spec.partition('-')
+        try:
+            if not dash:
+                return None
+            if not first:
+                # The last bytes of the file.
+                suffix_length = int(last)
+                if suffix_length > 0 and size > 0:
+                    satisfiable.append((max(size - suffix_length, 0), size - 1))
+                continue
+            first = int(first)
+            last = int(last) if last else None
+        except ValueError:
+            return None
+        if first < 0 or (last is not None and last < first):
+            return None
+        if last is None:
+            last = size - 1
+        if first < size:
+            satisfiable.append((first, min(last, size - 1)))
+    return satisfiable
+
+
+def if_range_matches(request, etag, last_modified):
+    """Returns True if the If-Range header of request is missing or matches the current file."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def get_sendfile_response(path, content_type):
+    """Returns the response that lets the web server send path, or None if Django sends the files."""
+    backend = settings.MEDIA_SENDFILE
+    if not backend:
+        return None
+    response = HttpResponse(content_type=content_type)
+    if backend == 'x-sendfile':
+        response['X-Sendfile'] = path
+    elif backend == 'x-accel-redirect':
+        relative_path = os.path.relpath(path, settings.WRITABLE_FOLDER)
+        response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_REDIRECT_PREFIX + relative_path)
+    else:
+        raise ValueError("Unknown MEDIA_SENDFILE: %s" % backend)
+    return response
+
+
+def stream_ranges(path, ranges, size, content_type, boundary):
+    """Yields the multipart/byteranges body of the ranges of path."""
+    with open(path, 'rb') as file:
+        for first, last in ranges:
+            yield get_part_header(first, last, size, content_type, boundary)
+            file_range = FileRange(file, first, last - first + 1)
+            for chunk in iter(lambda: file_range.read(BLOCK_SIZE), b''):
+                yield chunk
+        yield ('\r\n--%s--\r\n' % boundary).encode('ascii')
+
+
+def get_part_header(first, last, size, content_type, boundary):
+    """Returns the headers of the part of the range first-last in a multipart/byteranges body."""
+    return ('\r\n--%s\r\nContent-Type: %s\r\nContent-Range: bytes %d-%d/%d\r\n\r\n' % (
+        boundary, content_type, first, last, size)).encode('ascii')
+
+
+def get_content_disposition(filename):
+    """Returns the Content-Disposition header that shows filename inline."""
+    try:
+        filename.encode('ascii')
+        return 'inline; filename="%s"' % filename.replace('\\', '\\\\').replace('"', r'\"')
+    except UnicodeEncodeError:
+        return "inline; filename*=utf-8''%s" % quote(filename)
+
+
+def media_response(request, path):
+    """Returns the response to request for the file at path, the whole file, its ranges or 304 Not Modified."""
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = get_file_etag(stat)
+    last_modified = int(stat.st_mtime)
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = get_sendfile_response(path, content_type)
+    if response is None:
+        ranges = None
+        if request.method == 'GET' and if_range_matches(request, etag, last_modified):
+            ranges = parse_range(request.META.get('HTTP_RANGE'), size)
+
+        if ranges is None:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+        elif not ranges:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */%d' % size
+        elif len(ranges) == 1:
+            first, last = ranges[0]
+            response = FileResponse(FileRange(open(path, 'rb'), first, last - first + 1), status=206,
+                                    content_type=content_type)
+            response['Content-Length'] = last - first + 1
+            response['Content-Range'] = 'bytes %d-%d/%d' % (first, last, size)
+        else:
+            boundary = uuid.uuid4().hex
+            response = StreamingHttpResponse(stream_ranges(path, ranges, size, content_type, boundary), status=206,
+                                             content_type='multipart/byteranges; boundary=%s' % boundary)
+            response['Content-Length'] = sum(
+                len(get_part_header(first, last, size, content_type, boundary)) + last - first + 1
+                for first, last in ranges) + len('\r\n--%s--\r\n' % boundary)
+
+    if response.status_code in (200, 206):
+        response['Content-Disposition'] = get_content_disposition(os.path.basename(path))
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.25 on 2026-10-17 06:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('dictionary', '0049_alter_gloss'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(choices=[('CSV-standard', 'Standard CSV'), ('CSV-ready-for-validation', 'Ready for Validation CSV'), ('CSV-validation-results', 'Validation Results CSV')], max_length=50)),
+                ('query', models.TextField(blank=True, default='')),
+                ('query_hash', models.CharField(db_index=True, max_length=64)),
+                ('data_state', models.CharField(max_length=64)),
+                ('base_url', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('finished', 'Finished'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('artifact', models.FileField(blank=True, default='', upload_to='exports')),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Export job',
+                'verbose_name_plural': 'Export jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
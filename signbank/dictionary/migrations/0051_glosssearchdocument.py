@@ -0,0 +1,72 @@
+# Generated by Django 3.2.25 on 2026-10-17 06:20
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BUILD_SEARCH_DOCUMENTS_SQL = """
+INSERT INTO dictionary_glosssearchdocument (gloss_id, names, keywords, notes, document, vector)
+SELECT id, names, keywords, notes, concat_ws(E'\\n', names, keywords, notes),
+       setweight(to_tsvector('simple', names), 'A') ||
+       setweight(to_tsvector('simple', keywords), 'B') ||
+       setweight(to_tsvector('simple', notes), 'C')
+FROM (
+    SELECT g.id,
+           lower(concat_ws(' ', g.idgloss, g.idgloss_mi)) AS names,
+           lower(coalesce((SELECT string_agg(DISTINCT k.text, ' ')
+                           FROM dictionary_translation t JOIN dictionary_keyword k ON k.id = t.keyword_id
+                           WHERE t.gloss_id = g.id), '')) AS keywords,
+           lower(coalesce(g.notes, '')) AS notes
+    FROM dictionary_gloss g
+) AS gloss_text
+"""
+
+
+def create_trigram_index(apps, schema_editor):
+    # The trigram index makes substring searches fast, it needs the pg_trgm extension which
+    # is not available on every PostgreSQL installation. The search works without it, only slower.
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute("CREATE INDEX IF NOT EXISTS glosssearch_document_trgm_idx "
+                          "ON dictionary_glosssearchdocument USING gin (document gin_trgm_ops)")
+
+
+def drop_trigram_index(apps, schema_editor):
+    schema_editor.execute("DROP INDEX IF EXISTS glosssearch_document_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0050_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GlossSearchDocument',
+            fields=[
+                ('gloss', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='dictionary.gloss')),
+                ('names', models.TextField(blank=True, default='')),
+                ('keywords', models.TextField(blank=True, default='')),
+                ('notes', models.TextField(blank=True, default='')),
+                ('document', models.TextField(blank=True, default='')),
+                ('vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+            ],
+            options={
+                'verbose_name': 'Gloss search document',
+                'verbose_name_plural': 'Gloss search documents',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='glosssearchdocument',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['vector'], name='glosssearch_vector_idx'),
+        ),
+        migrations.RunPython(create_trigram_index, reverse_code=drop_trigram_index),
+        # Build the search documents of the existing glosses.
+        migrations.RunSQL(BUILD_SEARCH_DOCUMENTS_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.25 on 2026-10-17 06:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reversion', '0001_squashed_0004_auto_20160611_1202'),
+        ('dictionary', '0051_glosssearchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GlossRevisionChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_created', models.DateTimeField()),
+                ('field', models.CharField(max_length=100)),
+                ('old_value', models.TextField(blank=True)),
+                ('new_value', models.TextField(blank=True)),
+                ('gloss', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revision_changes', to='dictionary.gloss')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gloss_revision_changes', to='reversion.version')),
+            ],
+            options={
+                'verbose_name': 'Gloss revision change',
+                'verbose_name_plural': 'Gloss revision changes',
+                'ordering': ['-version_id', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='glossrevisionchange',
+            index=models.Index(fields=['gloss', '-version', 'id'], name='glossrevisionchange_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-17 06:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0052_glossrevisionchange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GlossValidationSummary',
+            fields=[
+                ('gloss', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='validation_summary', serialize=False, to='dictionary.gloss')),
+                ('records_yes', models.PositiveIntegerField(default=0)),
+                ('records_no', models.PositiveIntegerField(default=0)),
+                ('records_not_sure', models.PositiveIntegerField(default=0)),
+                ('share_count', models.PositiveIntegerField(default=0)),
+                ('share_agrees', models.PositiveIntegerField(default=0)),
+                ('share_disagrees', models.PositiveIntegerField(default=0)),
+                ('manual_count', models.PositiveIntegerField(default=0)),
+                ('manual_yes', models.PositiveIntegerField(default=0)),
+                ('manual_no', models.PositiveIntegerField(default=0)),
+                ('manual_not_sure', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Gloss validation summary',
+                'verbose_name_plural': 'Gloss validation summaries',
+            },
+        ),
+    ]
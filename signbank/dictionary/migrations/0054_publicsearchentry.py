@@ -0,0 +1,57 @@
+# Generated by Django 3.2.25 on 2026-10-17 07:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BUILD_PUBLIC_SEARCH_ENTRIES_SQL = """
+INSERT INTO dictionary_publicsearchentry (gloss_id, kind, term, dataset_id, signlanguage_id, video_id, video_count)
+SELECT g.id, terms.kind, terms.term, g.dataset_id, d.signlanguage_id,
+       (SELECT v.id FROM video_glossvideo v WHERE v.gloss_id = g.id AND v.is_public
+        ORDER BY v.version, v.id LIMIT 1),
+       (SELECT count(*) FROM video_glossvideo v WHERE v.gloss_id = g.id AND v.is_public)
+FROM dictionary_gloss g
+JOIN dictionary_dataset d ON d.id = g.dataset_id
+CROSS JOIN LATERAL (
+    SELECT 'gloss' AS kind, lower(g.idgloss) AS term
+    UNION
+    SELECT 'keyword', lower(k.text)
+    FROM dictionary_translation t JOIN dictionary_keyword k ON k.id = t.keyword_id
+    WHERE t.gloss_id = g.id
+) AS terms
+WHERE g.published AND d.is_public
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video', '0005_glossvideotoken'),
+        ('dictionary', '0053_glossvalidationsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublicSearchEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('gloss', 'Gloss'), ('keyword', 'Keyword')], max_length=10)),
+                ('term', models.TextField()),
+                ('video_count', models.PositiveIntegerField(default=0)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dictionary.dataset')),
+                ('gloss', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='public_search_entries', to='dictionary.gloss')),
+                ('signlanguage', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dictionary.signlanguage')),
+                ('video', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='video.glossvideo')),
+            ],
+            options={
+                'verbose_name': 'Public search entry',
+                'verbose_name_plural': 'Public search entries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='publicsearchentry',
+            index=models.Index(fields=['term'], name='publicsearch_term_idx', opclasses=['text_pattern_ops']),
+        ),
+        # Build the entries of the existing public glosses.
+        migrations.RunSQL(BUILD_PUBLIC_SEARCH_ENTRIES_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-17 07:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0054_publicsearchentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetChangeCounter',
+            fields=[
+                ('dataset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='change_counter', serialize=False, to='dictionary.dataset')),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('changed_at', models.DateTimeField(null=True)),
+            ],
+            options={
+                'verbose_name': 'Dataset change counter',
+                'verbose_name_plural': 'Dataset change counters',
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-17 07:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0055_datasetchangecounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PackageArtifact',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField()),
+                ('content_hash', models.CharField(max_length=40)),
+                ('artifact', models.FileField(upload_to='packages')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Package artifact',
+                'verbose_name_plural': 'Package artifacts',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='gloss',
+            index=models.Index(fields=['dataset', 'updated_at'], name='gloss_dataset_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='packageartifact',
+            name='dataset',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='package_artifacts', to='dictionary.dataset'),
+        ),
+        migrations.AddIndex(
+            model_name='packageartifact',
+            index=models.Index(fields=['dataset', 'version'], name='packageartifact_version_idx'),
+        ),
+    ]
@@ -4,13 +4,14 @@ from __future__ import unicode_literals
 
 import re
 from collections import OrderedDict
-from itertools import groupby
 
 import reversion
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.sites.models import Site
-from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist, MultipleObjectsReturned
 from django.db import OperationalError, models
 from django.urls import reverse
 from django.utils.translation import ugettext_lazy as _
@@ -310,17 +311,14 @@ class FieldChoice(models.Model):
 def build_choice_list(field):
     """This function builds a list of choices from FieldChoice."""
     # TODO: This is probably no longer needed, remove its usage if possible.
-    choice_list = []
+    from .fieldchoices import get_field_choices
     # Get choices for a certain field in FieldChoices, append machine_value and english_name
     try:
-        for choice in FieldChoice.objects.filter(field=field):
-            choice_list.append(
-                (str(choice.machine_value), choice.english_name))
-
-        return choice_list
+        return [(str(choice.machine_value), choice.english_name)
+                for choice in get_field_choices().get_choices(field)]
     # Enter this exception if for example the db has no data yet (without this it is impossible to migrate)
     except OperationalError:
-        return choice_list
+        return []
 
 
 class Gloss(models.Model):
@@ -329,6 +327,10 @@ class Gloss(models.Model):
         verbose_name = _('Gloss')
         verbose_name_plural = _('Glosses')
         ordering = ['idgloss']
+        indexes = [
+            # The package endpoint finds the Glosses of a Dataset updated since a time.
+            models.Index(fields=['dataset', 'updated_at'], name='gloss_dataset_updated_idx'),
+        ]
         permissions = (
             # Translators: Gloss permissions
             ('update_video', _("Can Update Video")),
@@ -686,7 +688,7 @@ class Gloss(models.Model):
             )
 
         if "Video" in fieldnames:
-            video_path = self.get_video_url()
+            video_path = self.get_video_path()
             if video_path:
                 fields["Video"] = (
                     f"{site.domain}/{reverse('dictionary:protected_media', kwargs={'filename': video_path})}"
@@ -726,29 +728,14 @@ class Gloss(models.Model):
         return self.dataset.translation_languages.all()
 
     def get_translations_for_translation_languages(self):
-        """Returns a zipped list of translation languages and translations."""
-        translation_list = []
-        translation_languages = self.get_translation_languages()
-        for language in translation_languages:
-            try:
-                # Get translations from GlossTranslation object, if it exists for gloss+language.
-                translation_list.append(GlossTranslations.objects.get(
-                    gloss=self, language=language))
-            except GlossTranslations.DoesNotExist:
-                # If it doesn't exist, try to get translations from Translation objects.
-                translations = Translation.objects.filter(
-                    gloss=self, language=language)
-                kwd_str = ""
-                first = True
-                for trans in translations:
-                    if first:
-                        kwd_str += str(trans.keyword)
-                        first = False
-                    else:
-                        kwd_str += ", " + trans.keyword.text
-                translation_list.append(kwd_str)
-
-        return list(zip(translation_languages, translation_list))
+        """
+        Returns a list of (translation language, translations) pairs. Use translationloader.load_translations()
+        to load them for many glosses at once.
+        """
+        from .translationloader import TRANSLATIONS_ATTR, load_translations
+        if not hasattr(self, TRANSLATIONS_ATTR):
+            load_translations([self])
+        return getattr(self, TRANSLATIONS_ATTR)
 
     def get_fields(self):
         return [(field.name, field.value_to_string(self)) for field in Gloss._meta.fields]
@@ -765,17 +752,16 @@ class Gloss(models.Model):
                   'video_type', 'wordclass', 'fingerspelling', 'usage', 'signer',
                   'age_variation']
 
-        qs = FieldChoice.objects.filter(field__in=fields).values(
-            'field', 'machine_value', 'english_name')
+        # The FieldChoices are looked up in the registry, see fieldchoices.py.
+        from .fieldchoices import get_field_choices
+        registry = get_field_choices()
         # TODO: How about other fields like Morphology? Should we just get all the fields?
-        # Group the values by 'field'
-        fields_grouped = {k: list(v) for k, v in groupby(
-            qs, key=lambda x: x["field"])}
-        field_choices = dict()
         # Construct a dict that has 'machine_value' as key and 'english_name' as value.
-        for k, v in fields_grouped.items():
-            field_choices[k] = {
-                x['machine_value']: str(x['english_name']) for x in v}
+        field_choices = dict()
+        for field in fields:
+            choices = registry.get_choices(field)
+            if choices:
+                field_choices[field] = {x.machine_value: str(x.english_name) for x in choices}
 
         return field_choices
 
@@ -959,6 +945,253 @@ class ValidationRecord(models.Model):
         ]
 
 
+class GlossValidationSummary(models.Model):
+    """
+    The validation totals of a Gloss from ValidationRecords, ShareValidationAggregations and
+    ManualValidationAggregations. Kept up to date by the validation imports and signal handlers,
+    see signbank.dictionary.validationsummary.
+    """
+    gloss = models.OneToOneField(Gloss, primary_key=True, related_name="validation_summary",
+                                 on_delete=models.CASCADE)
+    #: The number of ValidationRecords by their answer to 'Have seen it or use it myself'.
+    records_yes = models.PositiveIntegerField(default=0)
+    records_no = models.PositiveIntegerField(default=0)
+    records_not_sure = models.PositiveIntegerField(default=0)
+    #: The number of ShareValidationAggregations, and their totals.
+    share_count = models.PositiveIntegerField(default=0)
+    share_agrees = models.PositiveIntegerField(default=0)
+    share_disagrees = models.PositiveIntegerField(default=0)
+    #: The number of ManualValidationAggregations, and their totals.
+    manual_count = models.PositiveIntegerField(default=0)
+    manual_yes = models.PositiveIntegerField(default=0)
+    manual_no = models.PositiveIntegerField(default=0)
+    manual_not_sure = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = _('Gloss validation summary')
+        verbose_name_plural = _('Gloss validation summaries')
+
+    def __str__(self):
+        return str(self.gloss_id)
+
+    @property
+    def records_count(self):
+        return self.records_yes + self.records_no + self.records_not_sure
+
+    @property
+    def sign_seen_yes(self):
+        return self.records_yes + self.share_agrees + self.manual_yes
+
+    @property
+    def sign_seen_no(self):
+        return self.records_no + self.share_disagrees + self.manual_no
+
+    @property
+    def sign_seen_not_sure(self):
+        return self.records_not_sure + self.manual_not_sure
+
+    @property
+    def total(self):
+        return self.sign_seen_yes + self.sign_seen_no + self.sign_seen_not_sure
+
+
+class GlossSearchDocument(models.Model):
+    """
+    The text of a Gloss that the advanced search looks in, kept up to date by signal handlers.
+    See signbank.dictionary.search.
+    """
+    gloss = models.OneToOneField(Gloss, primary_key=True, related_name="search_document", on_delete=models.CASCADE)
+    #: Lowercased idgloss and idgloss_mi of the Gloss.
+    names = models.TextField(blank=True, default="")
+    #: Lowercased texts of the Keywords of all the Translations of the Gloss.
+    keywords = models.TextField(blank=True, default="")
+    #: Lowercased notes of the Gloss.
+    notes = models.TextField(blank=True, default="")
+    #: All of the above on separate lines. Migration 0051 adds a trigram index for substring search on it,
+    #: when the pg_trgm extension is available.
+    document = models.TextField(blank=True, default="")
+    #: Full text search vector, names are weighted highest and notes lowest.
+    vector = SearchVectorField(null=True)
+
+    class Meta:
+        verbose_name = _('Gloss search document')
+        verbose_name_plural = _('Gloss search documents')
+        indexes = [
+            GinIndex(fields=['vector'], name='glosssearch_vector_idx'),
+        ]
+
+    def __str__(self):
+        return str(self.gloss_id)
+
+
+class PublicSearchEntry(models.Model):
+    """
+    A term the public gloss list finds a published Gloss of a public Dataset by, with what its card shows.
+    Kept up to date by signal handlers, see signbank.dictionary.publicsearch.
+    """
+    #: The term is the idgloss of the Gloss.
+    GLOSS = 'gloss'
+    #: The term is the text of a Keyword of a Translation of the Gloss.
+    KEYWORD = 'keyword'
+    KIND_CHOICES = ((GLOSS, _('Gloss')), (KEYWORD, _('Keyword')))
+
+    gloss = models.ForeignKey(Gloss, related_name="public_search_entries", on_delete=models.CASCADE)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    #: The lowercased term, it has a text_pattern_ops index for prefix searches.
+    term = models.TextField()
+    #: The Dataset and SignLanguage of the Gloss.
+    dataset = models.ForeignKey(Dataset, related_name="+", on_delete=models.CASCADE)
+    signlanguage = models.ForeignKey(SignLanguage, related_name="+", on_delete=models.CASCADE)
+    #: The first public GlossVideo of the Gloss and the number of its public GlossVideos.
+    video = models.ForeignKey('video.GlossVideo', related_name="+", null=True, on_delete=models.SET_NULL)
+    video_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = _('Public search entry')
+        verbose_name_plural = _('Public search entries')
+        indexes = [
+            models.Index(fields=['term'], name='publicsearch_term_idx', opclasses=['text_pattern_ops']),
+        ]
+
+    def __str__(self):
+        return self.term
+
+
+class DatasetChangeCounter(models.Model):
+    """
+    How many times the Glosses, Translations, GlossVideos or GlossRelations of a Dataset have changed, and when
+    they last did. The public pages and ECVs derive their HTTP validators from it, see
+    signbank.dictionary.conditionalget.
+    """
+    dataset = models.OneToOneField(Dataset, primary_key=True, related_name="change_counter",
+                                   on_delete=models.CASCADE)
+    count = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(null=True)
+
+    class Meta:
+        verbose_name = _('Dataset change counter')
+        verbose_name_plural = _('Dataset change counters')
+
+    def __str__(self):
+        return "%s: %s" % (self.dataset_id, self.count)
+
+
+class GlossRevisionChange(models.Model):
+    """
+    A change of one field of a Gloss between two of its reversion Versions, shown in the revision history of the
+    Gloss. See signbank.dictionary.revisionhistory.
+    """
+    #: The field of the translations, they are stored as their own reversion Versions.
+    TRANSLATIONS = 'translations'
+
+    #: The changed Gloss.
+    gloss = models.ForeignKey(Gloss, related_name="revision_changes", on_delete=models.CASCADE)
+    #: The Version of the Gloss that has the new value.
+    version = models.ForeignKey('reversion.Version', related_name="gloss_revision_changes",
+                                on_delete=models.CASCADE)
+    #: The user who made the change, from the reversion Revision.
+    user = models.ForeignKey(User, null=True, blank=True, related_name="+", on_delete=models.SET_NULL)
+    #: When the change was made, from the reversion Revision.
+    date_created = models.DateTimeField()
+    #: The name of the changed field, or TRANSLATIONS.
+    field = models.CharField(max_length=100)
+    #: The value before the change, FieldChoices are stored as their names.
+    old_value = models.TextField(blank=True)
+    #: The value after the change.
+    new_value = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-version_id', 'id']
+        verbose_name = _('Gloss revision change')
+        verbose_name_plural = _('Gloss revision changes')
+        indexes = [
+            models.Index(fields=['gloss', '-version', 'id'], name='glossrevisionchange_idx'),
+        ]
+
+    def __str__(self):
+        return "%s: %s" % (self.gloss_id, self.field)
+
+    def get_field_verbose_name(self):
+        if self.field == self.TRANSLATIONS:
+            return _('Translations')
+        try:
+            return Gloss._meta.get_field(self.field).verbose_name
+        except FieldDoesNotExist:
+            # The field has been removed since.
+            return self.field
+
+
+class ExportJob(models.Model):
+    """A CSV export of the advanced gloss search, produced in the background by the run_export_jobs command."""
+
+    class Format(models.TextChoices):
+        CSV_STANDARD = "CSV-standard", _("Standard CSV")
+        CSV_READY_FOR_VALIDATION = "CSV-ready-for-validation", _("Ready for Validation CSV")
+        CSV_VALIDATION_RESULTS = "CSV-validation-results", _("Validation Results CSV")
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        FINISHED = "finished", _("Finished")
+        FAILED = "failed", _("Failed")
+
+    #: The User who requested the export, and who is notified when it is ready.
+    user = models.ForeignKey(User, related_name="export_jobs", on_delete=models.CASCADE)
+    #: The export format, one of the GlossListView CSV formats.
+    format = models.CharField(max_length=50, choices=Format.choices)
+    #: The normalized query string of the search that is exported.
+    query = models.TextField(blank=True, default="")
+    #: Hash of the format, query and the datasets the user can view. Jobs with the same hash produce the same file.
+    query_hash = models.CharField(max_length=64, db_index=True)
+    #: Fingerprint of the exported data when the job was requested, used to decide if an artifact can be reused.
+    data_state = models.CharField(max_length=64)
+    #: Scheme and host of the request that created the job, used to build absolute URLs in the export.
+    base_url = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING, db_index=True)
+    #: The finished CSV file, saved to the configured default storage.
+    artifact = models.FileField(upload_to="exports", blank=True, default="")
+    #: Error message of a failed job.
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = _('Export job')
+        verbose_name_plural = _('Export jobs')
+
+    def __str__(self):
+        return "{format} ({status})".format(format=self.format, status=self.status)
+
+    def get_absolute_url(self):
+        return reverse('dictionary:export_job_download', kwargs={'pk': self.pk})
+
+
+class PackageArtifact(models.Model):
+    """
+    A full zip package of the glosses and video URLs of a Dataset for the package endpoint. The files are named after
+    the hash of their content, see signbank.dictionary.packages.
+    """
+    dataset = models.ForeignKey(Dataset, related_name="package_artifacts", on_delete=models.CASCADE)
+    #: The count of the DatasetChangeCounter of the Dataset the package was built at.
+    version = models.PositiveBigIntegerField()
+    #: SHA-1 of the content of the package, also its ETag.
+    content_hash = models.CharField(max_length=40)
+    #: The zip file, saved to the configured default storage.
+    artifact = models.FileField(upload_to="packages")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('Package artifact')
+        verbose_name_plural = _('Package artifacts')
+        indexes = [
+            models.Index(fields=['dataset', 'version'], name='packageartifact_version_idx'),
+        ]
+
+    def __str__(self):
+        return "%s: %s" % (self.dataset_id, self.version)
+
 
 # Register Models for django-tagging to add wrappers around django-tagging API.
 models_to_register_for_tagging = (Gloss, GlossRelation,)
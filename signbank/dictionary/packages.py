@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+The zip packages of the package endpoint, with the glosses and the video and image URLs of a Dataset: a full snapshot,
+or the changes since a time for clients that have an older package.
+
+Full packages are built once per version of a Dataset, the count of its DatasetChangeCounter, and kept as
+PackageArtifacts in the default storage, named after the hash of their content. The artifacts of older versions are
+deleted by the build_packages command, not by the requests that may still be streaming them. The packages of the
+changes are not kept, each client asks for the changes since its own time, they are streamed as they are built.
+The changes are found from the indexed updated_at of the Glosses and GlossVideos, without looking at the files.
+
+The zip files are streamed into a temporary file as their json members are encoded, and the artifacts are streamed
+to the clients from the storage, so a package is never held in memory as a whole.
+"""
+from __future__ import unicode_literals
+
+import hashlib
+import mimetypes
+import os
+import tempfile
+
+from django.core.files import File
+from django.urls import reverse
+
+from ..video.models import GlossVideo
+from .conditionalget import get_dataset_change_count
+from .models import PackageArtifact
+from .tools import get_gloss_data
+from .zipstream import iter_json, stream_zip
+
+
+def get_media_urls(dataset, since=None):
+    """Returns the ({name: URL} of the videos, {name: URL} of the images) of the GlossVideos of dataset."""
+    glossvideos = GlossVideo.objects.filter(gloss__dataset=dataset).exclude(videofile='')
+    if since:
+        glossvideos = glossvideos.filter(updated_at__gt=since)
+    video_urls, image_urls = {}, {}
+    for name in glossvideos.order_by('pk').values_list('videofile', flat=True):
+        # Like GlossVideo.is_video() and is_image().
+        content_type = mimetypes.guess_type(name)[0] or ''
+        urls = video_urls if content_type.startswith('video/') else image_urls
+        if content_type.startswith(('video/', 'image/')):
+            urls[os.path.splitext(os.path.basename(name))[0]] = reverse(
+                'dictionary:protected_media', kwargs={"filename": name})
+    return video_urls, image_urls
+
+
+def stream_package(dataset, since=None):
+    """
+    Yields the bytes of the zip file of the package of dataset, with the changes since the datetime since, the same
+    data always makes the same bytes.
+    """
+    video_urls, image_urls = get_media_urls(dataset, since)
+    data_per_file = {
+        'video_urls': video_urls,
+        'image_urls': image_urls,
+        'glosses': get_gloss_data(since, dataset),
+    }
+    return stream_zip((filename + '.json', iter_json(data)) for filename, data in data_per_file.items())
+
+
+def build_package(dataset):
+    """Builds the full package of the current version of dataset, and returns its PackageArtifact."""
+    version = get_dataset_change_count(dataset)
+    with tempfile.TemporaryFile() as package_file:
+        content_hash = hashlib.sha1()
+        for chunk in stream_package(dataset):
+            content_hash.update(chunk)
+            package_file.write(chunk)
+        artifact = PackageArtifact(dataset=dataset, version=version, content_hash=content_hash.hexdigest())
+        # Packages with the same content share their file.
+        existing = PackageArtifact.objects.filter(content_hash=artifact.content_hash).first()
+        if existing is not None and existing.artifact.storage.exists(existing.artifact.name):
+            artifact.artifact = existing.artifact.name
+        else:
+            package_file.seek(0)
+            artifact.artifact.save("{hash}.zip".format(hash=artifact.content_hash), File(package_file), save=False)
+    artifact.save()
+    return artifact
+
+
+def delete_old_packages(dataset):
+    """
+    Deletes the PackageArtifacts of dataset older than its newest one, and their files no other PackageArtifact has.
+    """
+    newest = PackageArtifact.objects.filter(dataset=dataset).order_by('-version').values_list(
+        'version', flat=True).first()
+    if newest is None:
+        return
+    old_packages = PackageArtifact.objects.filter(dataset=dataset, version__lt=newest)
+    names = set(old_packages.values_list('artifact', flat=True))
+    old_packages.delete()
+    names -= set(PackageArtifact.objects.filter(artifact__in=names).values_list('artifact', flat=True))
+    storage = PackageArtifact._meta.get_field('artifact').storage
+    for name in names:
+        storage.delete(name)
+
+
+def get_package(dataset):
+    """Returns the PackageArtifact of the full package of the current version of dataset, building it if needed."""
+    artifact = PackageArtifact.objects.filter(
+        dataset=dataset, version=get_dataset_change_count(dataset)).order_by('-pk').first()
+    if artifact is None:
+        artifact = build_package(dataset)
+    return artifact
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Pagination for the long lists of the advanced search (GlossListView and GlossRelationListView).
+
+Numbered pages use OFFSET, which gets slower the further the page is, and the page numbers need a COUNT(*) of
+the whole result. For large result sets the lists switch to keyset (cursor) pagination: the next page starts
+after the ordering values of the last row of the current page, so every page is as fast as the first one.
+The counts of large unfiltered lists are estimated by the query planner instead of counted.
+"""
+from __future__ import unicode_literals
+
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.core.paginator import InvalidPage, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+from django.utils.translation import ugettext as _
+
+#: The GET parameter of the keyset pagination cursor, an empty cursor is the first page.
+CURSOR_PARAM = 'cursor'
+
+
+def get_paginate_by(value, default):
+    """Returns the page size from a GET parameter value, between 1 and settings.PAGINATE_BY_MAX."""
+    try:
+        paginate_by = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(paginate_by, settings.PAGINATE_BY_MAX))
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, cls=DjangoJSONEncoder).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidPage(_("Invalid cursor."))
+    if not isinstance(values, list):
+        raise InvalidPage(_("Invalid cursor."))
+    return values
+
+
+def expand_ordering(model, name):
+    """
+    Returns the columns an order_by() name sorts by. Ordering by a relation sorts by the ordering of the related
+    model, like Django does, e.g. 'source' of a GlossRelation is 'source__idgloss'.
+    """
+    descending = name.startswith('-')
+    path = name.lstrip('-').split('__')
+    field = None
+    for part in path:
+        try:
+            field = model._meta.get_field('id' if part == 'pk' else part)
+        except FieldDoesNotExist:
+            # An annotation, like the search_rank of the advanced search.
+            return [name]
+        if field.is_relation:
+            model = field.related_model
+    if field is None or not field.is_relation or not model._meta.ordering:
+        return [name]
+    expanded = []
+    for related_name in model._meta.ordering:
+        related_descending = related_name.startswith('-')
+        for column in expand_ordering(model, related_name.lstrip('-')):
+            direction = '-' if descending != related_descending else ''
+            expanded.append(direction + '__'.join(path) + '__' + column)
+    return expanded
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    A Paginator that uses the planner estimate as the count, when counting is allowed to be estimated and the
+    estimate is at least settings.PAGINATOR_EXACT_COUNT_LIMIT rows. Smaller results are counted exactly.
+    """
+
+    def __init__(self, object_list, per_page, estimate_count=False, **kwargs):
+        super(EstimatedCountPaginator, self).__init__(object_list, per_page, **kwargs)
+        #: Whether the count may be estimated, only when the result is not filtered by the user.
+        self.estimate_count = estimate_count
+        self._count_is_estimated = False
+
+    def get_estimated_count(self):
+        try:
+            sql, params = self.object_list.order_by().query.sql_with_params()
+        except EmptyResultSet:
+            # E.g. filtered by an empty list of datasets.
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        # psycopg2 decodes the json column.
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    @cached_property
+    def count(self):
+        if self.estimate_count and connection.vendor == 'postgresql':
+            estimated_count = self.get_estimated_count()
+            if estimated_count >= settings.PAGINATOR_EXACT_COUNT_LIMIT:
+                self._count_is_estimated = True
+                return estimated_count
+        return super(EstimatedCountPaginator, self).count
+
+    @property
+    def count_is_estimated(self):
+        """Whether count is an estimate."""
+        self.count
+        return self._count_is_estimated
+
+    def get_ordering(self):
+        """Returns the ordering used by keyset pages, the columns of the queryset ordering and the pk."""
+        ordering = []
+        for name in self.object_list.query.order_by:
+            if not isinstance(name, str) or name == '?':
+                raise InvalidPage(_("The results can not be paginated with a cursor in this order."))
+            ordering.extend(expand_ordering(self.object_list.model, name))
+        for name in ordering:
+            if name.lstrip('-') in ('id', 'pk'):
+                return ordering[:ordering.index(name) + 1]
+        return ordering + ['pk']
+
+    def cursor_page(self, cursor):
+        """Returns the KeysetPage after cursor, an empty cursor is the first page."""
+        ordering = self.get_ordering()
+        queryset = self.object_list.order_by(*ordering)
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != len(ordering):
+                raise InvalidPage(_("Invalid cursor."))
+            queryset = queryset.filter(keyset_q(ordering, values))
+        object_list = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(object_list) > self.per_page:
+            object_list = object_list[:self.per_page]
+            columns = [name.lstrip('-') for name in ordering]
+            next_cursor = encode_cursor(
+                list(self.object_list.filter(pk=object_list[-1].pk).values_list(*columns).get()))
+        return KeysetPage(object_list, self, next_cursor, is_first=not cursor)
+
+
+def keyset_q(ordering, values):
+    """
+    Returns a Q object for the rows after values in ordering. PostgreSQL sorts NULLs as larger than any value,
+    so they come last in ascending and first in descending columns.
+    """
+    query = Q(pk__in=[])
+    equal = Q()
+    for name, value in zip(ordering, values):
+        column = name.lstrip('-')
+        if value is None:
+            after = Q(**{column + '__isnull': False}) if name.startswith('-') else Q(pk__in=[])
+        elif name.startswith('-'):
+            after = Q(**{column + '__lt': value})
+        else:
+            after = Q(**{column + '__gt': value}) | Q(**{column + '__isnull': True})
+        query |= equal & after
+        equal &= Q(**{column: value}) if value is not None else Q(**{column + '__isnull': True})
+    return query
+
+
+class KeysetPage(object):
+    """A page of keyset pagination, it has a cursor to the next page instead of a page number."""
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, next_cursor, is_first):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return not self.is_first
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginationMixin(object):
+    """
+    Pagination of a ListView with a capped page size, estimated counts and keyset pagination. The keyset
+    pagination is used when the 'cursor' parameter is given, or when the count is estimated and no page
+    number is given.
+    """
+    paginator_class = EstimatedCountPaginator
+
+    def get_paginate_by(self, queryset):
+        """
+        Paginate by specified value in querystring, or use default class property value.
+        """
+        return get_paginate_by(self.request.GET.get('paginate_by'), self.paginate_by)
+
+    def count_may_be_estimated(self):
+        """Returns True if the count of the list may be estimated, when the user is not filtering it."""
+        return False
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        return self.paginator_class(queryset, per_page, orphans=orphans, allow_empty_first_page=allow_empty_first_page,
+                                    estimate_count=self.count_may_be_estimated(), **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.get_paginator(queryset, page_size, orphans=self.get_paginate_orphans(),
+                                       allow_empty_first_page=self.get_allow_empty())
+        get = self.request.GET
+        try:
+            if self.page_kwarg not in get and (CURSOR_PARAM in get or paginator.count_is_estimated):
+                page = paginator.cursor_page(get.get(CURSOR_PARAM, ''))
+            else:
+                page = paginator.page(get.get(self.page_kwarg) or 1)
+        except InvalidPage as e:
+            raise Http404(_('Invalid page: %(message)s') % {'message': str(e)})
+        return paginator, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+The navigation of the public gloss list: the public lexicons, their sign languages and the first letters of the
+published glosses with their counts, kept in the cache instead of queried on every request.
+
+The first letters are cached per Dataset, so publishing, unpublishing or renaming a gloss only rebuilds the letters
+of its Dataset, and the public Datasets with their SignLanguages under one key. The signal handlers in signals.py
+delete the keys when Gloss.published, Gloss.idgloss or Gloss.dataset, a Dataset or a SignLanguage change, and the
+next request rebuilds them. Processes that do not share the cache see the changes after
+settings.PUBLIC_INDEX_CACHE_TIMEOUT seconds.
+
+The letters are ordered by the collation of the database like the gloss list, so that e.g. Ā is next to A. The order
+of the letters found so far is asked from the database once and cached, it never changes.
+"""
+from __future__ import unicode_literals
+
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import Substr, Upper
+
+from .models import Dataset, Gloss
+
+#: The cache key of the public Datasets and their SignLanguages.
+DATASETS_CACHE_KEY = 'public_index:datasets'
+#: The cache key of the letters found so far, in the order of the collation of the database.
+LETTER_ORDER_CACHE_KEY = 'public_index:letter_order'
+
+
+def get_letters_cache_key(dataset_id):
+    return 'public_index:letters:{dataset}'.format(dataset=dataset_id)
+
+
+def load_dataset_letters(dataset_id):
+    """Returns {first letter: count} of the published glosses of a Dataset."""
+    letters = Gloss.objects.filter(dataset=dataset_id, published=True).annotate(
+        first_letter=Substr(Upper('idgloss'), 1, 1)).order_by().values('first_letter').annotate(
+        count=Count('pk')).values_list('first_letter', 'count')
+    return dict(letters)
+
+
+def sort_letters(letters):
+    """Returns letters sorted by the collation of the database, like ORDER BY on the glosses."""
+    order = cache.get(LETTER_ORDER_CACHE_KEY) or []
+    if not set(letters) <= set(order):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT letter FROM unnest(%s::text[]) AS letter ORDER BY letter",
+                           [sorted(set(order) | set(letters))])
+            order = [letter for letter, in cursor.fetchall()]
+        cache.set(LETTER_ORDER_CACHE_KEY, order, None)
+    position = {letter: index for index, letter in enumerate(order)}
+    return sorted(letters, key=position.__getitem__)
+
+
+def get_public_datasets():
+    """Returns the public Datasets, with their SignLanguages selected."""
+    datasets = cache.get(DATASETS_CACHE_KEY)
+    if datasets is None:
+        datasets = list(Dataset.objects.filter(is_public=True).select_related('signlanguage'))
+        cache.set(DATASETS_CACHE_KEY, datasets, settings.PUBLIC_INDEX_CACHE_TIMEOUT)
+    return datasets
+
+
+def get_public_signlanguages():
+    """Returns the SignLanguages of the public Datasets, ordered by name."""
+    signlanguages = {dataset.signlanguage_id: dataset.signlanguage for dataset in get_public_datasets()}
+    return sorted(signlanguages.values(), key=lambda signlanguage: signlanguage.name)
+
+
+def get_first_letters(datasets=None):
+    """
+    Returns the ordered (first letter, count) pairs of the published glosses of datasets, by default of all the
+    public Datasets. The letters of each Dataset are fetched from the cache at once, missing ones are loaded.
+    """
+    if datasets is None:
+        datasets = get_public_datasets()
+    dataset_ids = [dataset.pk if isinstance(dataset, Dataset) else int(dataset) for dataset in datasets]
+    cached = cache.get_many([get_letters_cache_key(dataset_id) for dataset_id in dataset_ids])
+    counts = Counter()
+    for dataset_id in dataset_ids:
+        cache_key = get_letters_cache_key(dataset_id)
+        if cache_key not in cached:
+            cached[cache_key] = load_dataset_letters(dataset_id)
+            cache.set(cache_key, cached[cache_key], settings.PUBLIC_INDEX_CACHE_TIMEOUT)
+        counts.update(cached[cache_key])
+    return [(letter, counts[letter]) for letter in sort_letters(counts)]
+
+
+def invalidate_public_datasets():
+    """Deletes the cached public Datasets, after Datasets or SignLanguages changed."""
+    def delete_datasets():
+        cache.delete(DATASETS_CACHE_KEY)
+    delete_datasets()
+    # Other processes may cache them again before the transaction is committed.
+    transaction.on_commit(delete_datasets)
+
+
+def invalidate_first_letters(dataset_ids):
+    """Deletes the cached first letters of the Datasets in dataset_ids."""
+    def delete_letters():
+        cache.delete_many([get_letters_cache_key(dataset_id) for dataset_id in dataset_ids])
+    delete_letters()
+    transaction.on_commit(delete_letters)
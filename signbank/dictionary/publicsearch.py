@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+The search of the public gloss list, in PublicSearchEntries instead of joins through the Translations and Keywords.
+
+There is an entry for the idgloss and for each Keyword of every published Gloss of a public Dataset, with the
+SignLanguage of the Dataset, the first public GlossVideo and the number of public GlossVideos of the Gloss. The
+prefix searches of the list use the text_pattern_ops index of the lowercased terms, the cards of the results get
+their videos from the entries of the glosses. The signal handlers in signals.py update the entries of changed
+glosses, and the rebuild_public_search_entries command rebuilds all of them.
+"""
+from __future__ import unicode_literals
+
+from django.db import connection
+from django.db.models import prefetch_related_objects
+
+from .models import PublicSearchEntry
+
+# Builds the entries of the glosses matching {where}: one for the idgloss and one for each distinct keyword.
+UPDATE_PUBLIC_SEARCH_ENTRIES_SQL = """
+INSERT INTO dictionary_publicsearchentry (gloss_id, kind, term, dataset_id, signlanguage_id, video_id, video_count)
+SELECT g.id, terms.kind, terms.term, g.dataset_id, d.signlanguage_id,
+       (SELECT v.id FROM video_glossvideo v WHERE v.gloss_id = g.id AND v.is_public
+        ORDER BY v.version, v.id LIMIT 1),
+       (SELECT count(*) FROM video_glossvideo v WHERE v.gloss_id = g.id AND v.is_public)
+FROM dictionary_gloss g
+JOIN dictionary_dataset d ON d.id = g.dataset_id
+CROSS JOIN LATERAL (
+    SELECT 'gloss' AS kind, lower(g.idgloss) AS term
+    UNION
+    SELECT 'keyword', lower(k.text)
+    FROM dictionary_translation t JOIN dictionary_keyword k ON k.id = t.keyword_id
+    WHERE t.gloss_id = g.id
+) AS terms
+WHERE g.published AND d.is_public {where}
+"""
+
+
+def update_public_search_entries(gloss_ids=None, dataset_ids=None):
+    """
+    Replaces the PublicSearchEntries of gloss_ids and of the glosses of dataset_ids, or of all glosses if both are
+    None. Glosses that are not published or not in a public Dataset get none.
+    """
+    params = {}
+    entry_conditions, gloss_conditions = [], []
+    if gloss_ids is not None:
+        params['gloss_ids'] = list(gloss_ids)
+        entry_conditions.append('gloss_id = ANY(%(gloss_ids)s)')
+        gloss_conditions.append('g.id = ANY(%(gloss_ids)s)')
+    if dataset_ids is not None:
+        params['dataset_ids'] = list(dataset_ids)
+        entry_conditions.append('dataset_id = ANY(%(dataset_ids)s)')
+        gloss_conditions.append('g.dataset_id = ANY(%(dataset_ids)s)')
+    if params and not any(params.values()):
+        return
+    with connection.cursor() as cursor:
+        if params:
+            cursor.execute('DELETE FROM dictionary_publicsearchentry WHERE ' + ' OR '.join(entry_conditions), params)
+            where = 'AND (%s)' % ' OR '.join(gloss_conditions)
+        else:
+            cursor.execute('DELETE FROM dictionary_publicsearchentry')
+            where = ''
+        cursor.execute(UPDATE_PUBLIC_SEARCH_ENTRIES_SQL.format(where=where), params)
+
+
+def search_public_glosses(queryset, gloss=None, keyword=None, signlanguage_ids=None, dataset_ids=None):
+    """
+    Filters a Gloss queryset to the published glosses of public Datasets whose idgloss starts with gloss and that
+    have a keyword starting with keyword, of the SignLanguages signlanguage_ids and the Datasets dataset_ids.
+    """
+    entries = PublicSearchEntry.objects.all()
+    if signlanguage_ids is not None:
+        entries = entries.filter(signlanguage__in=signlanguage_ids)
+    if dataset_ids:
+        entries = entries.filter(dataset__in=dataset_ids)
+    # Every public gloss has one entry of its idgloss.
+    glosses = entries.filter(kind=PublicSearchEntry.GLOSS)
+    if gloss:
+        glosses = glosses.filter(term__startswith=gloss.lower())
+    queryset = queryset.filter(pk__in=glosses.values('gloss_id'))
+    if keyword:
+        keywords = entries.filter(kind=PublicSearchEntry.KEYWORD, term__startswith=keyword.lower())
+        queryset = queryset.filter(pk__in=keywords.values('gloss_id'))
+    return queryset
+
+
+def load_public_videos(glosses):
+    """Sets the public_video and public_video_count of the cards of glosses, and the renditions of the videos."""
+    entries = PublicSearchEntry.objects.filter(
+        gloss__in=[gloss.pk for gloss in glosses], kind=PublicSearchEntry.GLOSS).select_related('video')
+    entries = {entry.gloss_id: entry for entry in entries}
+    prefetch_related_objects([entry.video for entry in entries.values() if entry.video], 'renditions')
+    for gloss in glosses:
+        entry = entries.get(gloss.pk)
+        gloss.public_video = entry.video if entry else None
+        gloss.public_video_count = entry.video_count if entry else 0
+    return glosses
@@ -3,19 +3,24 @@ from __future__ import unicode_literals
 
 from django.views.generic.list import ListView
 from django.views.generic.detail import DetailView
-from django.db.models import Q, Prefetch
-from django.db.models.functions import Substr, Upper
+from django.db.models import Prefetch
 from django.templatetags.static import static
 from django.utils.translation import ugettext as _
-from django.views.decorators.cache import cache_page
+from django.utils.decorators import method_decorator
 from django.shortcuts import get_object_or_404
 
-from .models import Gloss, Dataset, SignLanguage, GlossRelation, Translation, GlossTranslations
+from .models import Gloss, Dataset, GlossRelation
 from ..video.models import GlossVideo
 from .forms import GlossPublicSearchForm
-from .adminviews import serialize_glosses
+from .conditionalget import (conditional_get, public_ecv_validators, public_gloss_list_validators,
+                             public_gloss_validators)
+from .ecv import ecv_response
+from .publicindex import get_first_letters, get_public_datasets, get_public_signlanguages
+from .publicsearch import load_public_videos, search_public_glosses
+from .translationloader import load_translations
 
 
+@method_decorator(conditional_get(public_gloss_list_validators), name='dispatch')
 class GlossListPublicView(ListView):
     model = Gloss
     template_name = 'dictionary/public_gloss_list.html'
@@ -25,16 +30,21 @@ class GlossListPublicView(ListView):
         # Call the base implementation first to get a context
         context = super(GlossListPublicView, self).get_context_data(**kwargs)
         context["searchform"] = GlossPublicSearchForm(self.request.GET)
-        context["signlanguages"] = SignLanguage.objects.filter(dataset__is_public=True).distinct()
-        context["signlanguage_count"] = context["signlanguages"].count()
+        # The lexicons, sign languages and first letters are cached, see publicindex.py.
+        context["signlanguages"] = get_public_signlanguages()
+        context["signlanguage_count"] = len(context["signlanguages"])
         context["lang"] = self.request.GET.get("lang")
         if context["lang"]:
             context["searchform"].fields["dataset"].queryset = context["searchform"].fields["dataset"].queryset.filter(signlanguage__language_code_3char=context["lang"])
         context["datasets"] = self.request.GET.getlist("dataset")
-        context["first_letters"] = Gloss.objects.filter(dataset__is_public=True, published=True)\
-            .annotate(first_letters=Substr(Upper('idgloss'), 1, 1)).order_by('first_letters')\
-            .values_list('first_letters').distinct()
-        context['lexicons'] = Dataset.objects.filter(is_public=True)
+        context["first_letters"] = get_first_letters()
+        context['lexicons'] = get_public_datasets()
+        # Load the videos and translations of the glosses on the page at once, show the languages that have some.
+        load_public_videos(context['object_list'])
+        for gloss in load_translations(context['object_list']):
+            gloss.public_translations = [(language, translations) for language, translations
+                                         in gloss.get_translations_for_translation_languages()
+                                         if getattr(translations, 'translations', translations)]
         return context
 
     def get_queryset(self):
@@ -42,30 +52,14 @@ class GlossListPublicView(ListView):
         qs = super(GlossListPublicView, self).get_queryset()
         get = self.request.GET
 
-        # Exclude datasets that are not public.
-        qs = qs.exclude(dataset__is_public=False)
-        # Exclude glosses that are not 'published'.
-        qs = qs.exclude(published=False)
-
+        signlanguage_ids = None
         if 'lang' in get and get['lang'] != '' and get['lang'] != 'all':
-            signlang = get.get('lang')
-            qs = qs.filter(dataset__signlanguage__language_code_3char=signlang)
-
-        # Search for multiple datasets (if provided)
-        vals = get.getlist('dataset', [])
-        if vals != []:
-            qs = qs.filter(dataset__in=vals)
+            signlanguage_ids = [signlanguage.pk for signlanguage in get_public_signlanguages()
+                                if signlanguage.language_code_3char == get['lang']]
 
-        if 'gloss' in get and get['gloss'] != '':
-            val = get['gloss']
-            # Filters
-            qs = qs.filter(Q(idgloss__istartswith=val))
-        if 'keyword' in get and get['keyword'] != '':
-            val = get['keyword']
-            # Filters
-            qs = qs.filter(translation__keyword__text__istartswith=val)
-
-        qs = qs.distinct()
+        # Only published glosses of public datasets have PublicSearchEntries, see publicsearch.py.
+        qs = search_public_glosses(qs, gloss=get.get('gloss'), keyword=get.get('keyword'),
+                                   signlanguage_ids=signlanguage_ids, dataset_ids=get.getlist('dataset', []))
 
         # Set order according to GET field 'order'
         if 'order' in get:
@@ -73,15 +67,11 @@ class GlossListPublicView(ListView):
         else:
             qs = qs.order_by('idgloss')
 
-        qs = qs.select_related('dataset')
-        # Prefetching translation and dataset objects for glosses to minimize the amount of database queries.
-        qs = qs.prefetch_related(Prefetch('glosstranslations_set'),
-                                 Prefetch('glosstranslations_set__language'),
-                                 # Make sure we only show GlossVideos that have 'is_public=True'
-                                 Prefetch('glossvideo_set', queryset=GlossVideo.objects.filter(is_public=True)))
-        return qs
+        # The public videos and translations are loaded in get_context_data().
+        return qs.select_related('dataset')
 
 
+@method_decorator(conditional_get(public_gloss_validators), name='dispatch')
 class GlossDetailPublicView(DetailView):
     model = Gloss
     template_name = 'dictionary/public_gloss_detail.html'
@@ -121,19 +111,14 @@ class GlossDetailPublicView(DetailView):
         qs = super().get_queryset()
         qs = qs.filter(published=True)
         # Make sure we only show GlossVideos that have 'is_public=True'
-        return qs.prefetch_related(Prefetch('glossvideo_set', queryset=GlossVideo.objects.filter(is_public=True)))
+        return qs.prefetch_related(Prefetch('glossvideo_set', queryset=GlossVideo.objects.filter(
+            is_public=True).prefetch_related('renditions')))
 
 
-@cache_page(60 * 15)
+@conditional_get(public_ecv_validators)
 def public_gloss_list_xml(self, dataset_id):
     """Return ELAN schema valid XML of public glosses and their translations."""
     # http://www.mpi.nl/tools/elan/EAFv2.8.xsd
     dataset = get_object_or_404(Dataset, id=dataset_id, is_public=True)
-
-    return serialize_glosses(dataset, Gloss.objects.filter(
-        dataset=dataset, published=True, exclude_from_ecv=False).prefetch_related(
-        Prefetch('translation_set', queryset=Translation.objects.filter(gloss__dataset=dataset)
-                 .select_related('keyword', 'language')),
-        Prefetch('glosstranslations_set', queryset=GlossTranslations.objects
-                 .filter(gloss__dataset=dataset).select_related('language')))
-                             )
+    # The XML is stored until the glosses of the dataset change, see ecv.py.
+    return ecv_response(dataset, public=True)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Reference data of the gloss detail editor, served as separate JSON documents instead of inside every detail page.
+
+Each document is versioned per Dataset by a strong ETag and sent with 'Cache-Control: private, no-cache', so the
+browser keeps it and only revalidates it, getting a 304 with no body while the data has not changed. The data is
+encoded compactly: lists of [id, label] pairs or plain lists of names instead of objects.
+
+The glosses of a Dataset are the only large document. Its version is computed from the count, the largest id and
+the latest updated_at of the glosses, without loading them, and the encoded document is cached under that version.
+The other documents are small and versioned by a hash of their content.
+"""
+from __future__ import unicode_literals
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db.models import CharField, Count, F, Max, Value
+from django.db.models.functions import Concat
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.translation import ugettext as _
+from django.views.decorators.http import require_GET
+
+from .datasetpermissions import get_users_with_dataset_perms, has_dataset_perm
+from .models import Dataset, Gloss, Lemma
+
+
+def encode(data):
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+
+
+def get_content_etag(name, dataset, content):
+    return '"%s"' % hashlib.sha1(
+        "{name}:{dataset}:{content}".format(name=name, dataset=dataset.pk, content=content).encode('utf-8')
+    ).hexdigest()
+
+
+def get_glosses(dataset):
+    """Returns (etag, content) of the [id, idgloss] pairs of the glosses of dataset, for the GlossRelation form."""
+    glosses = Gloss.objects.filter(dataset=dataset)
+    version = glosses.order_by().aggregate(count=Count('pk'), last_id=Max('pk'), updated_at=Max('updated_at'))
+    etag = get_content_etag('glosses', dataset, "{count}:{last_id}:{updated_at}".format(**version))
+    cache_key = 'reference_data:glosses:{etag}'.format(etag=etag.strip('"'))
+    content = cache.get(cache_key)
+    if content is None:
+        content = encode([list(pair) for pair in glosses.order_by('idgloss').values_list('pk', 'idgloss')])
+        cache.set(cache_key, content, settings.REFERENCE_DATA_CACHE_TIMEOUT)
+    return etag, content
+
+
+def get_lemmas(dataset):
+    """Returns the names of all Lemmas."""
+    return list(Lemma.objects.values_list('name', flat=True))
+
+
+def get_assignable_users(dataset):
+    """Returns the [id, full name] pairs of the active staff users glosses can be assigned to."""
+    users = User.objects.filter(is_staff=True, is_active=True).annotate(
+        full_name=Concat(F('first_name'), Value(' '), F('last_name'), output_field=CharField()))
+    return [list(pair) for pair in users.order_by('pk').values_list('pk', 'full_name')]
+
+
+def get_dataset_users(dataset):
+    """Returns the usernames of the users with permissions for dataset, for @mentions in comments."""
+    return [user.username for user in get_users_with_dataset_perms([dataset])[dataset.pk]]
+
+
+def versioned_by_content(name, function):
+    """Returns a function returning the (etag, content) of the data function returns, versioned by its content."""
+    def get_etag_and_content(dataset):
+        content = encode(function(dataset))
+        return get_content_etag(name, dataset, content), content
+    return get_etag_and_content
+
+
+#: The reference data documents: name -> (function returning (etag, content), permission needed besides
+#: dictionary.search_gloss and view_dataset of the Dataset).
+REFERENCE_DATA = {
+    'glosses': (get_glosses, None),
+    'lemmas': (versioned_by_content('lemmas', get_lemmas), 'dictionary.change_gloss'),
+    'assignable-users': (versioned_by_content('assignable-users', get_assignable_users), 'dictionary.change_gloss'),
+    'dataset-users': (versioned_by_content('dataset-users', get_dataset_users), None),
+}
+
+
+@require_GET
+def reference_data(request, dataset_id, name):
+    """Returns the reference data document name of a Dataset as JSON, or 304 if the browsers copy is up to date."""
+    if name not in REFERENCE_DATA:
+        raise Http404(_("Unknown reference data."))
+    function, perm = REFERENCE_DATA[name]
+    dataset = get_object_or_404(Dataset, pk=dataset_id)
+    if not has_dataset_perm(request.user, 'view_dataset', dataset) or (perm and not request.user.has_perm(perm)):
+        raise PermissionDenied(_("You do not have permissions to view glosses of this dataset."))
+
+    etag, content = function(dataset)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
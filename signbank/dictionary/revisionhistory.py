@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+The revision history of glosses, shown on the gloss detail page for staff.
+
+The changes between consecutive reversion Versions of a Gloss are computed once, when a revision is saved, and
+stored as GlossRevisionChanges. rebuild_gloss_revision_changes() computes them for existing Versions, see the
+rebuild_gloss_revision_changes management command.
+"""
+from __future__ import unicode_literals
+
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from reversion.models import Version
+
+from .fieldchoices import get_field_choices
+from .models import Gloss, GlossRevisionChange, Translation
+
+#: Fields that are not shown in the revision history.
+REVISIONS_IGNORE = ('updated_at',)
+#: The FieldChoice fields of a Gloss, their values are shown as the names of the FieldChoices.
+GLOSS_FIELDCHOICE_FIELDS = ('handedness', 'strong_handshape', 'weak_handshape', 'location',
+                            'relation_between_articulators', 'absolute_orientation_palm',
+                            'absolute_orientation_fingers', 'relative_orientation_movement',
+                            'relative_orientation_location', 'orientation_change', 'handshape_change',
+                            'movement_shape', 'movement_direction', 'movement_manner', 'contact_type', 'wordclasses',
+                            'usage', 'named_entity', 'semantic_field', 'signer', 'age_variation')
+#: How many glosses rebuild_gloss_revision_changes() processes at a time.
+REBUILD_BATCH_SIZE = 500
+
+
+class FieldChoiceNames(object):
+    """The english names of the FieldChoices in the FieldChoiceRegistry, by pk and by machine_value."""
+
+    def __init__(self):
+        self.registry = get_field_choices()
+
+    def get_names(self, key, value):
+        # Reversion gives us the field name of ManyToManyFields, their values are lists of FieldChoice primary keys.
+        # ForeignKeys are given as the db column name with '_id', their values are FieldChoice machine_values.
+        if key.endswith('_id'):
+            choices = [self.registry.get(value)]
+        else:
+            choices = [self.registry.get_by_pk(v) for v in value or []]
+        return ', '.join(choice.english_name for choice in choices if choice is not None)
+
+
+def format_value(value):
+    if value in ('', None):
+        return '-'
+    return str(value)
+
+
+def get_version_changes(version, previous, translations, previous_translations, fieldchoice_names):
+    """Returns the (field, old value, new value) changes from the Version previous to version of a Gloss."""
+    changes = []
+    previous_fields = previous.field_dict
+    for key, value in version.field_dict.items():
+        if key in REVISIONS_IGNORE:
+            continue
+        old_value = previous_fields.get(key)
+        if value == old_value:
+            continue
+        # NOTE removesuffix() is new in Python 3.9
+        field = key.removesuffix('_id')
+        if field in GLOSS_FIELDCHOICE_FIELDS:
+            old_value = fieldchoice_names.get_names(key, old_value)
+            value = fieldchoice_names.get_names(key, value)
+        changes.append((field, format_value(old_value), format_value(value)))
+
+    # This will catch re-orderings as well
+    translations_new = ', '.join(translations)
+    translations_old = ', '.join(previous_translations)
+    if translations_new != translations_old:
+        changes.append((GlossRevisionChange.TRANSLATIONS, translations_old, translations_new))
+    return changes
+
+
+def get_revision_translations(revision_ids):
+    """Returns the Translations stored in each revision, by revision id."""
+    translations = defaultdict(list)
+    versions = Version.objects.filter(
+        revision_id__in=revision_ids, content_type=ContentType.objects.get_for_model(Translation)
+    ).order_by('pk').values_list('revision_id', 'object_repr')
+    for revision_id, object_repr in versions:
+        translations[revision_id].append(object_repr)
+    return translations
+
+
+def build_revision_changes(gloss_id, versions, translations, fieldchoice_names):
+    """Returns unsaved GlossRevisionChanges between each of the chronological Versions of a Gloss."""
+    changes = []
+    for previous, version in zip(versions, versions[1:]):
+        for field, old_value, new_value in get_version_changes(
+                version, previous, translations[version.revision_id], translations[previous.revision_id],
+                fieldchoice_names):
+            changes.append(GlossRevisionChange(
+                gloss_id=gloss_id, version=version, user_id=version.revision.user_id,
+                date_created=version.revision.date_created, field=field, old_value=old_value,
+                new_value=new_value))
+    return changes
+
+
+def record_gloss_revision_changes(versions):
+    """Stores the changes of the Gloss Versions in versions, compared to the previous Version of each Gloss."""
+    gloss_content_type = ContentType.objects.get_for_model(Gloss)
+    version_pairs = []
+    for version in versions:
+        if version.content_type_id != gloss_content_type.pk:
+            continue
+        previous = Version.objects.get_for_object_reference(Gloss, version.object_id).filter(
+            pk__lt=version.pk).select_related('revision').first()
+        if previous is not None:
+            version_pairs.append((previous, version))
+    # Skip glosses that were deleted in the same revision.
+    existing_ids = set(Gloss.objects.filter(
+        pk__in=[version.object_id for previous, version in version_pairs]).values_list('pk', flat=True))
+    version_pairs = [(previous, version) for previous, version in version_pairs
+                     if int(version.object_id) in existing_ids]
+    if not version_pairs:
+        return
+    translations = get_revision_translations(
+        {version.revision_id for pair in version_pairs for version in pair})
+    fieldchoice_names = FieldChoiceNames()
+    changes = []
+    for previous, version in version_pairs:
+        changes.extend(build_revision_changes(int(version.object_id), [previous, version], translations,
+                                              fieldchoice_names))
+    GlossRevisionChange.objects.bulk_create(changes)
+
+
+def rebuild_gloss_revision_changes(gloss_ids=None):
+    """Recomputes the GlossRevisionChanges of gloss_ids, or of all glosses, from their Versions."""
+    if gloss_ids is None:
+        gloss_ids = Gloss.objects.order_by('pk').values_list('pk', flat=True)
+    gloss_ids = list(gloss_ids)
+    fieldchoice_names = FieldChoiceNames()
+    gloss_content_type = ContentType.objects.get_for_model(Gloss)
+    count = 0
+    for start in range(0, len(gloss_ids), REBUILD_BATCH_SIZE):
+        batch = gloss_ids[start:start + REBUILD_BATCH_SIZE]
+        versions = defaultdict(list)
+        for version in Version.objects.filter(
+                content_type=gloss_content_type, object_id__in=[str(pk) for pk in batch]
+        ).select_related('revision').order_by('pk'):
+            versions[int(version.object_id)].append(version)
+        translations = get_revision_translations(
+            {version.revision_id for gloss_versions in versions.values() for version in gloss_versions})
+        changes = []
+        for gloss_id, gloss_versions in versions.items():
+            changes.extend(build_revision_changes(gloss_id, gloss_versions, translations, fieldchoice_names))
+        with transaction.atomic():
+            GlossRevisionChange.objects.filter(gloss_id__in=batch).delete()
+            GlossRevisionChange.objects.bulk_create(changes)
+        count += len(changes)
+    return count
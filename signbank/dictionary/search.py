@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Search backends for the free text 'search' of the advanced gloss search.
+
+The 'postgres' backend looks in GlossSearchDocuments: substring matches use a trigram index (when pg_trgm is
+installed) and the results are ranked with full text search, matches in the gloss names rank highest.
+The 'substring' backend is the original search with icontains lookups, it works on any database.
+Which one is used is set with the GLOSS_SEARCH_BACKEND setting.
+"""
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Exists, F, OuterRef, Q
+
+from .models import Translation
+
+#: The text search configuration, 'simple' does not stem words and works for any language.
+SEARCH_CONFIG = 'simple'
+
+# Builds the search documents of the glosses matching {where}, all text is lowercased so that the trigram index
+# can be used for case insensitive substring searches.
+UPDATE_SEARCH_DOCUMENTS_SQL = """
+INSERT INTO dictionary_glosssearchdocument (gloss_id, names, keywords, notes, document, vector)
+SELECT id, names, keywords, notes, concat_ws(E'\\n', names, keywords, notes),
+       setweight(to_tsvector(%(config)s, names), 'A') ||
+       setweight(to_tsvector(%(config)s, keywords), 'B') ||
+       setweight(to_tsvector(%(config)s, notes), 'C')
+FROM (
+    SELECT g.id,
+           lower(concat_ws(' ', g.idgloss, g.idgloss_mi)) AS names,
+           lower(coalesce((SELECT string_agg(DISTINCT k.text, ' ')
+                           FROM dictionary_translation t JOIN dictionary_keyword k ON k.id = t.keyword_id
+                           WHERE t.gloss_id = g.id), '')) AS keywords,
+           lower(coalesce(g.notes, '')) AS notes
+    FROM dictionary_gloss g
+    {where}
+) AS gloss_text
+ON CONFLICT (gloss_id) DO UPDATE SET names = EXCLUDED.names, keywords = EXCLUDED.keywords,
+    notes = EXCLUDED.notes, document = EXCLUDED.document, vector = EXCLUDED.vector
+"""
+
+
+def get_search_backend():
+    """Returns the name of the search backend in use, 'postgres' needs a PostgreSQL database."""
+    if getattr(settings, 'GLOSS_SEARCH_BACKEND', 'postgres') == 'postgres' and connection.vendor == 'postgresql':
+        return 'postgres'
+    return 'substring'
+
+
+def update_search_documents(gloss_ids=None):
+    """Creates or updates the GlossSearchDocuments of gloss_ids, or of all glosses if gloss_ids is None."""
+    if connection.vendor != 'postgresql':
+        return
+    params = {'config': SEARCH_CONFIG}
+    where = ''
+    if gloss_ids is not None:
+        gloss_ids = list(gloss_ids)
+        if not gloss_ids:
+            return
+        where = 'WHERE g.id = ANY(%(gloss_ids)s)'
+        params['gloss_ids'] = gloss_ids
+    with connection.cursor() as cursor:
+        cursor.execute(UPDATE_SEARCH_DOCUMENTS_SQL.format(where=where), params)
+
+
+def search_glosses(queryset, text):
+    """
+    Filters a Gloss queryset to the glosses that contain text in idgloss, idgloss_mi, notes or a keyword.
+    With the postgres backend the glosses are annotated with 'search_rank', higher is more relevant.
+    """
+    if get_search_backend() == 'postgres':
+        # The documents are lowercase, so a case sensitive LIKE can use the trigram index.
+        query = SearchQuery(text, config=SEARCH_CONFIG)
+        return queryset.filter(search_document__document__contains=text.lower()).annotate(
+            search_rank=SearchRank(F('search_document__vector'), query))
+
+    # Searches for multiple fields at the same time. Looking if any of the fields match.
+    # The keywords are searched in a subquery, so that glosses with many matching keywords are not duplicated.
+    keywords = Translation.objects.filter(gloss=OuterRef('pk'), keyword__text__icontains=text)
+    query = (Q(idgloss__icontains=text) | Q(idgloss_mi__icontains=text) | Q(notes__icontains=text) |
+             Q(Exists(keywords)))
+    return queryset.filter(query)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+The results of the users last advanced search, used for the search results navigation on the gloss detail page.
+
+Only the normalized query string of the search is stored in the session. The ordered gloss ids are computed
+when they are first needed and cached as a compact array of integers.
+"""
+from __future__ import unicode_literals
+
+import copy
+import hashlib
+from array import array
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import QueryDict
+
+#: GET parameters that do not change which glosses a search returns.
+SEARCH_IGNORED_PARAMETERS = ('format', 'background', 'page', 'paginate_by', 'submit')
+#: The session key of the query string of the last search.
+SEARCH_QUERY_SESSION_KEY = 'search_query'
+
+
+def normalize_search_query(querydict):
+    """Returns the search parameters of querydict as a sorted query string, without empty values."""
+    items = [(key, value) for key in querydict for value in querydict.getlist(key)
+             if key not in SEARCH_IGNORED_PARAMETERS and value != '']
+    return urlencode(sorted(items))
+
+
+def get_search_results_cache_key(user, query):
+    query_hash = hashlib.sha256(query.encode('utf-8')).hexdigest()
+    return "search_results:{user}:{hash}".format(user=user.pk, hash=query_hash)
+
+
+def set_search_query(request, query):
+    """Stores the query of the last search in the session, None clears it."""
+    # Avoid writing the session when the user pages through the same search.
+    if request.session.get(SEARCH_QUERY_SESSION_KEY) != query:
+        request.session[SEARCH_QUERY_SESSION_KEY] = query
+
+
+def get_search_result_ids(request):
+    """Returns the ordered gloss ids of the last search of the user, or an empty list if there is none."""
+    query = request.session.get(SEARCH_QUERY_SESSION_KEY)
+    if not query:
+        return []
+    cache_key = get_search_results_cache_key(request.user, query)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        ids = array('i')
+        ids.frombytes(cached)
+        return ids.tolist()
+
+    # Imported here, adminviews imports this module.
+    from .adminviews import GlossListView
+    search_request = copy.copy(request)
+    search_request.GET = QueryDict(query)
+    view = GlossListView()
+    view.setup(search_request)
+    qs = view.get_queryset().prefetch_related(None)
+    ids = list(qs.values_list('pk', flat=True)[:settings.SEARCH_RESULTS_MAX_IDS])
+    cache.set(cache_key, array('i', ids).tobytes(), settings.SEARCH_RESULTS_CACHE_TIMEOUT)
+    return ids
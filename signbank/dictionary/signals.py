@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""Signal handlers of the dictionary app, connected in DictionaryConfig.ready()."""
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from guardian.models import GroupObjectPermission, UserObjectPermission
+from reversion.signals import post_revision_commit
+
+from .conditionalget import record_dataset_changes, record_gloss_changes
+from .datasetpermissions import (get_dataset_content_type, invalidate_dataset_perms,
+                                 invalidate_user_dataset_perms)
+from .fieldchoices import invalidate_field_choices
+from .models import (Dataset, FieldChoice, Gloss, GlossRelation, GlossSearchDocument, GlossTranslations,
+                     GlossValidationSummary, Keyword, ManualValidationAggregation, PublicSearchEntry,
+                     ShareValidationAggregation, SignLanguage, Translation, ValidationRecord)
+from .publicindex import invalidate_first_letters, invalidate_public_datasets
+from .publicsearch import update_public_search_entries
+from .revisionhistory import record_gloss_revision_changes
+from .search import update_search_documents
+from .validationsummary import update_validation_summaries
+from ..video.models import GlossVideo
+from ..video.posters import delete_thumbnail_files_on_commit, queue_poster_job
+from ..video.renditions import delete_rendition_files_on_commit, queue_transcode_job
+
+
+@receiver(post_save, sender=Gloss)
+def update_gloss_search_document(sender, instance, raw=False, **kwargs):
+    """Keep the GlossSearchDocument and the PublicSearchEntries of a Gloss up to date."""
+    if not raw:
+        update_search_documents([instance.pk])
+        update_public_search_entries([instance.pk])
+
+
+@receiver(post_save, sender=Translation)
+@receiver(post_delete, sender=Translation)
+def update_translation_search_document(sender, instance, raw=False, **kwargs):
+    """Translations are the keywords of a GlossSearchDocument and of PublicSearchEntries."""
+    if not raw:
+        update_search_documents([instance.gloss_id])
+        update_public_search_entries([instance.gloss_id])
+
+
+@receiver(post_save, sender=Keyword)
+def update_keyword_search_documents(sender, instance, created, raw=False, **kwargs):
+    """Update the GlossSearchDocuments of glosses that have a Translation with the Keyword."""
+    if not raw and not created:
+        gloss_ids = list(Translation.objects.filter(keyword=instance).values_list('gloss_id', flat=True))
+        update_search_documents(gloss_ids)
+        update_public_search_entries(gloss_ids)
+        record_gloss_changes(gloss_ids)
+
+
+@receiver(post_revision_commit)
+def record_revision_changes(sender, revision, versions, **kwargs):
+    """Store the changes of the glosses in a new revision, for their revision history."""
+    record_gloss_revision_changes(versions)
+
+
+@receiver(post_save, sender=ValidationRecord)
+@receiver(post_delete, sender=ValidationRecord)
+@receiver(post_save, sender=ShareValidationAggregation)
+@receiver(post_delete, sender=ShareValidationAggregation)
+@receiver(post_save, sender=ManualValidationAggregation)
+@receiver(post_delete, sender=ManualValidationAggregation)
+def update_gloss_validation_summary(sender, instance, raw=False, **kwargs):
+    """Keep the GlossValidationSummary of a Gloss up to date, the imports use bulk_create and update it themselves."""
+    if not raw:
+        update_validation_summaries([instance.gloss_id])
+
+
+@receiver(post_delete, sender=Gloss)
+def delete_gloss_summaries(sender, instance, **kwargs):
+    """
+    Deleting a Gloss deletes its Translations and validations before the Gloss, and their handlers above may have
+    recreated the GlossSearchDocument, GlossValidationSummary or PublicSearchEntries of the Gloss after it was
+    collected for deletion.
+    """
+    GlossSearchDocument.objects.filter(gloss_id=instance.pk).delete()
+    GlossValidationSummary.objects.filter(gloss_id=instance.pk).delete()
+    PublicSearchEntry.objects.filter(gloss_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=FieldChoice)
+@receiver(post_delete, sender=FieldChoice)
+def update_field_choices(sender, instance, **kwargs):
+    """Reload the FieldChoiceRegistry of all processes."""
+    invalidate_field_choices()
+
+
+@receiver(post_save, sender=UserObjectPermission)
+@receiver(post_delete, sender=UserObjectPermission)
+def update_user_dataset_perms(sender, instance, **kwargs):
+    """The cached Dataset permissions of a user, see datasetpermissions.py."""
+    if instance.content_type_id == get_dataset_content_type().pk:
+        invalidate_user_dataset_perms([instance.user_id])
+
+
+@receiver(post_save, sender=GroupObjectPermission)
+@receiver(post_delete, sender=GroupObjectPermission)
+def update_group_dataset_perms(sender, instance, **kwargs):
+    if instance.content_type_id == get_dataset_content_type().pk:
+        invalidate_dataset_perms()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def update_group_members_dataset_perms(sender, instance, action, reverse, pk_set, **kwargs):
+    """Users get the Dataset permissions of their groups."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_user_dataset_perms([instance.pk])
+    elif pk_set:
+        invalidate_user_dataset_perms(pk_set)
+    else:
+        invalidate_dataset_perms()
+
+
+@receiver(post_save, sender=User)
+def update_superuser_dataset_perms(sender, instance, created, update_fields=None, **kwargs):
+    """Superusers have all the permissions and inactive users none, skip the saves of users logging in."""
+    if not created and update_fields != frozenset(['last_login']):
+        invalidate_user_dataset_perms([instance.pk])
+
+
+@receiver(post_save, sender=Dataset)
+@receiver(post_delete, sender=Dataset)
+def update_all_dataset_perms(sender, instance, created=True, **kwargs):
+    """Superusers have permissions for all Datasets, post_delete has no created argument."""
+    if created:
+        invalidate_dataset_perms()
+
+
+def get_public_first_letter(published, idgloss, dataset_id):
+    return (dataset_id, (idgloss or '')[:1].upper()) if published else None
+
+
+#: The fields of a Gloss its public first letter depends on.
+PUBLIC_FIRST_LETTER_FIELDS = ('published', 'idgloss', 'dataset_id')
+
+
+@receiver(post_init, sender=Gloss)
+def store_public_first_letter(sender, instance, **kwargs):
+    """Store the public first letter a Gloss is loaded with, to compare it with the saved one without a query."""
+    # Deferred fields are not loaded here, the letters are rebuilt when a Gloss loaded without them is saved.
+    if all(field in instance.__dict__ for field in PUBLIC_FIRST_LETTER_FIELDS):
+        instance._public_first_letter = get_public_first_letter(
+            *[instance.__dict__[field] for field in PUBLIC_FIRST_LETTER_FIELDS])
+
+
+@receiver(post_save, sender=Gloss)
+def update_public_first_letters(sender, instance, created, raw=False, **kwargs):
+    """The first letters of the public gloss list, see publicindex.py."""
+    if raw:
+        return
+    new = get_public_first_letter(instance.published, instance.idgloss, instance.dataset_id)
+    if not created and not hasattr(instance, '_public_first_letter'):
+        # Loaded without the fields, the Dataset it was in is not known.
+        invalidate_first_letters(list(Dataset.objects.values_list('pk', flat=True)))
+    else:
+        old = None if created else instance._public_first_letter
+        if old != new:
+            invalidate_first_letters({letter[0] for letter in (old, new) if letter})
+    instance._public_first_letter = new
+
+
+@receiver(post_delete, sender=Gloss)
+def delete_public_first_letter(sender, instance, **kwargs):
+    if instance.published:
+        invalidate_first_letters([instance.dataset_id])
+
+
+@receiver(post_save, sender=Dataset)
+@receiver(post_delete, sender=Dataset)
+@receiver(post_save, sender=SignLanguage)
+@receiver(post_delete, sender=SignLanguage)
+def update_public_datasets(sender, instance, **kwargs):
+    """The public lexicons and sign languages of the public gloss list."""
+    invalidate_public_datasets()
+    if sender is Dataset and 'created' not in kwargs:
+        # The first letters of a deleted Dataset.
+        invalidate_first_letters([instance.pk])
+
+
+@receiver(post_save, sender=GlossVideo)
+@receiver(post_delete, sender=GlossVideo)
+def update_video_public_search_entries(sender, instance, raw=False, **kwargs):
+    """The PublicSearchEntries of a Gloss have its first public GlossVideo and the number of them."""
+    if not raw and instance.gloss_id:
+        update_public_search_entries([instance.gloss_id])
+
+
+@receiver(post_save, sender=GlossVideo)
+def queue_glossvideo_jobs(sender, instance, raw=False, **kwargs):
+    """
+    The poster of a GlossVideo is extracted, and it is transcoded, in the background when it is created or its
+    videofile changes.
+    """
+    if not raw:
+        # After the commit the videofile has its final name, GlossVideo.save() renames it after the first save.
+        transaction.on_commit(lambda: (queue_poster_job(instance), queue_transcode_job(instance)))
+
+
+@receiver(pre_delete, sender=GlossVideo)
+def delete_glossvideo_job_files(sender, instance, **kwargs):
+    """The renditions and thumbnails of a GlossVideo are deleted with it, and their files after the commit."""
+    delete_rendition_files_on_commit(instance)
+    delete_thumbnail_files_on_commit(instance)
+
+
+@receiver(pre_save, sender=Dataset)
+def store_dataset_public_search_fields(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk:
+        instance._public_search_fields = Dataset.objects.filter(pk=instance.pk).values_list(
+            'is_public', 'signlanguage_id').first()
+
+
+@receiver(post_save, sender=Dataset)
+def update_dataset_public_search_entries(sender, instance, created, raw=False, **kwargs):
+    """Only the glosses of public Datasets have PublicSearchEntries, with the SignLanguage of the Dataset."""
+    old = getattr(instance, '_public_search_fields', None)
+    if not raw and not created and old != (instance.is_public, instance.signlanguage_id):
+        update_public_search_entries(dataset_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Gloss)
+@receiver(post_delete, sender=Gloss)
+def record_gloss_dataset_changes(sender, instance, raw=False, **kwargs):
+    """The DatasetChangeCounters the HTTP validators of the public pages are derived from, see conditionalget.py."""
+    if not raw:
+        record_dataset_changes([instance.dataset_id])
+
+
+@receiver(post_save, sender=GlossTranslations)
+@receiver(post_delete, sender=GlossTranslations)
+def touch_translated_gloss(sender, instance, raw=False, **kwargs):
+    """The GlossTranslations are a part of the Gloss in the packages, which find the changed glosses by updated_at."""
+    if not raw and instance.gloss_id:
+        Gloss.objects.filter(pk=instance.gloss_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Translation)
+@receiver(post_delete, sender=Translation)
+@receiver(post_save, sender=GlossTranslations)
+@receiver(post_delete, sender=GlossTranslations)
+@receiver(post_save, sender=GlossVideo)
+@receiver(post_delete, sender=GlossVideo)
+def record_related_dataset_changes(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_gloss_changes([instance.gloss_id])
+
+
+@receiver(post_save, sender=GlossRelation)
+@receiver(post_delete, sender=GlossRelation)
+def record_relation_dataset_changes(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_gloss_changes([instance.source_id, instance.target_id])
+
+
+@receiver(post_save, sender=Dataset)
+def record_dataset_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_dataset_changes([instance.pk])
+
+
+@receiver(post_save, sender=SignLanguage)
+def record_signlanguage_dataset_changes(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_dataset_changes(Dataset.objects.filter(signlanguage=instance).values_list('pk', flat=True))
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+A small query language for searching by tags, compiled to EXISTS subqueries on TaggedItem.
+
+Examples of tag queries::
+
+    validation:pass
+    ready-for-validation AND NOT validation:fail
+    (validation:pass OR validation:hold) "some tag"
+
+Terms next to each other are combined with AND. The operators AND, OR and NOT are case insensitive,
+tags that contain spaces or parentheses, or are named like an operator, can be written in double quotes.
+"""
+from __future__ import unicode_literals
+
+import re
+
+from django.contrib import messages
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Exists, OuterRef, Q
+from django.utils.translation import ugettext as _
+from tagging.models import TaggedItem
+
+# Quoted tag names, parentheses or bare words.
+TOKEN_RE = re.compile(r'\s*(?:"([^"]*)"|(\()|(\))|([^\s()"]+))')
+OPERATORS = ('AND', 'OR', 'NOT')
+
+
+class TagQueryError(ValueError):
+    """Raised when a tag query can not be parsed."""
+
+
+def tokenize(text):
+    """Returns a list of (kind, value) tuples, where kind is 'tag', 'op', '(' or ')'."""
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN_RE.match(text, position)
+        if match is None:
+            raise TagQueryError(_("Unterminated quote in tag query."))
+        quoted, left, right, word = match.groups()
+        if quoted is not None:
+            tokens.append(('tag', quoted))
+        elif left:
+            tokens.append(('(', left))
+        elif right:
+            tokens.append((')', right))
+        elif word.upper() in OPERATORS:
+            tokens.append(('op', word.upper()))
+        else:
+            tokens.append(('tag', word))
+        position = match.end()
+    return tokens
+
+
+class TagQueryParser(object):
+    """
+    Recursive descent parser for tag queries, returns a tree of tuples:
+    ('tag', name), ('not', node), ('and', [nodes]) and ('or', [nodes]).
+    """
+
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return (None, None)
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise TagQueryError(_("The tag query is empty."))
+        node = self.parse_or()
+        if self.peek() != (None, None):
+            raise TagQueryError(_("Unexpected '%(token)s' in tag query.") % {'token': self.peek()[1]})
+        return node
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.peek() == ('op', 'OR'):
+            self.next()
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and(self):
+        nodes = [self.parse_not()]
+        while True:
+            kind, value = self.peek()
+            if (kind, value) == ('op', 'AND'):
+                self.next()
+            elif kind not in ('tag', '(') and (kind, value) != ('op', 'NOT'):
+                break
+            # Terms next to each other are an implicit AND.
+            nodes.append(self.parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_not(self):
+        if self.peek() == ('op', 'NOT'):
+            self.next()
+            return ('not', self.parse_not())
+        return self.parse_term()
+
+    def parse_term(self):
+        kind, value = self.next()
+        if kind == 'tag':
+            return ('tag', value)
+        if kind == '(':
+            node = self.parse_or()
+            if self.next()[0] != ')':
+                raise TagQueryError(_("Missing ')' in tag query."))
+            return node
+        if kind is None:
+            raise TagQueryError(_("The tag query ends unexpectedly."))
+        raise TagQueryError(_("Unexpected '%(token)s' in tag query.") % {'token': value})
+
+
+def parse_tag_query(text):
+    """Parses a tag query, raises TagQueryError if it is not valid."""
+    return TagQueryParser(text).parse()
+
+
+def tagged_q(model, **tag_lookup):
+    """
+    Returns a Q object matching objects of model that have a tag matching tag_lookup, e.g. name='tag' or pk=1.
+    The condition is an EXISTS subquery, so it never duplicates rows and can be negated with ~.
+    """
+    tagged_items = TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(model), object_id=OuterRef('pk'),
+        **{'tag__' + key: value for key, value in tag_lookup.items()})
+    return Q(Exists(tagged_items))
+
+
+def compile_tag_query(model, text):
+    """Compiles the tag query text to a Q object for filtering a queryset of model."""
+    def compile_node(node):
+        kind, value = node
+        if kind == 'tag':
+            return tagged_q(model, name__iexact=value)
+        if kind == 'not':
+            return ~compile_node(value)
+        combined = compile_node(value[0])
+        for child in value[1:]:
+            combined = combined & compile_node(child) if kind == 'and' else combined | compile_node(child)
+        return combined
+
+    return compile_node(parse_tag_query(text))
+
+
+def filter_by_tag_query(request, queryset, text):
+    """Filters queryset with the tag query text, an invalid query shows an error and matches nothing."""
+    try:
+        return queryset.filter(compile_tag_query(queryset.model, text))
+    except TagQueryError as e:
+        messages.error(request, _("Invalid tag query: %(error)s") % {'error': e}, fail_silently=True)
+        return queryset.none()
@@ -7,7 +7,8 @@ from urllib.request import urlretrieve
 from django.conf import settings
 from django.db import connection
 
-from .models import FieldChoice, Gloss
+from .fieldchoices import get_field_choices
+from .models import Gloss
 from ..video.models import GlossVideo
 
 
@@ -62,19 +63,10 @@ def retrieve_videos_for_glosses(video_details: List[VideoDetail]):
     - title
     - version
     """
-    main_video_type = FieldChoice.objects.filter(field="video_type", english_name="main").first()
-    finalexample_1_video_type = FieldChoice.objects.filter(
-        field="video_type",
-        english_name="finalexample1"
-    ).first()
-    finalexample_2_video_type = FieldChoice.objects.filter(
-        field="video_type",
-        english_name="finalexample2"
-    ).first()
+    field_choices = get_field_choices()
     video_type_map = {
-        "main": main_video_type,
-        "finalexample1": finalexample_1_video_type,
-        "finalexample2": finalexample_2_video_type
+        name: field_choices.get_by_name("video_type", name)
+        for name in ("main", "finalexample1", "finalexample2")
     }
     videos_to_create = []
 
@@ -11,6 +11,7 @@ from django.contrib.auth.models import AnonymousUser, Permission, User
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
 from django.test import Client, TestCase
+from django.test.utils import override_settings
 from django.urls import reverse
 from django.utils.timezone import get_current_timezone
 from django_comments.models import Comment
@@ -76,6 +77,68 @@ class GlossListViewTestCase(TestCase):
         self.assertEqual(response.headers['Content-Type'], 'text/csv; charset=utf-8')
         self.assertEqual(response.headers['Content-Disposition'], 'attachment; filename="dictionary-export.csv"')
 
+    def test_get_csv_streams_rows_in_column_order(self):
+        """Tests that the CSV-standard export is streamed and keeps the dictionary column order"""
+        permission = Permission.objects.get(codename='export_csv')
+        self.user.user_permissions.add(permission)
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage)
+        assign_perm("dictionary.view_dataset", self.user, dataset)
+        testgloss = Gloss.objects.create(idgloss="testgloss", dataset=dataset, created_by=self.user,
+                                         updated_by=self.user, hint="a hint")
+        language_en = Language.objects.create(name="English", language_code_2char="EN", language_code_3char="ENG")
+        GlossTranslations.objects.create(gloss=testgloss, language=language_en, translations="test gloss")
+
+        response = self.client.get(reverse('dictionary:admin_gloss_list'), {'format': 'CSV-standard'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+
+        content = b"".join(response.streaming_content).decode('utf-8')
+        csv_content = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(len(csv_content), 2)
+        headers, row = csv_content
+        self.assertEqual(headers[:4], ["id", "dataset", "variant_number", "gloss_main"])
+        self.assertEqual(headers[-4:], ["created_at", "created_by", "updated_at", "updated_by"])
+        self.assertEqual(row[headers.index("id")], str(testgloss.pk))
+        self.assertEqual(row[headers.index("dataset")], dataset.name)
+        self.assertEqual(row[headers.index("gloss_main")], "test gloss")
+        self.assertEqual(row[headers.index("hint")], "a hint")
+        self.assertEqual(row[headers.index("created_by")], self.user.username)
+        # Empty values are exported as empty strings, not 'None'.
+        self.assertEqual(row[headers.index("handshape")], "")
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_search_results_are_cached_lazily(self):
+        """Tests that only the search query is kept in the session and the result ids are computed on demand"""
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage)
+        assign_perm("dictionary.view_dataset", self.user, dataset)
+        gloss_b = Gloss.objects.create(idgloss="testgloss-b", dataset=dataset, created_by=self.user,
+                                       updated_by=self.user)
+        gloss_a = Gloss.objects.create(idgloss="testgloss-a", dataset=dataset, created_by=self.user,
+                                       updated_by=self.user)
+        Gloss.objects.create(idgloss="other", dataset=dataset, created_by=self.user, updated_by=self.user)
+
+        response = self.client.get(reverse('dictionary:admin_gloss_list'), {'search': 'testgloss', 'page': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.session['search_query'], "search=testgloss")
+        self.assertNotIn('search_results', self.client.session)
+
+        response = self.client.get(reverse('dictionary:ajax_search_results'))
+        self.assertEqual(response.json(), [{'id': gloss_a.pk, 'gloss': 'testgloss-a'},
+                                           {'id': gloss_b.pk, 'gloss': 'testgloss-b'}])
+
+        # The ids come from the cache, a deleted gloss is left out.
+        gloss_a.delete()
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('dictionary:ajax_search_results'))
+        self.assertEqual(response.json(), [{'id': gloss_b.pk, 'gloss': 'testgloss-b'}])
+
+        # An unfiltered search clears the stored search.
+        self.client.get(reverse('dictionary:admin_gloss_list'))
+        self.assertIsNone(self.client.session['search_query'])
+        self.assertEqual(self.client.get(reverse('dictionary:ajax_search_results')).content, b"OK")
+
     def test_get_ready_for_validation_csv(self):
         """
         Tests that a CSV file can be successfully downloaded containing glosses that are
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from signbank.dictionary.ecv import get_ecv_name
+from signbank.dictionary.models import (Dataset, DatasetChangeCounter, Gloss, GlossTranslations, Language,
+                                        SignLanguage)
+
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.language = Language.objects.create(name="English", language_code_2char="en", language_code_3char="eng")
+        # The counters are incremented when the transaction is committed.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage, is_public=True)
+            self.dataset.translation_languages.add(self.language)
+            self.other_dataset = Dataset.objects.create(name="otherdataset", signlanguage=signlanguage,
+                                                        is_public=True)
+            self.gloss = Gloss.objects.create(idgloss="HAT", dataset=self.dataset, published=True)
+            self.other_gloss = Gloss.objects.create(idgloss="HAND", dataset=self.other_dataset, published=True)
+        self.client = Client()
+
+    def assertNotModified(self, url, num_queries=2, **kwargs):
+        """Asserts that url answers 304 to its own validators, and returns the response it got at first."""
+        response = self.client.get(url, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'])
+        self.assertTrue(response['Last-Modified'])
+        with self.assertNumQueries(num_queries):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], **kwargs)
+        self.assertEqual(not_modified.status_code, 304)
+        return response
+
+    def test_counters(self):
+        """Tests that changes to the glosses and their translations increment the counter of their dataset."""
+        count = DatasetChangeCounter.objects.get(dataset=self.dataset).count
+        with self.captureOnCommitCallbacks(execute=True):
+            GlossTranslations.objects.create(gloss=self.gloss, language=self.language, translations="cap")
+        self.assertGreater(DatasetChangeCounter.objects.get(dataset=self.dataset).count, count)
+        count = DatasetChangeCounter.objects.get(dataset=self.dataset).count
+        other_count = DatasetChangeCounter.objects.get(dataset=self.other_dataset).count
+        with self.captureOnCommitCallbacks(execute=True):
+            self.gloss.delete()
+        self.assertGreater(DatasetChangeCounter.objects.get(dataset=self.dataset).count, count)
+        self.assertEqual(DatasetChangeCounter.objects.get(dataset=self.other_dataset).count, other_count)
+
+    def test_counters_on_commit(self):
+        """Tests that the counters are incremented once per transaction, after it is committed."""
+        counts = dict(DatasetChangeCounter.objects.values_list('dataset_id', 'count'))
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.gloss.save()
+            GlossTranslations.objects.create(gloss=self.gloss, language=self.language, translations="cap")
+            self.other_gloss.save()
+            self.assertEqual(dict(DatasetChangeCounter.objects.values_list('dataset_id', 'count')), counts)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(dict(DatasetChangeCounter.objects.values_list('dataset_id', 'count')),
+                         {dataset_id: count + 1 for dataset_id, count in counts.items()})
+
+    def test_public_gloss(self):
+        url = reverse('dictionary:public_gloss_view', args=[self.gloss.pk])
+        response = self.assertNotModified(url)
+        # A change in the gloss or in another gloss of the dataset changes the validators.
+        with self.captureOnCommitCallbacks(execute=True):
+            GlossTranslations.objects.create(gloss=self.gloss, language=self.language, translations="cap")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+        # Changes in other datasets do not.
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_gloss.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_public_gloss_list(self):
+        url = reverse('dictionary:public_gloss_list')
+        response = self.assertNotModified(url, data={'gloss': 'h'})
+        self.other_gloss.idgloss = "HANDS"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_gloss.save()
+        response = self.client.get(url, {'gloss': 'h'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "HANDS")
+
+    def test_logged_in_users(self):
+        """Tests that the pages of logged in users are not validated, they show the users notifications."""
+        self.client.force_login(User.objects.create_user(username="test", email=None, password="test"))
+        response = self.client.get(reverse('dictionary:public_gloss_list'))
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_public_ecv(self):
+        url = reverse('dictionary:public_gloss_list_xml', args=[self.dataset.pk])
+        response = self.assertNotModified(url, num_queries=1)
+        self.gloss.exclude_from_ecv = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.gloss.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "HAT")
+        default_storage.delete(get_ecv_name(self.dataset, public=True))
+
+    def test_sitemap(self):
+        self.assertNotModified('/sitemap.xml')
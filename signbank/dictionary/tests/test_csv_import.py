@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 
 import copy
 import csv
+import os
 import random
 import uuid
 from unittest import mock
@@ -105,7 +106,7 @@ class ShareCSVImportTestCase(TestCase):
 
     def test_import_view_successful_file_upload(self):
         """Test a csv file can successfully be read by the NZSLShare csv import view"""
-        file_name = "test.csv"
+        file_name = os.path.join(settings.TEST_FILES_ROOT, "test.csv")
         csv_content = self._csv_content
         with open(file_name, "w") as file:
             writer = csv.writer(file)
@@ -131,7 +132,7 @@ class ShareCSVImportTestCase(TestCase):
         with it, is skipped, so long as it has a video (glosses with videos may not
         be re-imported)
         """
-        file_name = "test.csv"
+        file_name = os.path.join(settings.TEST_FILES_ROOT, "test.csv")
         csv_content = [copy.deepcopy(self._csv_content), copy.deepcopy(self._csv_content)]
         csv_content[1]["id"] = "12345"
         
@@ -170,7 +171,7 @@ class ShareCSVImportTestCase(TestCase):
         Test a csv file row, for which an existing gloss has the share id associated with it,
         is not skipped if it has no video associated (glosses without videos may be re-imported)
         """
-        file_name = "test.csv"
+        file_name = os.path.join(settings.TEST_FILES_ROOT, "test.csv")
         csv_content = [copy.deepcopy(self._csv_content), copy.deepcopy(self._csv_content)]
         csv_content[1]["id"] = "12345"
 
@@ -203,7 +204,7 @@ class ShareCSVImportTestCase(TestCase):
         nzsl_share_id, gracefully skip the row regardless of whether the glosses have
         videos or not.
         """
-        file_name = "test.csv"
+        file_name = os.path.join(settings.TEST_FILES_ROOT, "test.csv")
         csv_content = [copy.deepcopy(self._csv_content), copy.deepcopy(self._csv_content)]
         csv_content[1]["id"] = "12345"
 
@@ -547,7 +548,7 @@ class QualtricsCSVImportTestCase(TestCase):
 
     def test_import_view_successful_file_upload(self):
         """Test a csv file can successfully be read by the Qualtrics csv import view"""
-        file_name = "test.csv"
+        file_name = os.path.join(settings.TEST_FILES_ROOT, "test.csv")
         csv_content = self._csv_content
         with open(file_name, "w") as file:
             writer = csv.writer(file)
@@ -800,7 +801,7 @@ class ManualValidationCSVImportTestCase(TestCase):
 
     def test_import_view_missing_required_header(self):
         """Test a missing column re-renders import view"""
-        file_name = "test.csv"
+        file_name = os.path.join(settings.TEST_FILES_ROOT, "test.csv")
         csv_content = copy.deepcopy(self._csv_content)
         csv_headers = copy.deepcopy(self._csv_headers)
         csv_headers.pop()
@@ -830,7 +831,7 @@ class ManualValidationCSVImportTestCase(TestCase):
 
     def test_non_integer_row_value_raises_validation_error(self):
         """Test a non_compliant row value raises a ValidationError"""
-        file_name = "test.csv"
+        file_name = os.path.join(settings.TEST_FILES_ROOT, "test.csv")
         csv_content = copy.deepcopy(self._csv_content)[0]
         csv_headers = copy.deepcopy(self._csv_headers)
 
@@ -854,7 +855,7 @@ class ManualValidationCSVImportTestCase(TestCase):
 
     def test_import_view_successful_file_upload(self):
         """Test a csv file can successfully be read by manual validation csv import view"""
-        file_name = "test.csv"
+        file_name = os.path.join(settings.TEST_FILES_ROOT, "test.csv")
         csv_content = self._csv_content
 
         with open(file_name, "w") as file:
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from guardian.shortcuts import assign_perm, remove_perm
+
+from signbank.dictionary.datasetpermissions import (get_allowed_dataset_ids, get_dataset_perms,
+                                                    get_users_with_dataset_perms, has_dataset_perm)
+from signbank.dictionary.models import Dataset, SignLanguage
+
+
+# A cache shared between processes, like Redis or memcached in production.
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                       'LOCATION': os.path.join(settings.TEST_FILES_ROOT, 'cache')}})
+class DatasetPermissionsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage)
+        self.other_dataset = Dataset.objects.create(name="otherdataset", signlanguage=signlanguage)
+        self.user = User.objects.create_user(username="test", email=None, password="test")
+        self.group_user = User.objects.create_user(username="groupuser", email=None, password="test")
+        self.superuser = User.objects.create_superuser(username="super", email=None, password="test")
+        self.group = Group.objects.create(name="testgroup")
+        self.group_user.groups.add(self.group)
+        assign_perm('dictionary.view_dataset', self.user, self.dataset)
+        assign_perm('dictionary.change_dataset', self.user, self.dataset)
+        assign_perm('dictionary.view_dataset', self.group, self.other_dataset)
+        ContentType.objects.get_for_model(Dataset)
+
+    def get_user(self, user):
+        # A new user object, like the one of the next request.
+        return User.objects.get(pk=user.pk)
+
+    def test_dataset_perms(self):
+        """Tests the permissions of users directly, through groups and of superusers."""
+        self.assertEqual(get_dataset_perms(self.user, self.dataset), {'view_dataset', 'change_dataset'})
+        self.assertEqual(get_dataset_perms(self.user, self.other_dataset.pk), set())
+        self.assertTrue(has_dataset_perm(self.group_user, 'dictionary.view_dataset', self.other_dataset))
+        self.assertEqual(get_allowed_dataset_ids(self.user), [self.dataset.pk])
+        self.assertEqual(get_allowed_dataset_ids(self.group_user), [self.other_dataset.pk])
+        self.assertEqual(get_allowed_dataset_ids(self.superuser, 'change_dataset'),
+                         sorted([self.dataset.pk, self.other_dataset.pk]))
+        self.assertTrue(has_dataset_perm(self.superuser, 'delete_dataset', self.other_dataset))
+
+    def test_perms_are_cached(self):
+        """Tests that the permissions are resolved once per user object and then read from the cache."""
+        get_dataset_perms(self.user, self.dataset)
+        with self.assertNumQueries(0):
+            get_dataset_perms(self.user, self.other_dataset)
+        user = self.get_user(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_dataset_perms(user, self.dataset), {'view_dataset', 'change_dataset'})
+
+    def test_perms_are_not_cached_per_process(self):
+        """Tests that with a cache of each process the permissions are only kept on the user object."""
+        with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            get_dataset_perms(self.user, self.dataset)
+            with self.assertNumQueries(0):
+                get_dataset_perms(self.user, self.other_dataset)
+            # Other processes would not see an invalidation, so each request resolves them again.
+            user = self.get_user(self.user)
+            with self.assertNumQueries(1):
+                self.assertEqual(get_dataset_perms(user, self.dataset), {'view_dataset', 'change_dataset'})
+
+    def test_invalidation(self):
+        """Tests that changing object permissions and group memberships updates the cached permissions."""
+        for user in (self.user, self.group_user):
+            get_dataset_perms(user, self.dataset)
+        remove_perm('dictionary.view_dataset', self.user, self.dataset)
+        self.assertEqual(get_allowed_dataset_ids(self.get_user(self.user)), [])
+        assign_perm('dictionary.view_dataset', self.group, self.dataset)
+        self.assertEqual(get_allowed_dataset_ids(self.get_user(self.group_user)),
+                         sorted([self.dataset.pk, self.other_dataset.pk]))
+        self.group.user_set.add(self.user)
+        self.assertEqual(get_allowed_dataset_ids(self.get_user(self.user)),
+                         sorted([self.dataset.pk, self.other_dataset.pk]))
+        self.user.groups.clear()
+        self.assertEqual(get_allowed_dataset_ids(self.get_user(self.user)), [])
+
+    def test_users_with_dataset_perms(self):
+        """Tests that the users with permissions for many datasets are found in two queries."""
+        with self.assertNumQueries(2):
+            users = get_users_with_dataset_perms([self.dataset, self.other_dataset.pk])
+        self.assertEqual(users, {self.dataset.pk: [self.user], self.other_dataset.pk: [self.group_user]})
+        users = get_users_with_dataset_perms([self.dataset], with_superusers=True)
+        self.assertEqual(users, {self.dataset.pk: [self.superuser, self.user]})
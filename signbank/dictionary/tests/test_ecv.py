@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from xml.etree import ElementTree
+
+from django.core.files.storage import default_storage
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from signbank.dictionary.admin import exclude_from_ecv, include_in_ecv
+from signbank.dictionary.ecv import ECV_DIRECTORY, delete_old_ecv_files, get_ecv_name
+from signbank.dictionary.models import Dataset, Gloss, SignLanguage
+
+
+class ECVTestCase(TestCase):
+    def setUp(self):
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage, is_public=True)
+        self.hat = Gloss.objects.create(idgloss="HAT", idgloss_mi="POTAE", dataset=self.dataset, published=True)
+        self.hand = Gloss.objects.create(idgloss="HAND & ARM", dataset=self.dataset, published=False)
+        self.hair = Gloss.objects.create(idgloss="HAIR", dataset=self.dataset, published=True,
+                                         exclude_from_ecv=True)
+        self.client = Client()
+
+    def tearDown(self):
+        if default_storage.exists(ECV_DIRECTORY):
+            for filename in default_storage.listdir(ECV_DIRECTORY)[1]:
+                if filename.startswith('dataset-%s-' % self.dataset.pk):
+                    default_storage.delete('%s/%s' % (ECV_DIRECTORY, filename))
+
+    def get_entries(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/xml')
+        root = ElementTree.fromstring(b''.join(response.streaming_content))
+        self.assertEqual(root.find('CONTROLLED_VOCABULARY').get('CV_ID'), 'signbank-dataset-%s' % self.dataset.pk)
+        return [(entry.get('CVE_ID'), [value.text or '' for value in entry.findall('CVE_VALUE')])
+                for entry in root.iter('CV_ENTRY_ML')]
+
+    def test_ecv(self):
+        """Tests that the ECV has the glosses not excluded from it, the public one only the published glosses."""
+        self.assertEqual(self.get_entries(reverse('dictionary:gloss_list_xml', args=[self.dataset.pk])), [
+            ('glossid%s' % self.hand.pk, ['HAND & ARM', '']),
+            ('glossid%s' % self.hat.pk, ['HAT', 'POTAE']),
+        ])
+        self.assertEqual(self.get_entries(reverse('dictionary:public_gloss_list_xml', args=[self.dataset.pk])), [
+            ('glossid%s' % self.hat.pk, ['HAT', 'POTAE']),
+        ])
+
+    def test_stored(self):
+        """Tests that the ECV file is reused until the glosses of the dataset change, and the old file deleted later."""
+        with self.assertNumQueries(2):
+            name = get_ecv_name(self.dataset, public=True)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_ecv_name(self.dataset, public=True), name)
+        self.hand.published = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hand.save()
+        new_name = get_ecv_name(self.dataset, public=True)
+        self.assertNotEqual(new_name, name)
+        # The old file may still be served, it is only deleted by delete_old_ecvs.
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(delete_old_ecv_files(), 1)
+        self.assertFalse(default_storage.exists(name))
+        self.assertTrue(default_storage.exists(new_name))
+        self.assertIn(self.hand.idgloss, self.get_entries(
+            reverse('dictionary:public_gloss_list_xml', args=[self.dataset.pk]))[0][1])
+
+    def test_ecv_actions(self):
+        """Tests that the admin actions excluding glosses from the ECV change the stored ECV."""
+        url = reverse('dictionary:public_gloss_list_xml', args=[self.dataset.pk])
+        self.assertEqual([entry[0] for entry in self.get_entries(url)], ['glossid%s' % self.hat.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            include_in_ecv(None, None, Gloss.objects.filter(pk=self.hair.pk))
+        self.assertEqual([entry[0] for entry in self.get_entries(url)],
+                         ['glossid%s' % self.hair.pk, 'glossid%s' % self.hat.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            exclude_from_ecv(None, None, Gloss.objects.filter(pk__in=[self.hat.pk, self.hair.pk]))
+        self.assertEqual(self.get_entries(url), [])
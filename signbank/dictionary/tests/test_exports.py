@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import csv
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth.models import Permission, User
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from guardian.shortcuts import assign_perm
+from notifications.models import Notification
+
+from signbank.dictionary.models import Dataset, ExportJob, Gloss, Language, SignLanguage
+
+
+class ExportJobTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username="test", email=None, password="test")
+        for codename in ('search_gloss', 'export_csv'):
+            self.user.user_permissions.add(Permission.objects.get(codename=codename))
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        language_en = Language.objects.create(name="english", language_code_2char="EN", language_code_3char="eng")
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage)
+        self.dataset.translation_languages.add(language_en)
+        assign_perm('dictionary.view_dataset', self.user, self.dataset)
+        Gloss.objects.create(idgloss="testgloss", dataset=self.dataset, created_by=self.user, updated_by=self.user)
+
+    def request_export(self, **params):
+        params.update({'format': 'CSV-standard', 'background': 'on'})
+        return self.client.get(reverse('dictionary:admin_gloss_list'), params)
+
+    def test_background_export_queues_job(self):
+        """Tests that a background export creates a pending ExportJob and redirects back to the search."""
+        response = self.request_export(search="testgloss", page="2")
+        self.assertEqual(response.status_code, 302)
+        job = ExportJob.objects.get()
+        self.assertEqual(job.status, ExportJob.Status.PENDING)
+        self.assertEqual(job.format, ExportJob.Format.CSV_STANDARD)
+        # Parameters that do not affect the rows are not part of the query.
+        self.assertEqual(job.query, "search=testgloss")
+        self.assertEqual(response.url, reverse('dictionary:admin_gloss_list') + "?search=testgloss")
+
+        # Requesting the same export again does not queue it twice.
+        self.request_export(search="testgloss")
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+    def test_background_export_no_permission(self):
+        """Tests that a user without the export_csv permission can't queue exports."""
+        self.user.user_permissions.remove(Permission.objects.get(codename='export_csv'))
+        response = self.request_export()
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(ExportJob.objects.exists())
+
+    def test_run_export_jobs(self):
+        """Tests that the worker writes the artifact, notifies the user and the file can be downloaded."""
+        self.request_export(dataset=str(self.dataset.pk))
+        call_command('run_export_jobs', once=True, stdout=io.StringIO())
+
+        job = ExportJob.objects.get()
+        self.assertEqual(job.status, ExportJob.Status.FINISHED)
+        self.assertIsNotNone(job.finished_at)
+        notification = Notification.objects.get(recipient=self.user)
+        self.assertEqual(notification.action_object, job)
+
+        response = self.client.get(job.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode('utf-8'))))
+        self.assertEqual(rows[0][:3], ['id', 'dataset', 'variant_number'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], "testdataset")
+
+    def test_finished_artifact_is_reused_until_data_changes(self):
+        """Tests that an identical export reuses the finished file, and that changing a gloss invalidates it."""
+        self.request_export()
+        call_command('run_export_jobs', once=True, stdout=io.StringIO())
+        finished_job = ExportJob.objects.get()
+
+        self.request_export()
+        reused_job = ExportJob.objects.latest('pk')
+        self.assertNotEqual(reused_job.pk, finished_job.pk)
+        self.assertEqual(reused_job.status, ExportJob.Status.FINISHED)
+        self.assertEqual(reused_job.artifact.name, finished_job.artifact.name)
+
+        Gloss.objects.create(idgloss="anothergloss", dataset=self.dataset, created_by=self.user,
+                             updated_by=self.user)
+        self.request_export()
+        self.assertEqual(ExportJob.objects.latest('pk').status, ExportJob.Status.PENDING)
+
+    def test_download_other_users_export(self):
+        """Tests that users can only download their own exports."""
+        self.request_export()
+        call_command('run_export_jobs', once=True, stdout=io.StringIO())
+        job = ExportJob.objects.get()
+
+        other_user = User.objects.create_user(username="other", email=None, password="other")
+        other_user.user_permissions.add(Permission.objects.get(codename='export_csv'))
+        other_client = Client()
+        other_client.force_login(other_user)
+        response = other_client.get(job.get_absolute_url())
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import Permission, User
+from django.contrib.contenttypes.models import ContentType
+from django.test import Client, TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from guardian.shortcuts import assign_perm
+from tagging.models import Tag
+
+from signbank.dictionary.facets import compute_facets
+from signbank.dictionary.models import Dataset, FieldChoice, Gloss, SignLanguage
+
+
+class FacetsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", email=None, password="test")
+        self.user.user_permissions.add(Permission.objects.get(codename='search_gloss'))
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage)
+        assign_perm('dictionary.view_dataset', self.user, self.dataset)
+        self.head = FieldChoice.objects.create(field="location", english_name="head", machine_value=9001)
+        self.chest = FieldChoice.objects.create(field="location", english_name="chest", machine_value=9002)
+        self.noun = FieldChoice.objects.create(field="wordclass", english_name="noun", machine_value=9003)
+        self.verb = FieldChoice.objects.create(field="wordclass", english_name="verb", machine_value=9004)
+
+        for idgloss, location, wordclasses, tags in [("HAT", self.head, [self.noun], ["clothing"]),
+                                                     ("THINK", self.head, [self.verb], []),
+                                                     ("SHIRT", self.chest, [self.noun, self.verb], ["clothing"]),
+                                                     ("WAIT", None, [], ["clothing", "time"])]:
+            gloss = Gloss.objects.create(idgloss=idgloss, dataset=self.dataset, location=location,
+                                         created_by=self.user, updated_by=self.user)
+            gloss.wordclasses.add(*wordclasses)
+            for tag in tags:
+                Tag.objects.add_tag(gloss, tag)
+
+    def facet_counts(self, facets):
+        return {facet['name']: [(row['label'], row['count']) for row in facet['values']] for facet in facets}
+
+    def test_compute_facets_in_one_query(self):
+        """Tests the counts of ForeignKey, ManyToMany and tag facets, computed in one query."""
+        ContentType.objects.get_for_model(Gloss)
+        qs = Gloss.objects.filter(idgloss__in=["HAT", "SHIRT", "WAIT"])
+        with self.assertNumQueries(1):
+            facets = compute_facets(qs, ['location', 'wordclasses', 'tags'])
+        self.assertEqual(self.facet_counts(facets), {
+            'location': [("chest", 1), ("head", 1)],
+            'wordclasses': [("noun", 2), ("verb", 1)],
+            'tags': [("clothing", 3), ("time", 1)],
+        })
+        self.assertEqual(facets[0]['param'], 'location')
+        self.assertEqual(facets[0]['values'][0]['value'], self.chest.machine_value)
+        self.assertEqual(facets[1]['param'], 'word_classes')
+        self.assertEqual(facets[1]['values'][0]['value'], self.noun.pk)
+
+    @override_settings(GLOSS_LIST_FACETS=('location', 'tags'),
+                       CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_facets_view(self):
+        """Tests that the facets of the current search are returned as JSON and cached."""
+        url = reverse('dictionary:admin_gloss_list_facets')
+        response = self.client.get(url, {'location': self.head.machine_value, 'page': 2})
+        self.assertEqual(self.facet_counts(response.json()['facets']),
+                         {'location': [("head", 2)], 'tags': [("clothing", 1)]})
+
+        # The cached counts are used for the same search.
+        Gloss.objects.filter(idgloss="THINK").update(location=self.chest)
+        response = self.client.get(url, {'location': self.head.machine_value})
+        self.assertEqual(self.facet_counts(response.json()['facets'])['location'], [("head", 2)])
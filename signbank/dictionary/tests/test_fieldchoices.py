@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from signbank.dictionary import fieldchoices
+from signbank.dictionary.fieldchoices import get_field_choices, get_fieldchoice
+from signbank.dictionary.forms import GlossSearchForm
+from signbank.dictionary.models import FieldChoice, Gloss
+
+
+class FieldChoiceRegistryTestCase(TestCase):
+    def setUp(self):
+        self.head = FieldChoice.objects.create(field="location", english_name="head", machine_value=9001)
+        self.chest = FieldChoice.objects.create(field="location", english_name="chest", machine_value=9002)
+        self.noun = FieldChoice.objects.create(field="wordclass", english_name="noun", machine_value=9003)
+
+    def test_lookups(self):
+        """Tests that FieldChoices are looked up without queries once the registry is loaded."""
+        get_field_choices()
+        with self.assertNumQueries(0):
+            registry = get_field_choices()
+            self.assertEqual(registry.get(9001), self.head)
+            self.assertEqual(registry.get("9002"), self.chest)
+            self.assertIsNone(registry.get("not a number"))
+            self.assertEqual(registry.get_by_pk(self.noun.pk), self.noun)
+            self.assertEqual(registry.get_by_name("location", "chest"), self.chest)
+            self.assertEqual(registry.get_choices("location"), [self.chest, self.head])
+            self.assertEqual(registry.filter("wordclass", ["9001", "9003"]), [self.noun])
+            self.assertEqual(get_fieldchoice(9003), self.noun)
+            self.assertEqual(Gloss.get_choice_lists()["location"], {9001: "head", 9002: "chest"})
+        with self.assertRaises(FieldChoice.DoesNotExist):
+            get_fieldchoice(1234567)
+
+    def test_save_and_delete_invalidate(self):
+        """Tests that saving and deleting FieldChoices reloads the registry."""
+        get_field_choices()
+        self.head.english_name = "top of head"
+        self.head.save()
+        self.assertEqual(get_field_choices().get_name(9001), "top of head")
+        self.chest.delete()
+        self.assertIsNone(get_field_choices().get(9002))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_shared_generation(self):
+        """Tests that the registry is reloaded when another process changed the generation in the cache."""
+        get_field_choices()
+        with self.assertNumQueries(0):
+            get_field_choices()
+        # Changed by another process, this process did not get the signal.
+        FieldChoice.objects.filter(pk=self.head.pk).update(english_name="top of head")
+        cache.set(fieldchoices.GENERATION_CACHE_KEY, "another generation", None)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_field_choices().get_name(9001), "top of head")
+
+    def test_search_form(self):
+        """Tests that the FieldChoice fields of GlossSearchForm are rendered and cleaned from the registry."""
+        get_field_choices()
+        form = GlossSearchForm({'location': 9001, 'word_classes': [self.noun.pk]})
+        with self.assertNumQueries(0):
+            html = str(form['location'])
+            self.assertEqual(form.fields['location'].clean("9001"), self.head)
+            self.assertEqual(form.fields['word_classes'].clean([str(self.noun.pk)]), [self.noun])
+        self.assertIn('<option value="9001" selected>head</option>', html)
+        self.assertIn('<option value="9002">chest</option>', html)
+        self.assertFalse(GlossSearchForm({'location': 9003}).is_valid())
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import Permission, User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import Count
+from django.http import QueryDict
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils.http import urlencode
+from guardian.shortcuts import assign_perm
+from tagging.models import Tag
+
+from signbank.dictionary.filters import gloss_filters
+from signbank.dictionary.models import (Dataset, Dialect, FieldChoice, Gloss, GlossTranslations, Language,
+                                        MorphologyDefinition, Relation, RelationToForeignSign, SignLanguage)
+from signbank.video.models import GlossVideo
+
+
+class GlossFiltersTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", email=None, password="test")
+        self.user.user_permissions.add(Permission.objects.get(codename='search_gloss'))
+
+        self.signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=self.signlanguage)
+        assign_perm('dictionary.view_dataset', self.user, self.dataset)
+        self.language_en = Language.objects.create(name="English", language_code_2char="EN", language_code_3char="ENG")
+        self.dialect = Dialect.objects.create(language=self.signlanguage, name="north", description="")
+        self.semantic_fields = [FieldChoice.objects.create(field="semantic_field", english_name=name, machine_value=value)
+                                for name, value in [("food", 9001), ("nature", 9002)]]
+        self.wordclass = FieldChoice.objects.create(field="wordclass", english_name="noun", machine_value=9003)
+        self.usage = FieldChoice.objects.create(field="usage", english_name="archaic", machine_value=9004)
+        self.role = FieldChoice.objects.create(field="MorphologyType", english_name="compound", machine_value=9005)
+
+        self.apple = self.create_gloss("APPLE", "apple, apples, red apple", videos=2, notes="A fruit",
+                                       published=True, videoexample1="eat[12]")
+        self.banana = self.create_gloss("BANANA", "banana", videos=1, notes="A yellow fruit", directional=True)
+        self.cherry = self.create_gloss("CHERRY", None, videos=0)
+
+        self.apple.dialect.add(self.dialect)
+        self.apple.semantic_field.add(*self.semantic_fields)
+        self.apple.wordclasses.add(self.wordclass)
+        self.apple.usage.add(self.usage)
+        self.banana.semantic_field.add(self.semantic_fields[0])
+        Tag.objects.add_tag(self.apple, "fruit")
+        Tag.objects.add_tag(self.banana, "fruit")
+        Tag.objects.add_tag(self.banana, "yellow")
+        for target in (self.banana, self.cherry):
+            Relation.objects.create(source=self.apple, target=target, role=self.role)
+            MorphologyDefinition.objects.create(parent_gloss=self.apple, morpheme=target, role=self.role)
+        RelationToForeignSign.objects.create(gloss=self.banana, other_lang="BSL", other_lang_gloss="banana")
+
+    def create_gloss(self, idgloss, translations, videos, **kwargs):
+        gloss = Gloss.objects.create(idgloss=idgloss, dataset=self.dataset, created_by=self.user,
+                                     updated_by=self.user, **kwargs)
+        if translations:
+            GlossTranslations.objects.create(gloss=gloss, language=self.language_en, translations=translations)
+        for i in range(videos):
+            GlossVideo.objects.create(gloss=gloss, dataset=self.dataset, is_public=False,
+                                      videofile=SimpleUploadedFile("%s%s.mp4" % (idgloss, i), b'data \x00\x01'))
+        return gloss
+
+    def filter_glosses(self, params):
+        qs = gloss_filters.apply(Gloss.objects.all(), QueryDict(urlencode(params, doseq=True)))
+        self.assertNotIn("DISTINCT", str(qs.query))
+        return sorted(qs.values_list('idgloss', flat=True))
+
+    def legacy_glosses(self, qs):
+        return sorted(qs.distinct().values_list('idgloss', flat=True))
+
+    def test_filters_match_legacy_queries(self):
+        """Tests each filter against the joins + DISTINCT queries the search used before."""
+        glosses = Gloss.objects.all()
+        sf_ids = [str(field.pk) for field in self.semantic_fields]
+        matrix = [
+            ({'dataset': self.dataset.pk}, glosses.filter(dataset=self.dataset)),
+            ({'search': 'fruit'}, glosses.filter(notes__icontains='fruit')),
+            ({'gloss': 'ban'}, glosses.filter(idgloss__istartswith='ban')),
+            ({'keyword': 'appl', 'trans_lang': self.language_en.pk},
+             glosses.filter(translation__keyword__text__icontains='appl',
+                            translation__language=self.language_en)),
+            ({'keyword': 'appl'}, glosses),
+            ({'published': 'on'}, glosses.filter(published=True)),
+            ({'hasvideo': 'on'}, glosses.filter(glossvideo__isnull=False)),
+            ({'hasnovideo': 'on'}, glosses.filter(glossvideo__isnull=True)),
+            ({'hasvideo': 'on', 'hasnovideo': 'on'}, glosses),
+            ({'multiplevideos': 'on'}, glosses.annotate(videocount=Count('glossvideo')).filter(videocount__gt=1)),
+            ({'dialect': self.dialect.pk}, glosses.filter(dialect=self.dialect)),
+            ({'language': self.signlanguage.pk}, glosses.filter(dataset__signlanguage=self.signlanguage)),
+            ({'notes': 'yellow'}, glosses.filter(notes__icontains='yellow')),
+            ({'semantic_field': sf_ids}, glosses.filter(semantic_field__id__in=sf_ids)),
+            ({'tags': Tag.objects.get(name="yellow").pk}, glosses.filter(idgloss="BANANA")),
+            ({'nottags': ["fruit", "yellow"]}, glosses.exclude(idgloss="BANANA")),
+            ({'tag_query': 'fruit AND NOT yellow'}, glosses.filter(idgloss="APPLE")),
+            ({'relation_to_foreign_signs': 'BSL'}, glosses.filter(relationtoforeignsign__other_lang='BSL')),
+            ({'example_search': '12'}, glosses.filter(videoexample1__icontains='[12]')),
+            ({'directional': 'on'}, glosses.filter(directional=True)),
+            ({'word_classes': self.wordclass.pk}, glosses.filter(wordclasses__id__in=[self.wordclass.pk])),
+            ({'relation': 'an'}, glosses.filter(relation_sources__target__idgloss__icontains='an')),
+            ({'hasRelation': 'all'}, glosses.filter(relation_sources__isnull=False)),
+            ({'hasRelation': self.role.machine_value}, glosses.filter(relation_sources__role=self.role)),
+            ({'morpheme': 'R'}, glosses.filter(parent_glosses__morpheme__idgloss__icontains='R')),
+            ({'hasMorphemeOfType': self.role.machine_value}, glosses.filter(parent_glosses__role=self.role)),
+            ({'usage': self.usage.pk}, glosses.filter(usage__id__in=[self.usage.pk])),
+        ]
+        for params, legacy_qs in matrix:
+            self.assertEqual(self.filter_glosses(params), self.legacy_glosses(legacy_qs), msg=params)
+
+    def test_combined_filters_are_single_query(self):
+        """Tests that combining filters on multi-valued relations gives each gloss once, in one query."""
+        params = {'keyword': 'apple', 'trans_lang': self.language_en.pk, 'hasvideo': 'on',
+                  'semantic_field': [field.pk for field in self.semantic_fields], 'hasRelation': 'all'}
+        with self.assertNumQueries(1):
+            self.assertEqual(self.filter_glosses(params), ["APPLE"])
+
+    def test_gloss_list_view(self):
+        """Tests that the advanced search stores the search query only when a filter is applied."""
+        client = Client()
+        client.force_login(self.user)
+        url = reverse('dictionary:admin_gloss_list')
+        response = client.get(url, {'order': 'idgloss', 'page': 1})
+        self.assertEqual(len(response.context['object_list']), 3)
+        self.assertNotIn('search_query', client.session)
+
+        response = client.get(url, {'semantic_field': [field.pk for field in self.semantic_fields]})
+        self.assertEqual([gloss.idgloss for gloss in response.context['object_list']], ["APPLE", "BANANA"])
+        self.assertIn('search_query', client.session)
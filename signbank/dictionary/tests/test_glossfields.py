@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+import os
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from signbank.dictionary.glossfields import get_glosses_fields
+from signbank.dictionary.models import (Dataset, FieldChoice, Gloss, GlossTranslations, Language, Lemma,
+                                        SignLanguage)
+from signbank.dictionary.tools import get_gloss_data
+from signbank.video.models import GlossVideo
+
+#: The expected fields of the glosses by idgloss, {pk} and {video} stand for the id and the video of the gloss.
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), 'golden', 'gloss_fields.json')
+
+FIELDNAMES = [
+    "idgloss", "Gloss", "Gloss: English", "Translations English", "Handedness", "Strong Hand", "Weak Hand",
+    "Location", "Semantic Field", "Word Classes", "Wordclasses", "Named Entity", "Created By", "Notes", "Concise",
+    "Lemma", "Dialect", "Signer", "Link", "Video",
+]
+
+
+class GlossFieldsTestCase(TestCase):
+    def setUp(self):
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage)
+        language = Language.objects.create(name="English", language_code_2char="en", language_code_3char="eng")
+        self.dataset.translation_languages.add(language)
+        user = User.objects.create_user(username="test", email=None, password="test", first_name="Tess")
+
+        choices = {}
+        for machine_value, (field, english_name) in enumerate([
+                ("handedness", "Double"), ("handshape", "Fist"), ("named_entity", "Place"),
+                ("wordclass", "Verb"), ("wordclass", "Noun")], start=90001):
+            choices[english_name] = FieldChoice.objects.create(field=field, english_name=english_name,
+                                                               machine_value=machine_value)
+        self.hat = Gloss.objects.create(
+            idgloss="HAT", dataset=self.dataset, created_by=user, notes="Worn on the head", concise=True,
+            handedness=choices["Double"], strong_handshape=choices["Fist"], named_entity=choices["Place"],
+            lemma=Lemma.objects.create(name="hat"))
+        self.hat.wordclasses.add(choices["Verb"], choices["Noun"])
+        GlossTranslations.objects.create(gloss=self.hat, language=language, translations="cap, beanie")
+        self.video = GlossVideo.objects.create(gloss=self.hat, videofile=SimpleUploadedFile("hat.mp4", b"hat"))
+        self.hand = Gloss.objects.create(idgloss="HAND", dataset=self.dataset)
+
+    def tearDown(self):
+        self.video.videofile.delete(save=False)
+
+    def get_golden_fields(self):
+        with open(GOLDEN_FILE) as golden_file:
+            golden = json.load(golden_file)
+        replacements = {gloss.idgloss: {'{pk}': str(gloss.pk), '{video}': self.video.videofile.name}
+                        for gloss in (self.hat, self.hand)}
+        for idgloss, fields in golden.items():
+            for name, value in fields.items():
+                for placeholder, replacement in replacements[idgloss].items():
+                    value = value.replace(placeholder, replacement)
+                fields[name] = value
+        return golden
+
+    def test_golden(self):
+        """Tests that the fields of the glosses are the ones in the golden file, and the ones of get_fields_dict()."""
+        glosses = Gloss.objects.filter(dataset=self.dataset)
+        golden = self.get_golden_fields()
+        self.assertEqual({gloss.idgloss: gloss.get_fields_dict(FIELDNAMES) for gloss in glosses}, golden)
+        fields = get_glosses_fields(glosses, FIELDNAMES)
+        self.assertEqual({gloss.idgloss: fields[gloss.pk] for gloss in glosses}, golden)
+
+    def test_gloss_data(self):
+        """Tests that the package gloss data is the same as get_fields_dict() with the api fields."""
+        api_fields = ["Translations English", "Handedness", "Strong Hand", "Weak Hand", "Location",
+                      "Semantic Field", "Word Classes", "Named Entity", "Link", "Video"]
+        self.assertEqual(get_gloss_data(dataset=self.dataset), {
+            str(gloss.pk): gloss.get_fields_dict(api_fields) for gloss in Gloss.objects.filter(dataset=self.dataset)})
+
+    def test_queries(self):
+        """Tests that the number of queries does not grow with the number of glosses."""
+        with self.assertNumQueries(8):
+            get_glosses_fields(Gloss.objects.filter(dataset=self.dataset), FIELDNAMES)
+        for number in range(5):
+            Gloss.objects.create(idgloss="HAT%s" % number, dataset=self.dataset, handedness=self.hat.handedness)
+        with self.assertNumQueries(8):
+            self.assertEqual(len(get_glosses_fields(Gloss.objects.filter(dataset=self.dataset), FIELDNAMES)), 7)
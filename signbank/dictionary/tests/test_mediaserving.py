@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from signbank.dictionary.mediaserving import parse_range
+
+CONTENT = b"0123456789abcdefghij"
+
+
+class ProtectedMediaTestCase(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.folder, "glossvideo"))
+        self.path = os.path.join(self.folder, "glossvideo", "HAT-1.mp4")
+        with open(self.path, 'wb') as video_file:
+            video_file.write(CONTENT)
+        self.url = reverse('dictionary:protected_media', kwargs={'filename': "glossvideo/HAT-1.mp4"})
+        self.client = Client()
+        self.client.force_login(User.objects.create_user(username="test", email=None, password="test"))
+        self.settings_override = override_settings(WRITABLE_FOLDER=self.folder, MEDIA_SENDFILE='')
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.folder)
+
+    def test_whole_file(self):
+        """Tests that the whole file is sent with its validators, and that it is not sent again if unchanged."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Disposition'], 'inline; filename="HAT-1.mp4"')
+
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_range(self):
+        """Tests that a single range is sent as 206 Partial Content."""
+        for header, content, content_range in [("bytes=2-5", b"2345", "bytes 2-5/20"),
+                                               ("bytes=16-", b"ghij", "bytes 16-19/20"),
+                                               ("bytes=-3", b"hij", "bytes 17-19/20"),
+                                               ("bytes=18-100", b"ij", "bytes 18-19/20")]:
+            response = self.client.get(self.url, HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(b''.join(response.streaming_content), content)
+            self.assertEqual(response['Content-Range'], content_range)
+            self.assertEqual(response['Content-Length'], str(len(content)))
+
+    def test_multiple_ranges(self):
+        """Tests that several ranges are sent as a multipart/byteranges body."""
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-1, 10-12")
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges; boundary='))
+        boundary = response['Content-Type'].split('=')[1]
+        body = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Length'], str(len(body)))
+        self.assertEqual(body, (
+            "\r\n--{boundary}\r\nContent-Type: video/mp4\r\nContent-Range: bytes 0-1/20\r\n\r\n01"
+            "\r\n--{boundary}\r\nContent-Type: video/mp4\r\nContent-Range: bytes 10-12/20\r\n\r\nabc"
+            "\r\n--{boundary}--\r\n").format(boundary=boundary).encode('ascii'))
+
+    def test_unsatisfiable_range(self):
+        """Tests that a range after the end of the file gets 416 Range Not Satisfiable."""
+        response = self.client.get(self.url, HTTP_RANGE="bytes=20-30")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */20')
+
+    def test_if_range(self):
+        """Tests that the whole file is sent if it changed since the ETag of If-Range."""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"changed"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+    def test_sendfile(self):
+        """Tests that the web server is told to send the file with X-Sendfile or X-Accel-Redirect."""
+        with self.settings(MEDIA_SENDFILE='x-sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], self.path)
+        self.assertEqual(response.content, b'')
+        with self.settings(MEDIA_SENDFILE='x-accel-redirect', MEDIA_ACCEL_REDIRECT_PREFIX='/internal/'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/internal/glossvideo/HAT-1.mp4')
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+
+    def test_outside_folder(self):
+        """Tests that files outside of the WRITABLE_FOLDER are not found."""
+        url = reverse('dictionary:protected_media', kwargs={'filename': "../etc/passwd"})
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class ParseRangeTestCase(SimpleTestCase):
+    def test_parse_range(self):
+        self.assertIsNone(parse_range(None, 20))
+        self.assertIsNone(parse_range("items=0-1", 20))
+        self.assertIsNone(parse_range("bytes=5-2", 20))
+        self.assertIsNone(parse_range("bytes=a-b", 20))
+        self.assertIsNone(parse_range("bytes=" + ",".join(["0-1"] * 17), 20))
+        self.assertEqual(parse_range("bytes=0-0,-2", 20), [(0, 0), (18, 19)])
+        self.assertEqual(parse_range("bytes=-50", 20), [(0, 19)])
+        self.assertEqual(parse_range("bytes=30-", 20), [])
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+import json
+from io import BytesIO
+from zipfile import ZipFile
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from signbank.dictionary.models import Dataset, Gloss, GlossTranslations, Language, PackageArtifact, SignLanguage
+from signbank.dictionary.packages import delete_old_packages
+from signbank.video.models import GlossVideo
+
+
+@override_settings(DEFAULT_DATASET_ACRONYM="testdataset")
+class PackageTestCase(TestCase):
+    def setUp(self):
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage)
+        self.hat = Gloss.objects.create(idgloss="HAT", dataset=self.dataset)
+        self.hand = Gloss.objects.create(idgloss="HAND", dataset=self.dataset)
+        self.video = GlossVideo.objects.create(gloss=self.hat, videofile=SimpleUploadedFile("hat.mp4", b"hat"))
+        self.client = Client()
+        self.client.force_login(User.objects.create_user(username="test", email=None, password="test"))
+
+    def tearDown(self):
+        for artifact in PackageArtifact.objects.all():
+            artifact.artifact.delete(save=False)
+        self.video.videofile.delete(save=False)
+
+    def get_package(self, **data):
+        response = self.client.get(reverse('dictionary:package'), data)
+        self.assertEqual(response.status_code, 200)
+        with ZipFile(BytesIO(b''.join(response.streaming_content))) as package:
+            return response, {name: json.loads(package.read(name)) for name in package.namelist()}
+
+    def test_full_package(self):
+        """Tests that the full package has all glosses and videos, and is kept until the dataset changes."""
+        response, package = self.get_package()
+        self.assertIn('signbank_package.', response['Content-Disposition'])
+        self.assertEqual(sorted(package), ['glosses.json', 'image_urls.json', 'video_urls.json'])
+        self.assertEqual(sorted(package['glosses.json']), sorted([str(self.hat.pk), str(self.hand.pk)]))
+        self.assertEqual(list(package['video_urls.json'].values()),
+                         [reverse('dictionary:protected_media', kwargs={'filename': self.video.videofile.name})])
+        self.assertEqual(package['image_urls.json'], {})
+        artifact = PackageArtifact.objects.get()
+
+        with self.assertNumQueries(5):
+            # The session, the user, the dataset, the change counter and the artifact.
+            not_modified = self.client.get(reverse('dictionary:package'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            palm = Gloss.objects.create(idgloss="PALM", dataset=self.dataset)
+        response, package = self.get_package()
+        self.assertIn(str(palm.pk), package['glosses.json'])
+        new_artifact = PackageArtifact.objects.latest('pk')
+        self.assertNotEqual(new_artifact.content_hash, artifact.content_hash)
+        # The old package may still be streamed, it is deleted by the build_packages command.
+        self.assertTrue(artifact.artifact.storage.exists(artifact.artifact.name))
+        delete_old_packages(self.dataset)
+        self.assertEqual(PackageArtifact.objects.get(), new_artifact)
+        self.assertFalse(artifact.artifact.storage.exists(artifact.artifact.name))
+
+    def test_patch(self):
+        """Tests that a package since a time only has the glosses and videos updated after it, and is not stored."""
+        long_ago = timezone.now() - datetime.timedelta(days=2)
+        Gloss.objects.filter(pk=self.hat.pk).update(updated_at=long_ago)
+        GlossVideo.objects.filter(pk=self.video.pk).update(updated_at=long_ago)
+        since = int((timezone.now() - datetime.timedelta(days=1)).timestamp())
+        response, package = self.get_package(since_timestamp=since)
+        self.assertIn('signbank_patch.%s-' % since, response['Content-Disposition'])
+        self.assertEqual(list(package['glosses.json']), [str(self.hand.pk)])
+        self.assertEqual(package['video_urls.json'], {})
+        self.assertFalse(PackageArtifact.objects.exists())
+        not_modified = self.client.get(reverse('dictionary:package'), {'since_timestamp': since},
+                                       HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.video.save()
+        response, package = self.get_package(since_timestamp=since)
+        self.assertEqual(len(package['video_urls.json']), 1)
+
+        # A change of the translations of a gloss is a change of the gloss.
+        language = Language.objects.create(name="English", language_code_2char="en", language_code_3char="eng")
+        GlossTranslations.objects.create(gloss=self.hat, language=language, translations="hat")
+        response, package = self.get_package(since_timestamp=since)
+        self.assertEqual(sorted(package['glosses.json']), sorted([str(self.hat.pk), str(self.hand.pk)]))
+
+    def test_invalid_since(self):
+        """Tests that a since_timestamp that is not a timestamp is a bad request."""
+        for since in ["yesterday", "1e9", "99999999999999999999"]:
+            response = self.client.get(reverse('dictionary:package'), {'since_timestamp': since})
+            self.assertEqual(response.status_code, 400)
+
+    def test_same_content(self):
+        """Tests that packages with the same content share their file."""
+        self.get_package()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dataset.save()
+        self.get_package()
+        first, second = PackageArtifact.objects.order_by('pk')
+        self.assertNotEqual(first.version, second.version)
+        self.assertEqual(first.artifact.name, second.artifact.name)
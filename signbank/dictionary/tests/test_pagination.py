@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import Permission, User
+from django.test import Client, TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from guardian.shortcuts import assign_perm
+
+from signbank.dictionary.models import Dataset, Gloss, GlossRelation, SignLanguage
+from signbank.dictionary.pagination import get_paginate_by
+
+
+class KeysetPaginationTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", email=None, password="test")
+        self.user.user_permissions.add(Permission.objects.get(codename='search_gloss'))
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage)
+        assign_perm('dictionary.view_dataset', self.user, self.dataset)
+        self.glosses = []
+        for i in range(7):
+            # Duplicate and missing values in idgloss_mi, to test the tie-breaker and NULL handling.
+            self.glosses.append(Gloss.objects.create(
+                idgloss="gloss%s" % i, idgloss_mi="mi%s" % (i // 2) if i % 3 else None, dataset=self.dataset,
+                created_by=self.user, updated_by=self.user))
+        for source, target in zip(self.glosses, reversed(self.glosses)):
+            GlossRelation.objects.create(source=source, target=target)
+
+    def walk_pages(self, url, params):
+        """Follows the next page cursors from the first page, returns the objects of all pages."""
+        params = dict(params, cursor='')
+        objects = []
+        while True:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            page = response.context['page_obj']
+            self.assertLessEqual(len(page.object_list), params['paginate_by'])
+            objects.extend(page.object_list)
+            if not page.has_next():
+                return objects
+            params['cursor'] = page.next_cursor
+
+    def test_get_paginate_by(self):
+        """Tests that the page size is limited."""
+        self.assertEqual(get_paginate_by("50", 100), 50)
+        self.assertEqual(get_paginate_by("1000000", 100), 3000)
+        self.assertEqual(get_paginate_by("0", 100), 1)
+        self.assertEqual(get_paginate_by("all", 100), 100)
+        self.assertEqual(get_paginate_by(None, 100), 100)
+
+    def test_keyset_pages_match_ordering(self):
+        """Tests that walking the cursor pages returns every gloss once, in the order of the list."""
+        url = reverse('dictionary:admin_gloss_list')
+        for order in ['idgloss', '-idgloss', 'idgloss_mi', '-idgloss_mi']:
+            expected = list(Gloss.objects.order_by(order, 'pk'))
+            self.assertEqual(self.walk_pages(url, {'order': order, 'paginate_by': 2}), expected, msg=order)
+
+    def test_relation_list_keyset_pages(self):
+        """Tests that ordering by a relation uses the ordering of the related model."""
+        url = reverse('dictionary:search_glossrelation')
+        objects = self.walk_pages(url, {'order': '-source', 'paginate_by': 3})
+        self.assertEqual(objects, list(GlossRelation.objects.order_by('-source__idgloss')))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('dictionary:admin_gloss_list'), {'cursor': 'not a cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(PAGINATOR_EXACT_COUNT_LIMIT=1)
+    def test_estimated_count_uses_keyset_pagination(self):
+        """Tests that large unfiltered lists are estimated and use cursors, filtered lists are counted."""
+        url = reverse('dictionary:admin_gloss_list')
+        response = self.client.get(url, {'paginate_by': 2})
+        self.assertTrue(response.context['paginator'].count_is_estimated)
+        self.assertTrue(response.context['page_obj'].is_keyset)
+        self.assertContains(response, "?cursor=%s" % response.context['page_obj'].next_cursor)
+
+        response = self.client.get(url, {'paginate_by': 2, 'gloss': 'gloss'})
+        self.assertFalse(response.context['paginator'].count_is_estimated)
+        self.assertEqual(response.context['paginator'].count, 7)
+        self.assertEqual(response.context['page_obj'].number, 1)
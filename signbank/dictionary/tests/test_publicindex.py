@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import connection
+from django.db.models.functions import Substr, Upper
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from signbank.dictionary.models import Dataset, Gloss, SignLanguage
+from signbank.dictionary.publicindex import get_first_letters, get_public_datasets, get_public_signlanguages
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PublicIndexTestCase(TestCase):
+    def setUp(self):
+        self.signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=self.signlanguage, is_public=True)
+        self.other_dataset = Dataset.objects.create(name="otherdataset", signlanguage=self.signlanguage,
+                                                    is_public=True)
+        self.private_dataset = Dataset.objects.create(name="privatedataset", signlanguage=self.signlanguage)
+        self.hat = Gloss.objects.create(idgloss="hat", dataset=self.dataset, published=True)
+        Gloss.objects.create(idgloss="HAND", dataset=self.other_dataset, published=True)
+        Gloss.objects.create(idgloss="BALL", dataset=self.dataset, published=False)
+        Gloss.objects.create(idgloss="CAT", dataset=self.private_dataset, published=True)
+
+    def test_index(self):
+        """Tests the first letters of published glosses of public datasets, and that they are cached."""
+        self.assertEqual(get_first_letters(), [("H", 2)])
+        self.assertEqual(get_public_signlanguages(), [self.signlanguage])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_first_letters(), [("H", 2)])
+            self.assertEqual(get_first_letters([self.other_dataset.pk]), [("H", 1)])
+            self.assertEqual([dataset.pk for dataset in get_public_datasets()],
+                             [self.dataset.pk, self.other_dataset.pk])
+
+    def test_gloss_changes(self):
+        """Tests that publishing, renaming and deleting glosses rebuild the letters of their dataset."""
+        get_first_letters()
+        ball = Gloss.objects.get(idgloss="BALL")
+        ball.published = True
+        ball.save()
+        self.assertEqual(get_first_letters(), [("B", 1), ("H", 2)])
+        self.hat.idgloss = "cap"
+        self.hat.save()
+        self.assertEqual(get_first_letters(), [("B", 1), ("C", 1), ("H", 1)])
+        ball.delete()
+        self.assertEqual(get_first_letters(), [("C", 1), ("H", 1)])
+
+    def test_unchanged_letter(self):
+        """Tests that saving a gloss without changing its public first letter keeps the cached letters."""
+        get_first_letters()
+        self.hat.idgloss = "hats"
+        self.hat.save()
+        with self.assertNumQueries(0):
+            get_first_letters()
+
+    def test_save_queries(self):
+        """Tests that saving a gloss does not query its old first letter."""
+        hat = Gloss.objects.get(pk=self.hat.pk)
+        hat.idgloss = "hats"
+        with CaptureQueriesContext(connection) as queries:
+            hat.save()
+        self.assertFalse([query for query in queries.captured_queries
+                          if query['sql'].startswith('SELECT') and 'FROM "dictionary_gloss"' in query['sql']])
+
+    def test_deferred_fields(self):
+        """Tests that saving a gloss loaded without the fields of its first letter rebuilds the letters."""
+        get_first_letters()
+        hat = Gloss.objects.only('pk').get(pk=self.hat.pk)
+        hat.idgloss = "cap"
+        hat.save()
+        self.assertEqual(get_first_letters(), [("C", 1), ("H", 1)])
+
+    def test_collation(self):
+        """Tests that the letters are ordered like the glosses in the database, not by codepoint."""
+        for idgloss in ("zoo", "āhua", "Ōrite", "apple", "Éclair", "Bear"):
+            Gloss.objects.create(idgloss=idgloss, dataset=self.other_dataset, published=True)
+        ordered = Gloss.objects.filter(published=True, dataset__is_public=True)\
+            .annotate(first_letter=Substr(Upper('idgloss'), 1, 1))\
+            .order_by('first_letter').values_list('first_letter', flat=True).distinct()
+        self.assertEqual([letter for letter, count in get_first_letters()], list(ordered))
+        self.assertEqual([letter for letter, count in get_first_letters([self.other_dataset.pk])], list(ordered))
+
+    def test_dataset_changes(self):
+        """Tests that making a dataset public adds its letters and lexicon."""
+        get_first_letters()
+        self.private_dataset.is_public = True
+        self.private_dataset.save()
+        self.assertEqual(get_first_letters(), [("C", 1), ("H", 2)])
+        self.assertIn(self.private_dataset, get_public_datasets())
+
+    def test_public_gloss_list(self):
+        response = Client().get(reverse('dictionary:public_gloss_list'))
+        self.assertEqual(response.context['first_letters'], [("H", 2)])
+        self.assertContains(response, 'title="2">H</a>')
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from signbank.dictionary.models import (Dataset, Gloss, Keyword, Language, PublicSearchEntry, SignLanguage,
+                                        Translation)
+from signbank.dictionary.publicsearch import search_public_glosses
+from signbank.video.models import GlossVideo
+
+
+class PublicSearchTestCase(TestCase):
+    def setUp(self):
+        self.signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.other_signlanguage = SignLanguage.objects.create(pk=3, name="othersignlanguage",
+                                                              language_code_3char="oth")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=self.signlanguage, is_public=True)
+        self.other_dataset = Dataset.objects.create(name="otherdataset", signlanguage=self.other_signlanguage,
+                                                    is_public=True)
+        self.private_dataset = Dataset.objects.create(name="privatedataset", signlanguage=self.signlanguage)
+        self.language = Language.objects.create(name="English", language_code_2char="en", language_code_3char="eng")
+
+        self.hat = Gloss.objects.create(idgloss="HAT", dataset=self.dataset, published=True)
+        self.hand = Gloss.objects.create(idgloss="HAND", dataset=self.other_dataset, published=True)
+        self.unpublished = Gloss.objects.create(idgloss="HAIR", dataset=self.dataset, published=False)
+        self.private = Gloss.objects.create(idgloss="HAY", dataset=self.private_dataset, published=True)
+        for order, (gloss, text) in enumerate([(self.hat, "cap"), (self.hat, "headwear"), (self.hand, "palm"),
+                                               (self.private, "straw")]):
+            Translation.objects.create(gloss=gloss, language=self.language, order=order,
+                                       keyword=Keyword.objects.get_or_create(text=text)[0])
+
+    def search(self, **kwargs):
+        return list(search_public_glosses(Gloss.objects.order_by('idgloss'), **kwargs))
+
+    def test_entries(self):
+        """Tests that only published glosses of public datasets have entries, for the idgloss and the keywords."""
+        entries = PublicSearchEntry.objects.order_by('gloss__idgloss', 'kind', 'term').values_list(
+            'gloss__idgloss', 'kind', 'term', 'signlanguage')
+        self.assertEqual(list(entries), [
+            ("HAND", "gloss", "hand", self.other_signlanguage.pk),
+            ("HAND", "keyword", "palm", self.other_signlanguage.pk),
+            ("HAT", "gloss", "hat", self.signlanguage.pk),
+            ("HAT", "keyword", "cap", self.signlanguage.pk),
+            ("HAT", "keyword", "headwear", self.signlanguage.pk),
+        ])
+
+    def test_search(self):
+        """Tests the prefix searches of idglosses and keywords."""
+        self.assertEqual(self.search(), [self.hand, self.hat])
+        self.assertEqual(self.search(gloss="ha"), [self.hand, self.hat])
+        self.assertEqual(self.search(gloss="hat"), [self.hat])
+        self.assertEqual(self.search(keyword="Head"), [self.hat])
+        self.assertEqual(self.search(gloss="hand", keyword="cap"), [])
+        self.assertEqual(self.search(signlanguage_ids=[self.other_signlanguage.pk]), [self.hand])
+        self.assertEqual(self.search(dataset_ids=[str(self.dataset.pk)]), [self.hat])
+
+    def test_changes(self):
+        """Tests that the entries follow publishing, renaming, datasets and keywords."""
+        self.unpublished.published = True
+        self.unpublished.save()
+        self.assertEqual(self.search(gloss="hai"), [self.unpublished])
+        self.hat.idgloss = "CAP"
+        self.hat.save()
+        self.assertEqual(self.search(gloss="ha"), [self.unpublished, self.hand])
+        keyword = Keyword.objects.get(text="palm")
+        keyword.text = "flat hand"
+        keyword.save()
+        self.assertEqual(self.search(keyword="flat"), [self.hand])
+        self.private_dataset.is_public = True
+        self.private_dataset.save()
+        self.assertEqual(self.search(keyword="straw"), [self.private])
+        self.hand.delete()
+        self.assertFalse(PublicSearchEntry.objects.filter(term="flat hand").exists())
+
+    def test_videos(self):
+        """Tests that the entries have the first public video of their gloss and the number of them."""
+        private_video = GlossVideo.objects.create(
+            gloss=self.hat, is_public=False, videofile=SimpleUploadedFile("private.mp4", b"private"))
+        video = GlossVideo.objects.create(
+            gloss=self.hat, is_public=True, videofile=SimpleUploadedFile("public.mp4", b"public"))
+        entry = PublicSearchEntry.objects.get(gloss=self.hat, kind=PublicSearchEntry.GLOSS)
+        self.assertEqual((entry.video, entry.video_count), (video, 1))
+        private_video.is_public = True
+        private_video.save()
+        entry = PublicSearchEntry.objects.get(gloss=self.hat, kind=PublicSearchEntry.GLOSS)
+        self.assertEqual((entry.video, entry.video_count), (private_video, 2))
+        for glossvideo in (private_video, video):
+            glossvideo.videofile.delete(save=False)
+
+    def test_rebuild_command(self):
+        PublicSearchEntry.objects.all().delete()
+        call_command('rebuild_public_search_entries', stdout=StringIO())
+        self.assertEqual(PublicSearchEntry.objects.count(), 5)
+
+    def test_public_gloss_list(self):
+        response = Client().get(reverse('dictionary:public_gloss_list'), {'keyword': 'CA', 'lang': 'tst'})
+        self.assertEqual(list(response.context['object_list']), [self.hat])
+        self.assertEqual(response.context['object_list'][0].public_video_count, 0)
+        self.assertContains(response, "No video.")
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import Permission, User
+from django.test import Client, TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from guardian.shortcuts import assign_perm
+
+from signbank.dictionary.models import Dataset, Gloss, Lemma, SignLanguage
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ReferenceDataTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", email=None, password="test", is_staff=True,
+                                             first_name="Test", last_name="User")
+        self.user.user_permissions.add(Permission.objects.get(codename='search_gloss'))
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage)
+        self.other_dataset = Dataset.objects.create(name="otherdataset", signlanguage=signlanguage)
+        assign_perm('view_dataset', self.user, self.dataset)
+        self.hat = Gloss.objects.create(idgloss="HAT", dataset=self.dataset)
+        self.cap = Gloss.objects.create(idgloss="CAP", dataset=self.dataset)
+        Gloss.objects.create(idgloss="OTHER", dataset=self.other_dataset)
+        Lemma.objects.create(name="headwear")
+
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def get_url(self, name, dataset=None):
+        return reverse('dictionary:reference_data', args=[(dataset or self.dataset).pk, name])
+
+    def test_glosses(self):
+        """Tests that the glosses of the dataset are returned as [id, idgloss] pairs with a strong ETag."""
+        response = self.client.get(self.get_url('glosses'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [[self.cap.pk, "CAP"], [self.hat.pk, "HAT"]])
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_not_modified(self):
+        """Tests that an up to date copy is revalidated with a 304, and that changing a gloss changes the ETag."""
+        etag = self.client.get(self.get_url('glosses'))['ETag']
+        response = self.client.get(self.get_url('glosses'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        self.hat.idgloss = "HAT-2"
+        self.hat.save()
+        response = self.client.get(self.get_url('glosses'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn([self.hat.pk, "HAT-2"], response.json())
+
+    def test_editor_data(self):
+        """Tests the lemmas and the users, which need the change_gloss permission."""
+        self.assertEqual(self.client.get(self.get_url('lemmas')).status_code, 403)
+        self.user.user_permissions.add(Permission.objects.get(codename='change_gloss'))
+        self.assertEqual(self.client.get(self.get_url('lemmas')).json(), ["headwear"])
+        self.assertIn([self.user.pk, "Test User"], self.client.get(self.get_url('assignable-users')).json())
+        self.assertEqual(self.client.get(self.get_url('dataset-users')).json(), ["test"])
+
+    def test_permissions(self):
+        """Tests that the reference data of datasets the user can not view is not returned."""
+        self.assertEqual(self.client.get(self.get_url('glosses', self.other_dataset)).status_code, 403)
+        self.assertEqual(self.client.get(self.get_url('unknown')).status_code, 404)
+
+    def test_gloss_detail(self):
+        """Tests that the gloss detail page does not contain the reference data."""
+        self.user.user_permissions.add(Permission.objects.get(codename='change_gloss'))
+        response = self.client.get(reverse('dictionary:admin_gloss_view', kwargs={'pk': self.hat.pk}))
+        self.assertEqual(response.status_code, 200)
+        for name in ('dataset_glosses', 'lemmas', 'assignable_users', 'dataset_users'):
+            self.assertNotIn(name, response.context)
+        self.assertContains(response, self.get_url('NAME'))
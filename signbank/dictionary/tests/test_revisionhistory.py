@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import io
+from unittest import mock
+
+import reversion
+from django.contrib.auth.models import Permission, User
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from guardian.shortcuts import assign_perm
+
+from signbank.dictionary.adminviews import GlossDetailView
+from signbank.dictionary.models import (Dataset, FieldChoice, Gloss, GlossRevisionChange, GlossTranslations,
+                                        Language, SignLanguage)
+
+
+class GlossRevisionHistoryTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", email=None, password="test", is_staff=True)
+        self.user.user_permissions.add(Permission.objects.get(codename='search_gloss'))
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage)
+        assign_perm('dictionary.view_dataset', self.user, self.dataset)
+        language_en = Language.objects.create(name="English", language_code_2char="EN", language_code_3char="ENG")
+        self.head = FieldChoice.objects.create(field="location", english_name="head", machine_value=9001)
+        self.noun = FieldChoice.objects.create(field="wordclass", english_name="noun", machine_value=9002)
+
+        with reversion.create_revision():
+            reversion.set_user(self.user)
+            self.gloss = Gloss.objects.create(idgloss="HAT", dataset=self.dataset, created_by=self.user,
+                                              updated_by=self.user)
+            self.glosstranslations = GlossTranslations.objects.create(gloss=self.gloss, language=language_en,
+                                                                      translations="hat")
+        with reversion.create_revision():
+            reversion.set_user(self.user)
+            self.gloss.notes = "A head covering"
+            self.gloss.location = self.head
+            self.gloss.save()
+            self.gloss.wordclasses.add(self.noun)
+            self.glosstranslations.translations = "hat, cap"
+            self.glosstranslations.save()
+
+    def get_changes(self):
+        return list(GlossRevisionChange.objects.filter(gloss=self.gloss).values_list(
+            'user__username', 'field', 'old_value', 'new_value'))
+
+    def test_changes_are_recorded_with_revisions(self):
+        """Tests that saving a revision stores the changed fields of the gloss."""
+        changes = self.get_changes()
+        self.assertIn(("test", "location", "-", "head"), changes)
+        self.assertIn(("test", "notes", "-", "A head covering"), changes)
+        self.assertIn(("test", "wordclasses", "-", "noun"), changes)
+        self.assertIn(("test", "translations", "hat", "hat, cap"), changes)
+        self.assertNotIn("updated_at", [field for user, field, old, new in changes])
+
+    def test_rebuild_gloss_revision_changes(self):
+        """Tests that the management command rebuilds the same changes from the versions."""
+        changes = self.get_changes()
+        GlossRevisionChange.objects.all().delete()
+        call_command('rebuild_gloss_revision_changes', stdout=io.StringIO())
+        self.assertEqual(self.get_changes(), changes)
+
+    def test_gloss_detail_history_is_paginated(self):
+        """Tests that the revision history tab reads a page of the stored changes."""
+        client = Client()
+        client.force_login(self.user)
+        url = reverse('dictionary:admin_gloss_view', kwargs={'pk': self.gloss.pk})
+        response = client.get(url)
+        self.assertEqual(len(response.context['revisions']), len(self.get_changes()))
+        self.assertContains(response, "A head covering")
+
+        with mock.patch.object(GlossDetailView, 'revisions_paginate_by', 2):
+            response = client.get(url, {'revisions_page': 2})
+        self.assertEqual(response.context['revisions'].number, 2)
+        self.assertEqual(len(response.context['revisions']), 2)
+        self.assertContains(response, "?revisions_page=1#gloss_revision_history_tab")
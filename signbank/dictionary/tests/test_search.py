@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import io
+
+from django.contrib.auth.models import Permission, User
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from guardian.shortcuts import assign_perm
+
+from signbank.dictionary.models import Dataset, Gloss, GlossSearchDocument, GlossTranslations, Language, SignLanguage
+from signbank.dictionary.search import search_glosses
+
+
+class GlossSearchTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", email=None, password="test")
+        self.user.user_permissions.add(Permission.objects.get(codename='search_gloss'))
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage)
+        assign_perm('dictionary.view_dataset', self.user, self.dataset)
+        self.language_en = Language.objects.create(name="English", language_code_2char="EN", language_code_3char="ENG")
+
+        self.house = self.create_gloss("HOUSE", idgloss_mi="whare", translations="house, home")
+        self.tent = self.create_gloss("TENT", notes="A small House for camping")
+        self.car = self.create_gloss("CAR", translations="vehicle")
+
+    def create_gloss(self, idgloss, translations=None, **kwargs):
+        gloss = Gloss.objects.create(idgloss=idgloss, dataset=self.dataset, created_by=self.user,
+                                     updated_by=self.user, **kwargs)
+        if translations:
+            GlossTranslations.objects.create(gloss=gloss, language=self.language_en, translations=translations)
+        return gloss
+
+    def search(self, text):
+        return sorted(search_glosses(Gloss.objects.all(), text).values_list('idgloss', flat=True))
+
+    def test_search_documents_are_maintained(self):
+        """Tests that saving glosses and translations updates the search documents."""
+        document = GlossSearchDocument.objects.get(gloss=self.house)
+        self.assertEqual(document.names, "house whare")
+        self.assertEqual(document.keywords, "home house")
+
+        glosstranslations = GlossTranslations.objects.get(gloss=self.car)
+        glosstranslations.translations = "Automobile"
+        glosstranslations.save()
+        self.car.notes = "Has four wheels"
+        self.car.save()
+        document = GlossSearchDocument.objects.get(gloss=self.car)
+        self.assertEqual(document.keywords, "automobile")
+        self.assertEqual(document.notes, "has four wheels")
+
+    def test_search_matches_substring_search(self):
+        """Tests that the postgres and substring backends find the same glosses."""
+        for text in ["house", "HOU", "whare", "vehic", "camping", "nothing"]:
+            postgres_results = self.search(text)
+            with override_settings(GLOSS_SEARCH_BACKEND='substring'):
+                self.assertEqual(postgres_results, sorted(set(self.search(text))), msg=text)
+        self.assertEqual(self.search("house"), ["HOUSE", "TENT"])
+
+    def test_search_ranking(self):
+        """Tests that the advanced search orders results by relevance when no order is given."""
+        url = reverse('dictionary:admin_gloss_list')
+        response = self.client.get(url, {'search': 'house'})
+        self.assertEqual([gloss.idgloss for gloss in response.context['object_list']], ["HOUSE", "TENT"])
+        response = self.client.get(url, {'search': 'house', 'order': '-idgloss'})
+        self.assertEqual([gloss.idgloss for gloss in response.context['object_list']], ["TENT", "HOUSE"])
+
+    def test_rebuild_search_documents(self):
+        """Tests that the management command rebuilds missing search documents."""
+        GlossSearchDocument.objects.all().delete()
+        self.assertEqual(self.search("house"), [])
+        call_command('rebuild_search_documents', stdout=io.StringIO())
+        self.assertEqual(self.search("house"), ["HOUSE", "TENT"])
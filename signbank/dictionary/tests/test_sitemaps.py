@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from unittest import mock
+
+from django.contrib.admin.models import CHANGE, LogEntry
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.flatpages.models import FlatPage
+from django.contrib.sites.models import Site
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from signbank.dictionary.models import Dataset, Gloss, SignLanguage
+from signbank.sitemaps import GlossSitemap
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SitemapTestCase(TestCase):
+    def setUp(self):
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage, is_public=True)
+        private_dataset = Dataset.objects.create(name="privatedataset", signlanguage=signlanguage)
+        self.glosses = [Gloss.objects.create(idgloss=idgloss, dataset=dataset, published=True)
+                        for idgloss in ("HAT", "HAND", "HAIR")]
+        Gloss.objects.create(idgloss="HAY", dataset=dataset, published=False)
+        Gloss.objects.create(idgloss="HALL", dataset=private_dataset, published=True)
+        self.client = Client()
+
+    def get_section_url(self, section, page=1):
+        url = reverse('django.contrib.sitemaps.views.sitemap', kwargs={'section': section})
+        return url if page == 1 else '%s?p=%s' % (url, page)
+
+    def test_index(self):
+        """Tests that the index lists a shard for each limit glosses."""
+        with mock.patch.object(GlossSitemap, 'limit', 2):
+            response = self.client.get('/sitemap.xml')
+        self.assertContains(response, self.get_section_url('gloss'))
+        self.assertContains(response, self.get_section_url('gloss', 2))
+        self.assertNotContains(response, self.get_section_url('gloss', 3))
+
+    def test_gloss_shards(self):
+        """Tests that the shards have the published glosses of the public datasets, ordered by id."""
+        with mock.patch.object(GlossSitemap, 'limit', 2):
+            first = self.client.get(self.get_section_url('gloss')).content.decode('utf-8')
+            second = self.client.get(self.get_section_url('gloss', 2)).content.decode('utf-8')
+        for gloss in self.glosses[:2]:
+            self.assertIn(gloss.get_public_absolute_url(), first)
+        self.assertIn(self.glosses[2].get_public_absolute_url(), second)
+        self.assertNotIn(self.glosses[2].get_public_absolute_url(), first)
+        self.assertEqual(first.count('<url>') + second.count('<url>'), 3)
+        self.assertIn('<lastmod>%s</lastmod>' % self.glosses[0].updated_at.date().isoformat(), first)
+
+    def test_cached(self):
+        """Tests that shards are served from the cache until the glosses change."""
+        url = self.get_section_url('gloss')
+        response = self.client.get(url)
+        self.assertTrue(response['ETag'])
+        with self.assertNumQueries(2):
+            cached = self.client.get(url)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['Last-Modified'], response['Last-Modified'])
+        self.glosses[0].published = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.glosses[0].save()
+        self.assertNotIn(self.glosses[0].get_public_absolute_url(), self.client.get(url).content.decode('utf-8'))
+
+    def test_flatpages(self):
+        """Tests that the flatpages have the time of their latest change, and flatpages without changes none."""
+        flatpage = FlatPage.objects.create(url='/about/', title="About")
+        flatpage.sites.add(Site.objects.get_current())
+        unchanged = FlatPage.objects.create(url='/contact/', title="Contact")
+        unchanged.sites.add(Site.objects.get_current())
+        user = User.objects.create_user(username="test", email=None, password="test")
+        for message in ("first", "second"):
+            entry = LogEntry.objects.log_action(user.pk, ContentType.objects.get_for_model(FlatPage).pk, flatpage.pk,
+                                                str(flatpage), CHANGE, message)
+        content = self.client.get(self.get_section_url('flatpages')).content.decode('utf-8')
+        self.assertIn('/about/</loc><lastmod>%s</lastmod>' % entry.action_time.date().isoformat(), content)
+        self.assertIn('/contact/</loc><changefreq>', content)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import Permission, User
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sites.models import Site
+from django.test import Client, TestCase
+from django.urls import reverse
+from django_comments.models import Comment
+from guardian.shortcuts import assign_perm
+from tagging.models import Tag
+
+from signbank.dictionary.models import Dataset, Gloss, SignLanguage
+from signbank.dictionary.tagquery import TagQueryError, compile_tag_query, parse_tag_query
+
+
+class TagQueryParserTestCase(TestCase):
+    def test_parse(self):
+        """Tests operator precedence, grouping, quoting and implicit AND."""
+        self.assertEqual(parse_tag_query("a"), ('tag', 'a'))
+        self.assertEqual(parse_tag_query("a b"), ('and', [('tag', 'a'), ('tag', 'b')]))
+        self.assertEqual(parse_tag_query("a or b and not c"),
+                         ('or', [('tag', 'a'), ('and', [('tag', 'b'), ('not', ('tag', 'c'))])]))
+        self.assertEqual(parse_tag_query("(a OR b) AND validation:pass"),
+                         ('and', [('or', [('tag', 'a'), ('tag', 'b')]), ('tag', 'validation:pass')]))
+        self.assertEqual(parse_tag_query('NOT "not ready"'), ('not', ('tag', 'not ready')))
+
+    def test_parse_errors(self):
+        """Tests that invalid queries raise TagQueryError."""
+        for text in ["", "a AND", "(a OR b", "a)", 'a "b', "OR a", "NOT"]:
+            with self.assertRaises(TagQueryError, msg=text):
+                parse_tag_query(text)
+
+
+class TagQueryFilterTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", email=None, password="test")
+        self.user.user_permissions.add(Permission.objects.get(codename='search_gloss'))
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage)
+        assign_perm('dictionary.view_dataset', self.user, self.dataset)
+        self.glosses = {}
+        for idgloss, tags in [("both", ["red", "blue"]), ("red", ["red"]), ("blue", ["blue"]), ("none", [])]:
+            gloss = Gloss.objects.create(idgloss=idgloss, dataset=self.dataset, created_by=self.user,
+                                         updated_by=self.user)
+            for tag in tags:
+                Tag.objects.add_tag(gloss, tag)
+            self.glosses[idgloss] = gloss
+
+    def filter_glosses(self, text):
+        qs = Gloss.objects.filter(compile_tag_query(Gloss, text))
+        return sorted(qs.values_list('idgloss', flat=True))
+
+    def test_compile(self):
+        """Tests that compiled queries match the expected glosses."""
+        self.assertEqual(self.filter_glosses("red"), ["both", "red"])
+        self.assertEqual(self.filter_glosses("red blue"), ["both"])
+        self.assertEqual(self.filter_glosses("red OR blue"), ["blue", "both", "red"])
+        self.assertEqual(self.filter_glosses("NOT red"), ["blue", "none"])
+        self.assertEqual(self.filter_glosses("NOT (red AND blue)"), ["blue", "none", "red"])
+        self.assertEqual(self.filter_glosses("RED and not Blue"), ["red"])
+
+    def test_compile_is_single_query(self):
+        """Tests that a complex tag query is one SQL query without joins duplicating rows."""
+        with self.assertNumQueries(1):
+            self.assertEqual(self.filter_glosses("(red OR blue) AND NOT (red AND blue)"), ["blue", "red"])
+
+    def test_gloss_list_view(self):
+        """Tests the tag_query and nottags parameters of the advanced search."""
+        url = reverse('dictionary:admin_gloss_list')
+        response = self.client.get(url, {'tag_query': 'red OR blue', 'order': 'idgloss'})
+        self.assertEqual([gloss.idgloss for gloss in response.context['object_list']], ["blue", "both", "red"])
+
+        response = self.client.get(url, {'nottags': ['red', 'blue'], 'order': 'idgloss'})
+        self.assertEqual([gloss.idgloss for gloss in response.context['object_list']], ["blue", "none", "red"])
+
+        response = self.client.get(url, {'tag_query': '(red'})
+        self.assertEqual(list(response.context['object_list']), [])
+        self.assertContains(response, "Invalid tag query")
+
+    def test_comment_list_view(self):
+        """Tests tag queries in the comment search, and that only comments on permitted glosses are listed."""
+        other_dataset = Dataset.objects.create(name="otherdataset", signlanguage=self.dataset.signlanguage)
+        hidden_gloss = Gloss.objects.create(idgloss="hidden", dataset=other_dataset, created_by=self.user,
+                                            updated_by=self.user)
+        comments = {}
+        for gloss, text, tag in [(self.glosses["red"], "tagged", "check"), (self.glosses["blue"], "untagged", None),
+                                 (hidden_gloss, "hidden", "check")]:
+            comments[text] = Comment.objects.create(
+                content_type=ContentType.objects.get_for_model(Gloss), object_pk=str(gloss.pk),
+                site=Site.objects.get_current(), user=self.user, comment=text)
+            if tag:
+                Tag.objects.add_tag(comments[text], tag)
+
+        url = reverse('search_comments')
+        response = self.client.get(url)
+        self.assertEqual(sorted(c.comment for c in response.context['object_list']), ["tagged", "untagged"])
+        response = self.client.get(url, {'tag_query': 'NOT check'})
+        self.assertEqual([c.comment for c in response.context['object_list']], ["untagged"])
+        response = self.client.get(url, {'tag': 'check'})
+        self.assertEqual([c.comment for c in response.context['object_list']], ["tagged"])
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from signbank.dictionary.models import (Dataset, Gloss, GlossTranslations, Keyword, Language, SignLanguage,
+                                        Translation)
+from signbank.dictionary.translationloader import load_translations
+
+
+class LoadTranslationsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", email=None, password="test")
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.language_en = Language.objects.create(name="English", language_code_2char="en",
+                                                   language_code_3char="eng")
+        self.language_fi = Language.objects.create(name="Finnish", language_code_2char="fi",
+                                                   language_code_3char="fin")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage, is_public=True)
+        self.dataset.translation_languages.add(self.language_fi, self.language_en)
+        self.other_dataset = Dataset.objects.create(name="otherdataset", signlanguage=signlanguage)
+        self.other_dataset.translation_languages.add(self.language_en)
+
+        self.glosses = []
+        for i in range(3):
+            gloss = Gloss.objects.create(idgloss="GLOSS%s" % i, dataset=self.dataset, published=True)
+            GlossTranslations.objects.create(gloss=gloss, language=self.language_en,
+                                             translations="hat%s, cap%s" % (i, i))
+            self.glosses.append(gloss)
+        # Translations without GlossTranslations.
+        self.other_gloss = Gloss.objects.create(idgloss="OTHER", dataset=self.other_dataset)
+        for order, text in enumerate(["walk", "stroll"]):
+            Translation.objects.create(gloss=self.other_gloss, language=self.language_en, order=order,
+                                       keyword=Keyword.objects.create(text=text))
+
+    def test_load_translations(self):
+        """Tests that the translations of any number of glosses are loaded in three queries."""
+        glosses = list(Gloss.objects.filter(pk__in=[g.pk for g in self.glosses + [self.other_gloss]]))
+        with self.assertNumQueries(3):
+            load_translations(glosses)
+            translations = {gloss.idgloss: gloss.get_translations_for_translation_languages() for gloss in glosses}
+        # The languages are in the order of the translation languages of the dataset.
+        languages, values = zip(*translations["GLOSS1"])
+        self.assertEqual(list(languages), [self.language_en, self.language_fi])
+        self.assertEqual(values[0].translations, "hat1, cap1")
+        self.assertEqual(values[1], "")
+        self.assertEqual(translations["OTHER"], [(self.language_en, "walk, stroll")])
+
+    def test_single_gloss(self):
+        """Tests that get_translations_for_translation_languages() loads the translations of one gloss."""
+        gloss = Gloss.objects.get(pk=self.other_gloss.pk)
+        self.assertEqual(gloss.get_translations_for_translation_languages(), [(self.language_en, "walk, stroll")])
+        with self.assertNumQueries(0):
+            gloss.get_translations_for_translation_languages()
+
+    def test_public_gloss_list(self):
+        """Tests that the public gloss list shows the translations of the glosses."""
+        response = Client().get(reverse('dictionary:public_gloss_list'))
+        self.assertContains(response, "hat2, cap2")
+        self.assertEqual(len(response.context['object_list'][0].public_translations), 1)
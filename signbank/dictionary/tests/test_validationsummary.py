@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import io
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from signbank.dictionary.models import (Dataset, Gloss, GlossValidationSummary, ManualValidationAggregation,
+                                        ShareValidationAggregation, SignLanguage, ValidationRecord)
+from signbank.dictionary.validationsummary import get_validation_summary, update_validation_summaries
+
+
+class GlossValidationSummaryTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", email=None, password="test")
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage)
+        self.gloss = Gloss.objects.create(idgloss="testgloss", dataset=self.dataset)
+        self.other_gloss = Gloss.objects.create(idgloss="othergloss", dataset=self.dataset)
+
+        ShareValidationAggregation.objects.bulk_create([
+            ShareValidationAggregation(gloss=self.gloss, agrees=2, disagrees=5),
+            ShareValidationAggregation(gloss=self.gloss, agrees=5, disagrees=2)])
+        ManualValidationAggregation.objects.bulk_create([
+            ManualValidationAggregation(gloss=self.gloss, sign_seen_yes=1, sign_seen_no=1, sign_seen_not_sure=0,
+                                        group="Test", comments=""),
+            ManualValidationAggregation(gloss=self.gloss, sign_seen_yes=0, sign_seen_no=0, sign_seen_not_sure=3,
+                                        group="Test", comments="")])
+        ValidationRecord.objects.bulk_create([
+            ValidationRecord(gloss=self.gloss, response_id="R_1", sign_seen=ValidationRecord.SignSeenChoices.YES),
+            ValidationRecord(gloss=self.gloss, response_id="R_2", sign_seen=ValidationRecord.SignSeenChoices.NO),
+            ValidationRecord(gloss=self.gloss, response_id="R_3", sign_seen=ValidationRecord.SignSeenChoices.YES)])
+
+    def assertSummary(self, summary, sign_seen_yes, sign_seen_no, sign_seen_not_sure):
+        self.assertEqual((summary.sign_seen_yes, summary.sign_seen_no, summary.sign_seen_not_sure),
+                         (sign_seen_yes, sign_seen_no, sign_seen_not_sure))
+        self.assertEqual(summary.total, sign_seen_yes + sign_seen_no + sign_seen_not_sure)
+
+    def test_update_validation_summaries(self):
+        """Tests that the totals of all the validations are summed per gloss."""
+        self.assertEqual(update_validation_summaries([self.gloss.pk, self.other_gloss.pk]), 2)
+        summary = GlossValidationSummary.objects.get(gloss=self.gloss)
+        self.assertSummary(summary, 10, 9, 3)
+        self.assertEqual((summary.records_count, summary.manual_count), (3, 2))
+        self.assertEqual((summary.share_count, summary.share_agrees, summary.share_disagrees), (2, 7, 7))
+        self.assertSummary(GlossValidationSummary.objects.get(gloss=self.other_gloss), 0, 0, 0)
+
+    def test_signals_update_summary(self):
+        """Tests that validations saved or deleted one at a time update the summary of their gloss."""
+        update_validation_summaries()
+        ValidationRecord.objects.create(gloss=self.gloss, response_id="R_4",
+                                        sign_seen=ValidationRecord.SignSeenChoices.NOT_SURE)
+        self.assertSummary(GlossValidationSummary.objects.get(gloss=self.gloss), 10, 9, 4)
+        ManualValidationAggregation.objects.filter(gloss=self.gloss).delete()
+        self.assertSummary(GlossValidationSummary.objects.get(gloss=self.gloss), 9, 8, 1)
+
+    def test_get_validation_summary_without_summary(self):
+        """Tests that a gloss without a stored summary gets an empty one."""
+        self.assertFalse(GlossValidationSummary.objects.filter(gloss=self.other_gloss).exists())
+        self.assertSummary(get_validation_summary(self.other_gloss), 0, 0, 0)
+
+    def test_delete_gloss(self):
+        """Tests that deleting a gloss with validations deletes its summary."""
+        update_validation_summaries()
+        self.gloss.delete()
+        self.assertFalse(GlossValidationSummary.objects.filter(gloss_id=self.gloss.pk).exists())
+
+    def test_rebuild_validation_summaries(self):
+        """Tests that the management command creates the summaries of all glosses."""
+        call_command('rebuild_validation_summaries', stdout=io.StringIO())
+        self.assertEqual(GlossValidationSummary.objects.count(), Gloss.objects.count())
+        self.assertSummary(GlossValidationSummary.objects.get(gloss=self.gloss), 10, 9, 3)
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+from io import BytesIO
+from zipfile import ZipFile
+
+from django.test import SimpleTestCase
+
+from signbank.dictionary.zipstream import iter_json, stream_zip
+
+
+class ZipStreamTestCase(SimpleTestCase):
+    def test_zip(self):
+        """Tests that the streamed zip file can be read, and that the same members make the same bytes."""
+        members = [("glosses.json", [b'{"1": ', b'"HAT"}']), ("empty.json", []), ("käsi.txt", [b"x" * 100000])]
+        content = b''.join(stream_zip(members))
+        self.assertEqual(content, b''.join(stream_zip(members)))
+        with ZipFile(BytesIO(content)) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual(zip_file.namelist(), ["glosses.json", "empty.json", "käsi.txt"])
+            self.assertEqual(zip_file.read("glosses.json"), b'{"1": "HAT"}')
+            self.assertEqual(zip_file.read("empty.json"), b'')
+            self.assertEqual(zip_file.read("käsi.txt"), b"x" * 100000)
+            self.assertEqual(zip_file.getinfo("käsi.txt").date_time, (1980, 1, 1, 0, 0, 0))
+
+    def test_streaming(self):
+        """Tests that the members are read only as the zip file is written."""
+        produced = []
+
+        def chunks():
+            for number in range(3):
+                produced.append(number)
+                yield b"%d" % number
+
+        stream = stream_zip([("numbers.txt", chunks())])
+        self.assertTrue(next(stream).startswith(b"PK\x03\x04"))
+        self.assertEqual(produced, [])
+        list(stream)
+        self.assertEqual(produced, [0, 1, 2])
+
+    def test_iter_json(self):
+        """Tests that the incrementally encoded json is the same as json.dumps()."""
+        data = {str(number): {"Gloss": "HAT", "Video": "ä" * number} for number in range(100)}
+        chunks = list(iter_json(data, chunk_size=1000))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b''.join(chunks), json.dumps(data, indent=4, sort_keys=True).encode('utf-8'))
@@ -1,16 +1,15 @@
-import json
-
 from django.conf import settings
 from django.utils.translation import ugettext as _
-from zipfile import ZipFile
 
+from signbank.dictionary.glossfields import get_glosses_fields
 from signbank.dictionary.models import Dataset, Gloss
 
 
-def get_gloss_data(since_timestamp=0, dataset=None):
+def get_gloss_data(since=None, dataset=None):
     """
     This function is copied from Global Signbank.
     It has been adapted to work for NZSL's data structure.
+    Only the glosses updated after the datetime since are included, all of them if it is None.
     """
     api_fields_2023 = []
     if not dataset:
@@ -30,34 +29,8 @@ def get_gloss_data(since_timestamp=0, dataset=None):
     api_fields_2023.append("Video")
 
     glosses = Gloss.objects.filter(dataset=dataset)
-    gloss_data = {}
-    for gloss in glosses:
-        if since_timestamp and gloss.updated_at > since_timestamp:
-            gloss_data[str(gloss.pk)] = gloss.get_fields_dict(api_fields_2023)
-        else:
-            gloss_data[str(gloss.pk)] = gloss.get_fields_dict(api_fields_2023)
-
-    return gloss_data
-
-
-def create_zip_with_json_files(data_per_file, output_path):
-    """
-    This function is copied from Global Signbank.
-
-    Creates a zip file filled with the output of the functions supplied.
-    Data should either be a json string or a list, which will be transformed to json.
-    """
-
-    INDENTATION_CHARS = 4
-
-    zip = ZipFile(output_path, 'w')
+    if since:
+        glosses = glosses.filter(updated_at__gt=since)
+    # The same as gloss.get_fields_dict(api_fields_2023) of each gloss, from a fixed number of queries.
+    return {str(pk): fields for pk, fields in get_glosses_fields(glosses, api_fields_2023).items()}
 
-    for filename, data in data_per_file.items():
-        if isinstance(data, list) or isinstance(data, dict):
-            try:
-                output = json.dumps(data, indent=INDENTATION_CHARS)
-            except TypeError:
-                print('problem processing json.dumps on ', filename)
-                output = ''
-            zip.writestr(filename + '.json', output)
-    zip.close()
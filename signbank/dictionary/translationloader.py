@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Loads the translation equivalents of many glosses at once, for the lists, the detail pages and the ECV.
+
+load_translations() attaches to each gloss the (language, translations) pairs that
+Gloss.get_translations_for_translation_languages() returns, in three queries whatever the number of glosses.
+"""
+from __future__ import unicode_literals
+
+from collections import defaultdict
+
+from django.db.models import F
+
+from .models import GlossTranslations, Language, Translation
+
+#: The attribute of a Gloss the loaded translations are stored in.
+TRANSLATIONS_ATTR = '_translations_for_translation_languages'
+
+
+def get_translation_languages(dataset_ids):
+    """Returns the translation languages of each of dataset_ids, ordered like Dataset.translation_languages."""
+    languages = defaultdict(list)
+    for language in Language.objects.filter(dataset__in=dataset_ids).annotate(translation_dataset_id=F('dataset')):
+        languages[language.translation_dataset_id].append(language)
+    return languages
+
+
+def load_translations(glosses):
+    """
+    Attaches the (language, translations) pairs of the translation languages of their datasets to glosses.
+    The translations are the GlossTranslations of the language, or if there is none, the keywords of the
+    Translations of the language joined with commas. Returns glosses as a list.
+    """
+    glosses = list(glosses)
+    if not glosses:
+        return glosses
+    languages = get_translation_languages({gloss.dataset_id for gloss in glosses})
+    gloss_ids = [gloss.pk for gloss in glosses]
+
+    glosstranslations = {}
+    for glosstranslation in GlossTranslations.objects.filter(gloss__in=gloss_ids).order_by():
+        glosstranslations[(glosstranslation.gloss_id, glosstranslation.language_id)] = glosstranslation
+
+    # Fall back to the Translations of the languages that have no GlossTranslations.
+    missing = {(gloss.pk, language.pk) for gloss in glosses for language in languages[gloss.dataset_id]
+               if (gloss.pk, language.pk) not in glosstranslations}
+    keywords = defaultdict(list)
+    if missing:
+        translations = Translation.objects.filter(
+            gloss__in={gloss_id for gloss_id, language_id in missing},
+            language__in={language_id for gloss_id, language_id in missing}).values_list(
+            'gloss_id', 'language_id', 'keyword__text')
+        for gloss_id, language_id, keyword in translations:
+            keywords[(gloss_id, language_id)].append(keyword)
+
+    for gloss in glosses:
+        translations = []
+        for language in languages[gloss.dataset_id]:
+            key = (gloss.pk, language.pk)
+            translations.append((language, glosstranslations[key] if key in glosstranslations
+                                 else ", ".join(keywords[key])))
+        setattr(gloss, TRANSLATIONS_ATTR, translations)
+    return glosses
@@ -12,9 +12,10 @@ from django.http import (Http404, HttpResponse, HttpResponseBadRequest,
                          HttpResponseRedirect, HttpResponseServerError)
 from django.shortcuts import get_object_or_404, redirect, render, reverse
 from django.utils.translation import ugettext as _
-from guardian.shortcuts import get_perms
 from tagging.models import Tag, TaggedItem
 
+from .datasetpermissions import has_dataset_perm
+from .fieldchoices import get_field_choices, get_fieldchoice
 from .forms import (GlossRelationForm, MorphologyForm,
                     RelationForm, RelationToForeignSignForm, TagDeleteForm,
                     TagsAddForm, TagUpdateForm)
@@ -34,7 +35,7 @@ def update_gloss(request, glossid):
     gloss = get_object_or_404(Gloss, id=glossid)
 
     # Make sure that the user has rights to edit this datasets glosses.
-    if 'view_dataset' not in get_perms(request.user, gloss.dataset):
+    if not has_dataset_perm(request.user, 'view_dataset', gloss.dataset_id):
         return HttpResponseForbidden(_("You do not have permissions to edit Glosses of this dataset/lexicon."))
 
     if request.method == "POST":
@@ -96,8 +97,8 @@ def update_gloss(request, glossid):
             try:
                 # Find fieldchoices that meet the wordclass association's limit choices
                 # that match the provided machine values
-                wordclasses = FieldChoice.objects.complex_filter(Gloss._meta.get_field(
-                    "wordclasses").get_limit_choices_to()).filter(machine_value__in=values)
+                wordclasses = get_field_choices().filter(
+                    Gloss._meta.get_field("wordclasses").get_limit_choices_to()["field"], values)
                 gloss.wordclasses.set(wordclasses)
                 gloss.save()
                 newvalue = ", ".join([str(wc.english_name)
@@ -109,8 +110,8 @@ def update_gloss(request, glossid):
             try:
                 # Find fieldchoices that meet the usage association's limit choices
                 # that match the provided machine values
-                usages = FieldChoice.objects.complex_filter(Gloss._meta.get_field(
-                    "usage").get_limit_choices_to()).filter(machine_value__in=values)
+                usages = get_field_choices().filter(
+                    Gloss._meta.get_field("usage").get_limit_choices_to()["field"], values)
                 gloss.usage.set(usages)
                 gloss.save()
                 newvalue = "&#10;<br>".join([str(usage.english_name)
@@ -122,8 +123,8 @@ def update_gloss(request, glossid):
             try:
                 # Find fieldchoices that meet the semantic_field association's limit choices
                 # that match the provided machine values
-                semantic_fields = FieldChoice.objects.complex_filter(Gloss._meta.get_field(
-                    "semantic_field").get_limit_choices_to()).filter(machine_value__in=values)
+                semantic_fields = get_field_choices().filter(
+                    Gloss._meta.get_field("semantic_field").get_limit_choices_to()["field"], values)
                 gloss.semantic_field.set(semantic_fields)
                 gloss.save()
                 newvalue = "&#10;<br>".join(str(semantic_field.english_name)
@@ -196,8 +197,7 @@ def update_gloss(request, glossid):
             # See if the field is a ForeignKey
             if gloss._meta.get_field(field).get_internal_type() == "ForeignKey":
                 gloss.__setattr__(
-                    field, FieldChoice.objects.get(
-                        machine_value=value) if value and value.strip() != '' else None)
+                    field, get_fieldchoice(value) if value and value.strip() != '' else None)
             else:
                 gloss.__setattr__(field, value)
             gloss.save()
@@ -292,7 +292,7 @@ def update_relation(gloss, field, value):
     elif what == 'relationrole':
         # rel.role = value
         try:
-            rel.role = FieldChoice.objects.get(machine_value=value)
+            rel.role = get_fieldchoice(value)
         except FieldChoice.DoesNotExist:
             rel.role = value
         rel.save()
@@ -525,7 +525,7 @@ def update_morphology_definition(gloss, field, value):
         return HttpResponseRedirect(reverse('dictionary:admin_gloss_view', kwargs={'pk': gloss.id}))
     elif what == 'morphology_definition_role':
         # morph_def.role = value
-        morph_def.role = FieldChoice.objects.get(machine_value=value)
+        morph_def.role = get_fieldchoice(value)
         morph_def.save()
         # newvalue = morph_def.get_role_display()
         newvalue = morph_def.role.english_name
@@ -585,7 +585,7 @@ def add_tag(request, glossid):
 
     if request.method == "POST":
         gloss = get_object_or_404(Gloss, id=glossid)
-        if 'view_dataset' not in get_perms(request.user, gloss.dataset):
+        if not has_dataset_perm(request.user, 'view_dataset', gloss.dataset_id):
             # If user has no permissions to dataset, raise PermissionDenied to show 403 template.
             msg = _("You do not have permissions to add tags to glosses of this lexicon.")
             messages.error(request, msg)
@@ -643,7 +643,7 @@ def gloss_relation(request):
         form = GlossRelationForm(request.POST)
         if "delete" in form.data:
             glossrelation = get_object_or_404(GlossRelation, id=int(form.data["delete"]))
-            if 'view_dataset' not in get_perms(request.user, glossrelation.source.dataset):
+            if not has_dataset_perm(request.user, 'view_dataset', glossrelation.source.dataset_id):
                 # If user has no permissions to dataset, raise PermissionDenied to show 403 template.
                 msg = _("You do not have permissions to delete relations from glosses of this lexicon.")
                 messages.error(request, msg)
@@ -659,7 +659,7 @@ def gloss_relation(request):
 
         if form.is_valid():
             source = get_object_or_404(Gloss, id=form.cleaned_data["source"])
-            if 'view_dataset' not in get_perms(request.user, source.dataset):
+            if not has_dataset_perm(request.user, 'view_dataset', source.dataset_id):
                 # If user has no permissions to dataset, raise PermissionDenied to show 403 template.
                 msg = _("You do not have permissions to add relations to glosses of this lexicon.")
                 messages.error(request, msg)
@@ -6,7 +6,7 @@ from django.urls import path, re_path
 from django.views.generic.base import RedirectView
 
 # Views
-from . import adminviews, csv_import, delete, publicviews, update, views
+from . import adminviews, csv_import, delete, publicviews, referencedata, update, views
 
 # Application namespace
 app_name = 'dictionary'
@@ -32,6 +32,18 @@ urlpatterns = [
     path('advanced/gloss/<int:pk>', permission_required('dictionary.search_gloss')
          (adminviews.GlossDetailView.as_view()), name='admin_gloss_view'),
 
+    # Facet counts of an advanced search
+    path('advanced/facets/', permission_required('dictionary.search_gloss')
+         (adminviews.gloss_list_facets), name='admin_gloss_list_facets'),
+
+    # Reference data of the gloss detail editor
+    path('advanced/reference/<int:dataset_id>/<slug:name>.json', permission_required('dictionary.search_gloss')
+         (referencedata.reference_data), name='reference_data'),
+
+    # Download a finished background CSV export
+    path('advanced/export/<int:pk>', permission_required('dictionary.export_csv')
+         (adminviews.export_job_download), name='export_job_download'),
+
     # GlossRelation search page
     path('advanced/glossrelation/', permission_required('dictionary.search_gloss')
          (adminviews.GlossRelationListView.as_view()), name='search_glossrelation'),
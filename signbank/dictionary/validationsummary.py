@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+The GlossValidationSummaries, the validation totals of glosses used by the gloss detail page and the validation
+results CSV export.
+
+The validation imports use bulk_create, which does not send signals, so they call update_validation_summaries()
+for the glosses they imported validations for. Changes made one at a time (e.g. in the admin) are handled by the
+signal handlers in signals.py.
+"""
+from __future__ import unicode_literals
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import (Gloss, GlossValidationSummary, ManualValidationAggregation, ShareValidationAggregation,
+                     ValidationRecord)
+
+#: The GlossValidationSummary field of each ValidationRecord answer.
+RECORD_FIELDS = {
+    ValidationRecord.SignSeenChoices.YES: 'records_yes',
+    ValidationRecord.SignSeenChoices.NO: 'records_no',
+    ValidationRecord.SignSeenChoices.NOT_SURE: 'records_not_sure',
+}
+
+
+def update_validation_summaries(gloss_ids=None):
+    """Recomputes the GlossValidationSummaries of gloss_ids, or of all glosses if gloss_ids is None."""
+    glosses = Gloss.objects.all()
+    gloss_filter = {}
+    if gloss_ids is not None:
+        gloss_ids = list(gloss_ids)
+        glosses = glosses.filter(pk__in=gloss_ids)
+        gloss_filter = {'gloss__in': gloss_ids}
+    summaries = {pk: GlossValidationSummary(gloss_id=pk) for pk in glosses.values_list('pk', flat=True)}
+
+    # One grouped query per validation source.
+    records = ValidationRecord.objects.filter(**gloss_filter).order_by().values(
+        'gloss_id', 'sign_seen').annotate(count=Count('pk'))
+    for row in records:
+        if row['sign_seen'] in RECORD_FIELDS:
+            setattr(summaries[row['gloss_id']], RECORD_FIELDS[row['sign_seen']], row['count'])
+
+    share_validations = ShareValidationAggregation.objects.filter(**gloss_filter).order_by().values(
+        'gloss_id').annotate(count=Count('pk'), agrees=Sum('agrees'), disagrees=Sum('disagrees'))
+    for row in share_validations:
+        summary = summaries[row['gloss_id']]
+        summary.share_count, summary.share_agrees, summary.share_disagrees = (
+            row['count'], row['agrees'], row['disagrees'])
+
+    manual_validations = ManualValidationAggregation.objects.filter(**gloss_filter).order_by().values(
+        'gloss_id').annotate(count=Count('pk'), yes=Sum('sign_seen_yes'), no=Sum('sign_seen_no'),
+                             not_sure=Sum('sign_seen_not_sure'))
+    for row in manual_validations:
+        summary = summaries[row['gloss_id']]
+        summary.manual_count, summary.manual_yes, summary.manual_no, summary.manual_not_sure = (
+            row['count'], row['yes'], row['no'], row['not_sure'])
+
+    with transaction.atomic():
+        GlossValidationSummary.objects.filter(**gloss_filter).delete()
+        GlossValidationSummary.objects.bulk_create(summaries.values(), batch_size=1000)
+    return len(summaries)
+
+
+def get_validation_summary(gloss):
+    """Returns the GlossValidationSummary of gloss, an empty one if it has none."""
+    try:
+        return gloss.validation_summary
+    except GlossValidationSummary.DoesNotExist:
+        return GlossValidationSummary(gloss=gloss)
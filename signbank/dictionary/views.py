@@ -4,33 +4,40 @@ import os
 
 import json
 import time
+from datetime import datetime
 
-from django.http import HttpResponse, HttpResponseRedirect, Http404
+from django.http import (FileResponse, HttpResponse, HttpResponseBadRequest, HttpResponseRedirect, Http404,
+                         StreamingHttpResponse)
 from django.shortcuts import render
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import permission_required
 from django.contrib.admin.views.decorators import user_passes_test
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
 from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
 from django.utils.translation import ugettext as _
 from django.views.generic.list import ListView
 from django.views.generic import FormView
 from django.db.models import Q, F, Count, Case, Value, When, BooleanField
 from urllib.parse import quote
-from wsgiref.util import FileWrapper
 
 from tagging.models import Tag
-from guardian.shortcuts import get_perms, get_objects_for_user, get_users_with_perms
 from notifications.signals import notify
 
+from signbank.dictionary.datasetpermissions import (get_allowed_dataset_ids, get_allowed_datasets,
+                                                   get_users_with_dataset_perms, has_dataset_perm)
 from signbank.dictionary.models import Dataset, Keyword, FieldChoice, Gloss, GlossRelation
 from signbank.dictionary.forms import GlossCreateForm, LexiconForm
-from signbank.dictionary import tools
+from signbank.dictionary.mediaserving import media_response
+from signbank.dictionary.conditionalget import get_dataset_change_count, get_etag
+from signbank.dictionary.packages import get_package, stream_package
 from signbank.dictionary.update import add_tags_to_gloss
 
-from signbank.video.models import GlossVideo
 from signbank.video.forms import GlossVideoForm
+from signbank.video.renditions import get_rendition_of_file
 
 
 @permission_required('dictionary.add_gloss')
@@ -41,7 +48,7 @@ def create_gloss(request):
         glossvideoform = GlossVideoForm(request.POST, request.FILES)
         glossvideoform.fields['videofile'].required=False
         if form.is_valid() and glossvideoform.is_valid():
-            if 'view_dataset' not in get_perms(request.user, form.cleaned_data["dataset"]):
+            if not has_dataset_perm(request.user, 'view_dataset', form.cleaned_data["dataset"]):
                 # If user has no permissions to dataset, raise PermissionDenied to show 403 template.
                 msg = _("You do not have permissions to create glosses for this lexicon.")
                 messages.error(request, msg)
@@ -62,14 +69,14 @@ def create_gloss(request):
 
         else:
             # Return bound fields with errors if the form is not valid.
-            allowed_datasets = get_objects_for_user(request.user, 'dictionary.view_dataset')
-            form.fields["dataset"].queryset = Dataset.objects.filter(id__in=[x.id for x in allowed_datasets])
+            allowed_datasets = get_allowed_dataset_ids(request.user)
+            form.fields["dataset"].queryset = Dataset.objects.filter(id__in=allowed_datasets)
             return render(request, 'dictionary/create_gloss.html', {'form': form, 'glossvideoform': glossvideoform})
     else:
-        allowed_datasets = get_objects_for_user(request.user, 'dictionary.view_dataset')
+        allowed_datasets = get_allowed_dataset_ids(request.user)
         form = GlossCreateForm()
         glossvideoform = GlossVideoForm()
-        form.fields["dataset"].queryset = Dataset.objects.filter(id__in=[x.id for x in allowed_datasets])
+        form.fields["dataset"].queryset = Dataset.objects.filter(id__in=allowed_datasets)
         return render(request, 'dictionary/create_gloss.html', {'form': form, 'glossvideoform': glossvideoform})
 
 
@@ -103,15 +110,16 @@ class ManageLexiconsListView(ListView):
         context['no_permissions'] = qs.filter(has_view_perm=False)
         # Show users with permissions to lexicons to SuperUsers
         if self.request.user.is_superuser:
+            users_with_perms = get_users_with_dataset_perms(qs.values_list('pk', flat=True), with_superusers=True)
             for lexicon in context['has_permissions']:
-                lexicon.users_with_perms = get_users_with_perms(obj=lexicon, with_superusers=True)
+                lexicon.users_with_perms = users_with_perms[lexicon.pk]
             for lexicon in context['no_permissions']:
-                lexicon.users_with_perms = get_users_with_perms(obj=lexicon, with_superusers=True)
+                lexicon.users_with_perms = users_with_perms[lexicon.pk]
         return context
 
     def get_queryset(self):
         # Get allowed datasets for user (django-guardian)
-        allowed_datasets = get_objects_for_user(self.request.user, 'dictionary.view_dataset')
+        allowed_datasets = get_allowed_dataset_ids(self.request.user)
         # Get queryset
         qs = super().get_queryset()
         qs = qs.annotate(
@@ -148,9 +156,9 @@ def network_graph(request):
     context = dict()
     form = LexiconForm(request.GET, use_required_attribute=False)
     # Get allowed datasets for user (django-guardian)
-    allowed_datasets = get_objects_for_user(request.user, 'dictionary.view_dataset')
+    allowed_datasets = get_allowed_dataset_ids(request.user)
     # Filter the forms dataset field for the datasets user has permission to.
-    form.fields["dataset"].queryset = Dataset.objects.filter(id__in=[x.id for x in allowed_datasets])
+    form.fields["dataset"].queryset = Dataset.objects.filter(id__in=allowed_datasets)
     dataset = None
     if form.is_valid():
         form.fields["dataset"].widget.is_required = False
@@ -180,10 +188,8 @@ def package(request):
             dataset = Dataset.objects.get(name=request.GET['dataset_name'])
         else:
             dataset = Dataset.objects.get(name=settings.DEFAULT_DATASET_ACRONYM)
-        available_glosses = Gloss.objects.filter(dataset=dataset)
     else:
         dataset = Dataset.objects.get(name=settings.DEFAULT_DATASET_ACRONYM)
-        available_glosses = Gloss.objects.filter(dataset=dataset)
 
     first_part_of_file_name = 'signbank_pa'
 
@@ -191,48 +197,35 @@ def package(request):
 
     if 'since_timestamp' in request.GET:
         first_part_of_file_name += 'tch'
-        since_timestamp = int(request.GET['since_timestamp'])
+        try:
+            since = datetime.fromtimestamp(int(request.GET['since_timestamp']), tz=timezone.utc)
+        except (ValueError, OverflowError, OSError):
+            return HttpResponseBadRequest(_("since_timestamp must be a Unix timestamp."))
         timestamp_part_of_file_name = request.GET[
                                           'since_timestamp'] + '-' + timestamp_part_of_file_name
     else:
         first_part_of_file_name += 'ckage'
-        since_timestamp = 0
+        since = None
 
     archive_file_name = '.'.join([first_part_of_file_name, timestamp_part_of_file_name, 'zip'])
-    archive_file_path = settings.SIGNBANK_PACKAGES_FOLDER + "/" + archive_file_name
-
-    available_glossvideos = GlossVideo.objects.filter(gloss__in=available_glosses)
-
-    video_urls = {
-        os.path.splitext(os.path.basename(gv.videofile.name))[0]: reverse(
-            'dictionary:protected_media',
-            kwargs={"filename": gv.videofile.name}
-        )
-        for gv in available_glossvideos
-        if os.path.exists(str(gv.videofile.path))
-        and os.path.getmtime(str(gv.videofile.path)) > since_timestamp
-        and gv.is_video()
-    }
-
-    image_urls = {
-        os.path.splitext(os.path.basename(gv.videofile.name))[0]: reverse(
-            'dictionary:protected_media', kwargs={"filename": gv.videofile.name}
-        )
-        for gv in available_glossvideos
-        if os.path.exists(str(gv.videofile.path))
-        and os.path.getmtime(str(gv.videofile.path)) > since_timestamp
-        and gv.is_image()
-    }
-
-    collected_data = {'video_urls': video_urls,
-                      'image_urls': image_urls,
-                      'glosses': tools.get_gloss_data(since_timestamp, dataset)}
-
-    tools.create_zip_with_json_files(collected_data, archive_file_path)
-
-    response = HttpResponse(FileWrapper(open(archive_file_path, 'rb')),
-                            content_type='application/zip')
-    response['Content-Disposition'] = 'attachment; filename=' + archive_file_name
+
+    if since is None:
+        artifact = get_package(dataset)
+        # Packages with the same content have the same ETag, clients that have it get 304 Not Modified.
+        etag = '"%s"' % artifact.content_hash
+    else:
+        # The changes since a time are the same until the dataset changes again.
+        etag = get_etag('package', dataset.pk, get_dataset_change_count(dataset), since.isoformat())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        if since is None:
+            response = FileResponse(artifact.artifact.open('rb'), as_attachment=True, filename=archive_file_name,
+                                    content_type='application/zip')
+        else:
+            # The changes are not stored, every client has its own time.
+            response = StreamingHttpResponse(stream_package(dataset, since), content_type='application/zip')
+            response['Content-Disposition'] = 'attachment; filename="%s"' % archive_file_name
+    response['ETag'] = etag
     return response
 
 
@@ -241,8 +234,7 @@ def info(request):
     This view is copied from Global Signbank.
     It has been adapted to work for NZSL's data structure.
     """
-    user_datasets = get_objects_for_user(request.user, 'change_dataset',
-                                                            Dataset)
+    user_datasets = get_allowed_datasets(request.user, 'change_dataset')
     user_datasets_names = [dataset.name for dataset in user_datasets]
 
     # Put the default dataset in first position
@@ -257,7 +249,7 @@ def info(request):
                             content_type='application/json')
 
 
-def protected_media(request, filename, show_indexes=False):
+def protected_media(request, filename):
     """
     This view is copied from Global Signbank.
     It has been adapted to work for NZSL's data structure.
@@ -279,37 +271,26 @@ def protected_media(request, filename, show_indexes=False):
 
         # If we got here, the gloss was found and in the web dictionary, so we can continue
 
-    filename = os.path.normpath(filename)
-
     dir_path = settings.WRITABLE_FOLDER
-    path = dir_path.encode('utf-8') + filename.encode('utf-8')
+    try:
+        path = safe_join(dir_path, filename)
+    except SuspiciousFileOperation:
+        raise Http404("File does not exist.")
 
-    if not os.path.exists(path):
+    if not os.path.isfile(path):
         # quote the filename instead to resolve special characters in the url
-        (head, tail) = os.path.split(filename)
-        quoted_filename = quote(tail, safe='')
-        quoted_path = os.path.join(dir_path, head, quoted_filename)
-        if not os.path.exists(quoted_path):
+        (head, tail) = os.path.split(path)
+        path = os.path.join(head, quote(tail, safe=''))
+        if not os.path.isfile(path):
             raise Http404("File does not exist.")
-        else:
-            filename = quoted_filename
-            path = quoted_path
-
-    if not settings.USE_X_SENDFILE:
-        if filename.split('.')[-1] == 'mp4':
-            response = HttpResponse(content_type='video/mp4')
-        elif filename.split('.')[-1] == 'png':
-            response = HttpResponse(content_type='image/png')
-        elif filename.split('.')[-1] == 'jpg':
-            response = HttpResponse(content_type='image/jpg')
-        else:
-            response = HttpResponse()
 
-        response['Content-Disposition'] = 'inline;filename=' + filename + ';filename*=UTF-8'
-        response['X-Sendfile'] = path
+    if 'original' not in request.GET:
+        # Play the smallest suitable rendition of a video, mobile clients can ask for a height.
+        height = request.GET.get('height', '')
+        rendition = get_rendition_of_file(filename, int(height) if height.isdigit() else None)
+        if rendition is not None:
+            rendition_path = safe_join(dir_path, rendition.file.name)
+            if os.path.isfile(rendition_path):
+                path = rendition_path
 
-        return response
-
-    else:
-        from django.views.static import serve
-        return serve(request, filename, dir_path, show_indexes)
+    return media_response(request, path)
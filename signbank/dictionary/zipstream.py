@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+A zip file writer that yields the bytes of the zip file as its members are produced, without seeking, so that large
+zip files can be written to a stream or a response with bounded memory.
+
+The sizes and checksums of the members are written after their data, in data descriptors, and the central directory
+at the end. Members are deflated, and their modification time is fixed so that the same content always makes the
+same bytes. Members and the zip file must be smaller than 4 GiB, there is no Zip64 support.
+"""
+from __future__ import unicode_literals
+
+import json
+import struct
+import zlib
+
+#: The modification time of the members, the earliest MS-DOS date: 1980-01-01 00:00:00.
+DOS_TIME = 0
+DOS_DATE = (1980 - 1980) << 9 | 1 << 5 | 1
+
+#: Version 2.0 of the zip format, deflate and data descriptors.
+VERSION = 20
+#: The sizes and checksum are in a data descriptor after the data, and the member names are UTF-8.
+FLAGS = 0x08 | 0x800
+#: Regular files with permissions rw-r--r--, in the upper half of the external attributes.
+EXTERNAL_ATTRIBUTES = (0o100644 << 16)
+
+LOCAL_FILE_HEADER = struct.Struct('<IHHHHHIIIHH')
+DATA_DESCRIPTOR = struct.Struct('<IIII')
+CENTRAL_DIRECTORY_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+END_OF_CENTRAL_DIRECTORY = struct.Struct('<IHHHHIIH')
+
+#: The size of the chunks of the incrementally encoded json.
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_json(data, chunk_size=CHUNK_SIZE):
+    """Yields data encoded as json like json.dumps(data, indent=4, sort_keys=True), in UTF-8 chunks."""
+    chunk = []
+    length = 0
+    for part in json.JSONEncoder(indent=4, sort_keys=True).iterencode(data):
+        chunk.append(part)
+        length += len(part)
+        if length >= chunk_size:
+            yield ''.join(chunk).encode('utf-8')
+            chunk, length = [], 0
+    if chunk:
+        yield ''.join(chunk).encode('utf-8')
+
+
+def stream_zip(members):
+    """Yields the bytes of a zip file of members, an iterable of (name, iterable of the bytes of the member)."""
+    entries = []
+    offset = 0
+    for name, chunks in members:
+        encoded_name = name.encode('utf-8')
+        header = LOCAL_FILE_HEADER.pack(0x04034b50, VERSION, FLAGS, zlib.DEFLATED, DOS_TIME, DOS_DATE,
+                                        0, 0, 0, len(encoded_name), 0) + encoded_name
+        yield header
+
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS)
+        crc, size, compressed_size = 0, 0, 0
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            compressed = compressor.compress(chunk)
+            if compressed:
+                compressed_size += len(compressed)
+                yield compressed
+        compressed = compressor.flush()
+        compressed_size += len(compressed)
+        yield compressed
+
+        yield DATA_DESCRIPTOR.pack(0x08074b50, crc, compressed_size, size)
+        entries.append((encoded_name, crc, compressed_size, size, offset))
+        offset += len(header) + compressed_size + DATA_DESCRIPTOR.size
+
+    central_directory_size = 0
+    for encoded_name, crc, compressed_size, size, header_offset in entries:
+        central_directory_header = CENTRAL_DIRECTORY_HEADER.pack(
+            0x02014b50, VERSION, VERSION, FLAGS, zlib.DEFLATED, DOS_TIME, DOS_DATE, crc, compressed_size, size,
+            len(encoded_name), 0, 0, 0, 0, EXTERNAL_ATTRIBUTES, header_offset) + encoded_name
+        central_directory_size += len(central_directory_header)
+        yield central_directory_header
+    yield END_OF_CENTRAL_DIRECTORY.pack(0x06054b50, 0, 0, len(entries), len(entries), central_directory_size,
+                                        offset, 0)
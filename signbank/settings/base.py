@@ -173,6 +173,7 @@ INSTALLED_APPS = (
     'guardian',
     'notifications',
     'django.contrib.sitemaps',
+    'django.contrib.postgres',
 )
 
 ABSOLUTE_URL_OVERRIDES = {
@@ -184,6 +185,28 @@ ABSOLUTE_URL_OVERRIDES = {
 #: storage location
 VIDEO_UPLOAD_LOCATION = "upload"
 
+#: The ffmpeg and ffprobe programs that extract the posters and thumbnails of the videos, see video/posters.py.
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+FFPROBE_BINARY = os.getenv("FFPROBE_BINARY", "ffprobe")
+#: Where in a video its poster frame is taken from, as a fraction of its duration.
+POSTER_FRAME_POSITION = 0.5
+#: The widths in pixels of the thumbnails of the posters, each is saved as JPEG and WebP.
+POSTER_THUMBNAIL_WIDTHS = [160, 320, 640]
+#: How many seconds ffmpeg and ffprobe can take for one step of a video job, transcoding has its own limit.
+FFMPEG_TIMEOUT = 120
+#: The MP4 renditions the videos are transcoded to: their largest height in pixels and x264 quality (lower is better).
+VIDEO_RENDITIONS = {
+    'web': {'height': 480, 'crf': 26},
+    'mobile': {'height': 360, 'crf': 28},
+}
+#: Whether HLS segments of the web rendition are made for adaptive streaming too. Not with S3 storage that signs its
+#: URLs (AWS_QUERYSTRING_AUTH, the default), the segments of the playlists would not be signed.
+VIDEO_RENDITION_HLS = os.getenv("VIDEO_RENDITION_HLS", 'false').lower() == 'true'
+#: How many seconds ffmpeg can take to transcode one rendition of a video.
+VIDEO_TRANSCODE_TIMEOUT = 600
+#: The height of the video players, they play the smallest rendition at least this high.
+VIDEO_PLAYER_HEIGHT = 480
+
 #: How many days a user has until activation time expires. Django-registration related setting.
 ACCOUNT_ACTIVATION_DAYS = 7
 #: A boolean indicating whether registration of new accounts is currently permitted.
@@ -214,12 +237,45 @@ DEFAULT_DATASET_ACRONYM = os.getenv("DEFAULT_DATASET_ACRONYM", "NZSL")
 WRITABLE_FOLDER_NAME = os.getenv("WRITABLE_FOLDER_NAME", "writable")
 WRITABLE_FOLDER = os.path.join(PROJECT_DIR, WRITABLE_FOLDER_NAME)
 pathlib.Path(WRITABLE_FOLDER).mkdir(parents=True, exist_ok=True)
-PACKAGES_FOLDER_NAME = os.getenv("PACKAGES_FOLDER_NAME", "packages")
-SIGNBANK_PACKAGES_FOLDER = os.path.join(WRITABLE_FOLDER, PACKAGES_FOLDER_NAME)
-pathlib.Path(SIGNBANK_PACKAGES_FOLDER).mkdir(parents=True, exist_ok=True)
 LANGUAGE_NAME = os.getenv("LANGUAGE_NAME", "NZSL")
 COUNTRY_NAME = os.getenv("COUNTRY_NAME", "New Zealand")
 USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", 'false').lower() == 'true'
+#: Who sends the protected media files: '' for Django, 'x-sendfile' or 'x-accel-redirect' for the web server.
+MEDIA_SENDFILE = os.getenv("MEDIA_SENDFILE", 'x-sendfile' if USE_X_SENDFILE else '')
+#: The internal location of the WRITABLE_FOLDER in nginx, for MEDIA_SENDFILE = 'x-accel-redirect'.
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv("MEDIA_ACCEL_REDIRECT_PREFIX", "/protected_media/")
+
+#: The backend of the advanced gloss search: 'postgres' uses the indexed GlossSearchDocuments and ranks the results,
+#: 'substring' searches the gloss fields with icontains and works on any database.
+GLOSS_SEARCH_BACKEND = os.getenv("GLOSS_SEARCH_BACKEND", "postgres")
+
+#: How many seconds the gloss ids of a users last advanced search are cached for the gloss detail navigation.
+SEARCH_RESULTS_CACHE_TIMEOUT = 60 * 30
+#: The maximum number of gloss ids cached for a search.
+SEARCH_RESULTS_MAX_IDS = 3000
+#: The largest page size of the advanced search lists.
+PAGINATE_BY_MAX = 3000
+#: The advanced search lists use the planners estimate instead of counting, when it estimates at least this many rows.
+PAGINATOR_EXACT_COUNT_LIMIT = 10000
+#: The Gloss FieldChoice ForeignKeys and ManyToManyFields, and 'tags', the advanced search shows counts for.
+GLOSS_LIST_FACETS = ('handedness', 'strong_handshape', 'location', 'wordclasses', 'semantic_field', 'usage', 'tags')
+#: How many seconds the facet counts of a search are cached for.
+SEARCH_FACETS_CACHE_TIMEOUT = 60 * 5
+#: How many seconds a process keeps its FieldChoice registry before reloading it. Saving a FieldChoice reloads the
+#: registries of all processes that share the cache right away, this limits how long the others can be out of date.
+FIELDCHOICE_REGISTRY_TIMEOUT = 60 * 5
+#: How many seconds the Dataset permissions of a user are cached for. They are only cached when the default cache is
+#: shared between the processes (not LocMemCache), changing permissions clears them right away in all of them.
+DATASET_PERMISSIONS_CACHE_TIMEOUT = 60
+#: How many seconds the encoded glosses of a Dataset are cached for the gloss detail editor. They are cached under
+#: their version, so changes to the glosses are never served from the cache.
+REFERENCE_DATA_CACHE_TIMEOUT = 60 * 60
+#: How many seconds the lexicons, sign languages and first letters of the public gloss list are cached for. Changes
+#: clear them right away in processes that share the cache, this limits how long the others show the old ones.
+PUBLIC_INDEX_CACHE_TIMEOUT = 60 * 15
+#: How many seconds the rendered shards of the sitemap are cached for. They are cached under their ETag, so changes to
+#: the public glosses or the flatpages are never served from the cache.
+SITEMAP_CACHE_TIMEOUT = 60 * 60
 
 # Set up SMTP
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -1,8 +1,22 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import atexit
+import shutil
+import tempfile
+
 from signbank.settings.development import *
 
 # Always use local file storage when running tests
 DEFAULT_FILE_STORAGE = "django.core.files.storage.FileSystemStorage"
 GLOSS_VIDEO_FILE_STORAGE = 'signbank.video.models.GlossVideoStorage'
+
+# The files the tests upload and write, and their log, go into a temporary directory that is removed afterwards,
+# so that they are not left behind in the project directory.
+TEST_FILES_ROOT = tempfile.mkdtemp(prefix='signbank-tests-')
+atexit.register(shutil.rmtree, TEST_FILES_ROOT, ignore_errors=True)
+MEDIA_ROOT = os.path.join(TEST_FILES_ROOT, 'media')
+UPLOAD_ROOT = os.path.join(MEDIA_ROOT, 'upload/')
+WRITABLE_FOLDER = os.path.join(TEST_FILES_ROOT, WRITABLE_FOLDER_NAME)
+pathlib.Path(WRITABLE_FOLDER).mkdir(parents=True, exist_ok=True)
+LOGGING['handlers']['file']['filename'] = os.path.join(TEST_FILES_ROOT, 'debug.log')
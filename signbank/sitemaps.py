@@ -1,9 +1,21 @@
-from django.urls import reverse
+"""
+The sitemap is an index of sections, which are split into shards of at most Sitemap.limit URLs each. The shards of the
+glosses only select the ids and the update times of the public glosses, and the rendered shards are cached under their
+ETag, so crawlers polling the sitemap of a growing dictionary are answered from the cache or with 304 Not Modified.
+"""
+from django.conf import settings
 from django.contrib import sitemaps
-from django.contrib.flatpages.sitemaps import FlatPageSitemap
 from django.contrib.admin.models import LogEntry
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.flatpages.sitemaps import FlatPageSitemap
+from django.contrib.sitemaps.views import sitemap
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import HttpResponse
+from django.urls import reverse
+from django.views.decorators.http import require_safe
 
+from .dictionary.conditionalget import conditional_get, sitemap_validators
 from .dictionary.models import Gloss
 
 
@@ -22,15 +34,18 @@ class GlossSitemap(sitemaps.Sitemap):
     changefreq = 'weekly'
     priority = 0.5
     protocol = 'https'
+    #: The number of glosses in a shard.
+    limit = 5000
 
     def items(self):
-        return Gloss.objects.filter(dataset__is_public=True).filter(published=True)
+        return Gloss.objects.filter(dataset__is_public=True, published=True).order_by('pk').values_list(
+            'pk', 'updated_at', named=True)
 
     def lastmod(self, obj):
         return obj.updated_at
 
     def location(self, obj):
-        return obj.get_public_absolute_url()
+        return reverse('dictionary:public_gloss_view', args=[str(obj.pk)])
 
 
 class SignbankFlatPageSiteMap(FlatPageSitemap):
@@ -38,8 +53,43 @@ class SignbankFlatPageSiteMap(FlatPageSitemap):
     priority = 0.6
     protocol = 'https'
 
+    def items(self):
+        flatpages = list(super(SignbankFlatPageSiteMap, self).items())
+        if flatpages:
+            # The latest admin LogEntry of each flatpage, in one query.
+            self.flatpage_lastmods = dict(LogEntry.objects.filter(
+                content_type=ContentType.objects.get_for_model(type(flatpages[0])),
+                object_id__in=[str(flatpage.pk) for flatpage in flatpages]).values('object_id').annotate(
+                lastmod=Max('action_time')).values_list('object_id', 'lastmod'))
+        return flatpages
+
     def lastmod(self, obj):
-        ct = ContentType.objects.get_for_model(type(obj))
-        print(type(obj))
-        return LogEntry.objects.filter(content_type=ct, object_id=obj.id).order_by('-action_time').first().action_time
+        return self.flatpage_lastmods.get(str(obj.pk))
+
+
+SITEMAPS = {
+    'flatpages': SignbankFlatPageSiteMap,
+    'static': StaticViewSitemap,
+    'gloss': GlossSitemap,
+}
+
 
+@require_safe
+@conditional_get(sitemap_validators)
+def sitemap_section(request, section):
+    """A shard of a section of the sitemap, the page is in the query string."""
+    cache_key = 'sitemap:{etag}'.format(etag=request.etag)
+    cached = cache.get(cache_key)
+    if cached is None:
+        response = sitemap(request, sitemaps=SITEMAPS, section=section)
+        if response.status_code != 200:
+            return response
+        response.render()
+        cached = (response.content, response.get('Last-Modified'))
+        cache.set(cache_key, cached, settings.SITEMAP_CACHE_TIMEOUT)
+    content, lastmod = cached
+    response = HttpResponse(content, content_type='application/xml')
+    response['X-Robots-Tag'] = 'noindex, noodp, noarchive'
+    if lastmod:
+        response['Last-Modified'] = lastmod
+    return response
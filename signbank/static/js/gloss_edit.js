@@ -239,36 +239,41 @@ function configure_edit() {
         })
      });
 
-     $('.edit_assignable_user').on('click', function() {
-        var choices = { "": "--Unassigned--" }
-        var selected = ""
-
-        assignable_users.forEach(user => {
-            user.label === this.textContent && (selected = user.value.toString());
-            choices[user.value] = user.label;
-        });
-
-        $(this).editable(edit_post_url, {
-            type      : 'select',
-            sortselectoptions: true,
-            data    : $.extend(choices, { selected: selected })
-        });
+     // The choices are fetched after the page has loaded, the editors are set up once they have arrived.
+     load_reference_data('assignable-users').done(function(assignable_users) {
+         $('.edit_assignable_user').on('click', function() {
+            var choices = { "": "--Unassigned--" }
+            var selected = ""
+
+            assignable_users.forEach(([value, label]) => {
+                label === this.textContent && (selected = value.toString());
+                choices[value] = label;
+            });
+
+            $(this).editable(edit_post_url, {
+                type      : 'select',
+                sortselectoptions: true,
+                data    : $.extend(choices, { selected: selected })
+            });
+         });
      });
 
-     $('.edit_lemma').on('click', function() {
-        var choices = { "": "--None--" }
-        var selected = ""
-
-        lemmas.forEach(lemma => {
-            lemma.name === this.textContent && (selected = lemma.name.toString());
-            choices[lemma.name] = lemma.name;
-        });
-
-        $(this).editable(edit_post_url, {
-            type      : 'select',
-            sortselectoptions: true,
-            data    : $.extend(choices, { selected: selected })
-        });
+     load_reference_data('lemmas').done(function(lemmas) {
+         $('.edit_lemma').on('click', function() {
+            var choices = { "": "--None--" }
+            var selected = ""
+
+            lemmas.forEach(name => {
+                name === this.textContent && (selected = name);
+                choices[name] = name;
+            });
+
+            $(this).editable(edit_post_url, {
+                type      : 'select',
+                sortselectoptions: true,
+                data    : $.extend(choices, { selected: selected })
+            });
+         });
      });
 
      $('.edit_list').on('click', function() {
@@ -6,7 +6,7 @@ from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.flatpages import views as flatpages_views
-from django.contrib.sitemaps.views import sitemap
+from django.contrib.sitemaps import views as sitemaps_views
 from django.urls import include, path, re_path
 # Views
 from django.views.generic.base import TemplateView
@@ -17,9 +17,10 @@ from .comments import (CommentListView, edit_comment, latest_comments,
 # Forms
 from .customregistration.forms import CustomUserForm
 from .customregistration.views import ActivationView
+from .dictionary.conditionalget import conditional_get, sitemap_validators
 from .dictionary.adminviews import GlossListView
 from .editorial_queue import get_queue_items
-from .sitemaps import GlossSitemap, SignbankFlatPageSiteMap, StaticViewSitemap
+from .sitemaps import SITEMAPS, sitemap_section
 from .tools import infopage
 
 # Application namespace
@@ -29,10 +30,9 @@ urlpatterns = [
     # Root page
     path('', flatpages_views.flatpage, {'url': '/'}, name='root_page'),
 
-    path('sitemap.xml', sitemap, {'sitemaps': {'flatpages': SignbankFlatPageSiteMap,
-                                               'static': StaticViewSitemap,
-                                               'gloss': GlossSitemap, }},
-         name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap.xml', conditional_get(sitemap_validators)(sitemaps_views.index), {'sitemaps': SITEMAPS},
+         name='sitemap_index'),
+    path('sitemap-<slug:section>.xml', sitemap_section, name='django.contrib.sitemaps.views.sitemap'),
 
     # This allows to change the translations site language
     path('i18n/', include('django.conf.urls.i18n')),
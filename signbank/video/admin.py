@@ -6,7 +6,7 @@ from django.db.models import Count
 from django.utils.translation import ugettext as _
 from django.utils.translation import ugettext_lazy as _lazy
 
-from .models import GlossVideo, GlossVideoToken
+from .models import GlossVideo, GlossVideoToken, PosterJob, PosterThumbnail, TranscodeJob, VideoRendition
 
 
 class HasGlossFilter(admin.SimpleListFilter):
@@ -110,6 +110,32 @@ class GlossVideoTokenAdmin(admin.ModelAdmin):
 
     list_display = ("video", "token")
 
+class PosterJobAdmin(admin.ModelAdmin):
+    model = PosterJob
+    raw_id_fields = ('glossvideo',)
+    list_display = ("videofile", "status", "created_at", "finished_at")
+    list_filter = ["status"]
+    readonly_fields = ("created_at", "started_at", "finished_at")
+
+
+class PosterThumbnailAdmin(admin.ModelAdmin):
+    model = PosterThumbnail
+    raw_id_fields = ('glossvideo',)
+    list_display = ("file", "width", "format")
+    list_filter = ["format", "width"]
+
+
+class TranscodeJobAdmin(PosterJobAdmin):
+    model = TranscodeJob
+
+
+class VideoRenditionAdmin(admin.ModelAdmin):
+    model = VideoRendition
+    raw_id_fields = ('glossvideo',)
+    list_display = ("file", "name", "width", "height", "size")
+    list_filter = ["name"]
+
+
 class GlossVideoInline(admin.TabularInline):
     model = GlossVideo
     extra = 0
@@ -117,3 +143,7 @@ class GlossVideoInline(admin.TabularInline):
 
 admin.site.register(GlossVideo, GlossVideoAdmin)
 admin.site.register(GlossVideoToken, GlossVideoTokenAdmin)
+admin.site.register(PosterJob, PosterJobAdmin)
+admin.site.register(PosterThumbnail, PosterThumbnailAdmin)
+admin.site.register(TranscodeJob, TranscodeJobAdmin)
+admin.site.register(VideoRendition, VideoRenditionAdmin)
@@ -3,7 +3,8 @@ from __future__ import unicode_literals
 
 from django import forms
 from django.utils.translation import ugettext_lazy as _
-from signbank.dictionary.models import Dataset, FieldChoice, Gloss
+from signbank.dictionary.forms import FieldChoiceField
+from signbank.dictionary.models import Dataset, Gloss
 
 from .models import GlossVideo
 
@@ -32,9 +33,8 @@ class GlossVideoForGlossForm(forms.ModelForm):
     """Form for GlossVideo with Gloss."""
     redirect = forms.CharField(widget=forms.HiddenInput, required=False)
     webcam = forms.BooleanField(required=False)
-    video_type = forms.ModelChoiceField(label=_('Type'), queryset=FieldChoice.objects.filter(field='video_type'),
-                                        to_field_name='machine_value', empty_label=None, required=True,
-                                        widget=forms.Select(attrs={'required': True}))
+    video_type = FieldChoiceField('video_type', label=_('Type'), to_field_name='machine_value', empty_label=None,
+                                  required=True, widget=forms.Select(attrs={'required': True}))
 
     class Meta:
         model = GlossVideo
@@ -49,9 +49,8 @@ class GlossVideoUpdateForm(forms.ModelForm):
             'required': True,
             'id': 'id_gloss',
             'class': 'gloss-autocomplete'}))
-    video_type = forms.ModelChoiceField(label=_('Type'), queryset=FieldChoice.objects.filter(field='video_type'),
-                                        to_field_name='machine_value', empty_label=None, required=True,
-                                        widget=forms.Select(attrs={'required': True}))
+    video_type = FieldChoiceField('video_type', label=_('Type'), to_field_name='machine_value', empty_label=None,
+                                  required=True, widget=forms.Select(attrs={'required': True}))
 
     class Meta:
         model = GlossVideo
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+The queues of the background VideoJobs on the videofiles of the GlossVideos, the PosterJobs of posters.py and the
+TranscodeJobs of renditions.py, and running ffmpeg and ffprobe on the videofiles.
+
+A job is queued when a GlossVideo of a video is created or its videofile changes, the jobs of a videofile renamed by
+GlossVideo.rename_video() are kept. Workers claim the pending jobs with claim_next_job(), several processes can run
+them at the same time, see run_jobs_in_pool(). A job still running after its timeout has lost its worker (e.g. it was
+killed), it is claimed again.
+"""
+from __future__ import unicode_literals
+
+import datetime
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import GlossVideo, VideoJob
+
+
+def is_video(glossvideo):
+    """Returns True if the videofile of glossvideo is a video, the jobs only process videos."""
+    return bool(glossvideo.videofile) and (glossvideo.get_content_type() or '').startswith('video/')
+
+
+def queue_job(model, glossvideo):
+    """Queues a job of model for the current videofile of glossvideo and returns it, None if it has one already."""
+    if not is_video(glossvideo):
+        return None
+    if model.objects.filter(glossvideo=glossvideo, videofile=glossvideo.videofile.name).exists():
+        return None
+    return model.objects.create(glossvideo=glossvideo, videofile=glossvideo.videofile.name)
+
+
+def queue_missing_jobs(model, glossvideos=None):
+    """
+    Queues a job of model for the videos with no pending, running or finished job of their videofile, of the
+    glossvideos queryset if given.
+    """
+    current_jobs = model.objects.filter(glossvideo=OuterRef('pk'), videofile=OuterRef('videofile')).exclude(
+        status=VideoJob.Status.FAILED)
+    if glossvideos is None:
+        glossvideos = GlossVideo.objects.all()
+    glossvideos = glossvideos.exclude(videofile='').exclude(Exists(current_jobs)).order_by('pk')
+    jobs = [model(glossvideo=glossvideo, videofile=glossvideo.videofile.name)
+            for glossvideo in glossvideos.iterator() if is_video(glossvideo)]
+    model.objects.bulk_create(jobs, batch_size=1000)
+    return len(jobs)
+
+
+def claim_next_job(model):
+    """
+    Marks the oldest pending job of model, or running job that lost its worker, as running and returns it, or None
+    if there is nothing to do.
+    """
+    lost = Q(status=VideoJob.Status.RUNNING,
+             started_at__lt=timezone.now() - datetime.timedelta(seconds=model.get_timeout()))
+    with transaction.atomic():
+        # Rows locked by other workers are skipped, so several workers can run at the same time.
+        job = (model.objects.select_for_update(skip_locked=True)
+               .filter(Q(status=VideoJob.Status.PENDING) | lost).order_by('created_at', 'pk').first())
+        if job is None:
+            return None
+        job.status = VideoJob.Status.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+    return job
+
+
+def run_job(job, process):
+    """Runs process(glossvideo, video_path) for the videofile of job, and marks the job finished or failed."""
+    # The videofile may have been renamed since the job was claimed.
+    job.refresh_from_db(fields=['videofile'])
+    glossvideo = job.glossvideo
+    try:
+        if glossvideo.videofile.name != job.videofile:
+            raise RuntimeError("The videofile has changed to %s." % glossvideo.videofile.name)
+        with local_path(glossvideo.videofile) as video_path:
+            process(glossvideo, video_path)
+    except Exception as e:
+        job.status = VideoJob.Status.FAILED
+        job.error = str(e)
+        job.finished_at = timezone.now()
+        # Not the videofile, it is changed when the file is renamed.
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        raise
+
+    job.status = VideoJob.Status.FINISHED
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'finished_at'])
+    return job
+
+
+def run_queued_jobs(model, run):
+    """Runs the queued jobs of model with run(job) until there are none left, returns the (finished, failed) counts."""
+    finished, failed = 0, 0
+    while True:
+        job = claim_next_job(model)
+        if job is None:
+            return finished, failed
+        try:
+            run(job)
+            finished += 1
+        except Exception:
+            # The job has been marked as failed, carry on with the next one.
+            failed += 1
+
+
+def run_queued_jobs_in_process(model, run, number):
+    """run_queued_jobs() in a process of the pool, number is the number of the process."""
+    try:
+        return run_queued_jobs(model, run)
+    finally:
+        connections.close_all()
+
+
+def run_jobs_in_pool(model, run, processes):
+    """Runs the queued jobs of model in processes processes and returns the (finished, failed) counts."""
+    if processes <= 1:
+        return run_queued_jobs(model, run)
+    # The forked processes must not share the database connection of this one, they open their own.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('fork')) as pool:
+        results = list(pool.map(partial(run_queued_jobs_in_process, model, run), range(processes)))
+    return tuple(sum(counts) for counts in zip(*results))
+
+
+def save_file(field, glossvideo, extension, content):
+    """
+    Saves content into the storage of the file field under a new name of glossvideo with extension, and returns the
+    name. The names are unique so that the files of a job never replace the ones in use, S3 overwrites equal names.
+    """
+    name = glossvideo.create_poster_filename("%s.%s" % (uuid.uuid4().hex[:8], extension))
+    return field.storage.save(field.generate_filename(None, name), content)
+
+
+def delete_files_on_commit(storage, names):
+    """Deletes the files names from storage once the transaction that stopped using them is committed."""
+    def delete_files():
+        for name in names:
+            storage.delete(name)
+    transaction.on_commit(delete_files)
+
+
+@contextmanager
+def local_path(fieldfile):
+    """Yields a local path of fieldfile, a temporary copy when the storage has no local paths (S3)."""
+    try:
+        path = fieldfile.storage.path(fieldfile.name)
+    except NotImplementedError:
+        path = None
+    if path is not None:
+        yield path
+        return
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(fieldfile.name)[1]) as copy:
+        with fieldfile.storage.open(fieldfile.name, 'rb') as original:
+            shutil.copyfileobj(original, copy)
+        copy.flush()
+        yield copy.name
+
+
+def run_command(*args, timeout=None):
+    """Runs ffmpeg or ffprobe and returns its output."""
+    try:
+        return subprocess.run(args, check=True, capture_output=True, text=True,
+                              timeout=timeout or settings.FFMPEG_TIMEOUT).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError("%s: %s" % (e, e.stderr.strip()))
+
+
+def get_duration(video_path):
+    """Returns the duration of the video in seconds, 0 if ffprobe does not know it."""
+    output = run_command(settings.FFPROBE_BINARY, '-v', 'error', '-show_entries', 'format=duration',
+                         '-of', 'default=noprint_wrappers=1:nokey=1', video_path)
+    try:
+        return float(output.strip())
+    except ValueError:
+        return 0.0
+
+
+def get_dimensions(video_path):
+    """Returns the (width, height) of the first video stream of the video."""
+    output = run_command(settings.FFPROBE_BINARY, '-v', 'error', '-select_streams', 'v:0',
+                         '-show_entries', 'stream=width,height', '-of', 'csv=p=0', video_path)
+    width, height = output.strip().split(',')[:2]
+    return int(width), int(height)
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""This command extracts the posters and thumbnails of the videos that have no poster"""
+from __future__ import unicode_literals
+
+import os
+
+from django.core.management.base import BaseCommand
+
+from signbank.video.posters import queue_missing_poster_jobs, run_poster_jobs_in_pool
+
+
+class Command(BaseCommand):
+    help = 'queue poster jobs for the videos without a poster and run them in a pool of processes'
+    args = ''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                            help='how many processes run the jobs, the number of CPUs by default')
+
+    def handle(self, *args, **options):
+        self.stdout.write("Queued %d poster jobs" % queue_missing_poster_jobs())
+        finished, failed = run_poster_jobs_in_pool(options['processes'])
+        self.stdout.write("Finished %d poster jobs, %d failed" % (finished, failed))
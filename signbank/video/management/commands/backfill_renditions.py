@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""This command transcodes the videos that have no renditions of their current file"""
+from __future__ import unicode_literals
+
+import os
+
+from django.core.management.base import BaseCommand
+
+from signbank.video.renditions import queue_missing_transcode_jobs, run_transcode_jobs_in_pool
+
+
+class Command(BaseCommand):
+    help = 'queue transcode jobs for the videos without renditions of their file and run them in a pool of processes'
+    args = ''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                            help='how many processes run the jobs, the number of CPUs by default')
+
+    def handle(self, *args, **options):
+        self.stdout.write("Queued %d transcode jobs" % queue_missing_transcode_jobs())
+        finished, failed = run_transcode_jobs_in_pool(options['processes'])
+        self.stdout.write("Finished %d transcode jobs, %d failed" % (finished, failed))
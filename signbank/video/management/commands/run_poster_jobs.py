@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""This command extracts the posters and thumbnails of the queued PosterJobs"""
+from __future__ import unicode_literals
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from signbank.video.posters import run_poster_jobs_in_pool
+
+
+class Command(BaseCommand):
+    help = 'poll the database for queued poster jobs and run them'
+    args = ''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='run the queued jobs and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='seconds to wait between polls when the queue is empty')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='how many processes run the jobs')
+
+    def handle(self, *args, **options):
+        while True:
+            finished, failed = run_poster_jobs_in_pool(options['processes'])
+            if finished or failed:
+                self.stdout.write("Finished %d poster jobs, %d failed" % (finished, failed))
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""This command transcodes the videos of the queued TranscodeJobs into their renditions"""
+from __future__ import unicode_literals
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from signbank.video.renditions import run_transcode_jobs_in_pool
+
+
+class Command(BaseCommand):
+    help = 'poll the database for queued transcode jobs and run them'
+    args = ''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='run the queued jobs and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='seconds to wait between polls when the queue is empty')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='how many processes run the jobs')
+
+    def handle(self, *args, **options):
+        while True:
+            finished, failed = run_transcode_jobs_in_pool(options['processes'])
+            if finished or failed:
+                self.stdout.write("Finished %d transcode jobs, %d failed" % (finished, failed))
+            if options['once']:
+                return
+            time.sleep(options['interval'])
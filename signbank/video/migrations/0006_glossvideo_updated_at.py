@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-17 07:24
+
+from django.db import migrations, models
+
+
+def set_updated_at_from_files(apps, schema_editor):
+    """Sets updated_at of the existing GlossVideos to the modification time of their video file, where available."""
+    GlossVideo = apps.get_model('video', 'GlossVideo')
+    for glossvideo in GlossVideo.objects.exclude(videofile='').only('pk', 'videofile').iterator():
+        try:
+            modified_time = glossvideo.videofile.storage.get_modified_time(glossvideo.videofile.name)
+        except (NotImplementedError, OSError, ValueError):
+            continue
+        GlossVideo.objects.filter(pk=glossvideo.pk).update(updated_at=modified_time)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video', '0005_glossvideotoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='glossvideo',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(set_updated_at_from_files, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='glossvideo',
+            index=models.Index(fields=['gloss', 'updated_at'], name='glossvideo_gloss_updated_idx'),
+        ),
+    ]
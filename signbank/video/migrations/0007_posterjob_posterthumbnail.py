@@ -0,0 +1,49 @@
+# Generated by Django 3.2.25 on 2026-10-17 07:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+import signbank.video.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video', '0006_glossvideo_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PosterJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('videofile', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('finished', 'Finished'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('glossvideo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='poster_jobs', to='video.glossvideo')),
+            ],
+            options={
+                'verbose_name': 'Poster job',
+                'verbose_name_plural': 'Poster jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PosterThumbnail',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('width', models.PositiveIntegerField()),
+                ('format', models.CharField(choices=[('jpeg', 'JPEG'), ('webp', 'WebP')], max_length=10)),
+                ('file', models.FileField(storage=signbank.video.models.GlossVideoDynamicStorage(), upload_to='posters/thumbnails')),
+                ('glossvideo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='thumbnails', to='video.glossvideo')),
+            ],
+            options={
+                'verbose_name': 'Poster thumbnail',
+                'verbose_name_plural': 'Poster thumbnails',
+                'ordering': ['glossvideo', 'width', 'format'],
+                'unique_together': {('glossvideo', 'width', 'format')},
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-17 07:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+import signbank.video.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video', '0007_posterjob_posterthumbnail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscodeJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('videofile', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('finished', 'Finished'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('glossvideo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transcode_jobs', to='video.glossvideo')),
+            ],
+            options={
+                'verbose_name': 'Transcode job',
+                'verbose_name_plural': 'Transcode jobs',
+                'ordering': ['-created_at'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='VideoRendition',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(choices=[('web', 'Web'), ('mobile', 'Mobile'), ('hls', 'HLS')], max_length=20)),
+                ('file', models.FileField(storage=signbank.video.models.GlossVideoDynamicStorage(), upload_to='renditions')),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('size', models.PositiveBigIntegerField()),
+                ('videofile', models.CharField(max_length=255)),
+                ('glossvideo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='video.glossvideo')),
+            ],
+            options={
+                'verbose_name': 'Video rendition',
+                'verbose_name_plural': 'Video renditions',
+                'ordering': ['glossvideo', 'height', 'name'],
+                'unique_together': {('glossvideo', 'name')},
+            },
+        ),
+    ]
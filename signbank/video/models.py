@@ -48,6 +48,10 @@ class GlossVideoDynamicStorage(import_string(settings.GLOSS_VIDEO_FILE_STORAGE))
 
             return f'{domain}{path}'
 
+    def has_signed_urls(self):
+        """Returns True if the URLs of the files are signed, only for S3 storage with querystring auth."""
+        return isinstance(self, S3Boto3Storage) and self.querystring_auth
+
     def set_public(self, name, is_public):
         """ Set the object ACL on the object. This is only supported
         for S3 storage, and is a no-op for local file storage
@@ -102,11 +106,17 @@ class GlossVideo(models.Model):
         help_text=_("The type of video this is for on the gloss"),
         limit_choices_to={'field': 'video_type'},
         null=True, on_delete=models.SET_NULL)
+    #: The DateTime when the GlossVideo or its files were last updated.
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['version']
         verbose_name = _('Gloss video')
         verbose_name_plural = _('Gloss videos')
+        indexes = [
+            # The package endpoint finds the GlossVideos of the Glosses of a Dataset updated since a time.
+            models.Index(fields=['gloss', 'updated_at'], name='glossvideo_gloss_updated_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         creating = self._state.adding
@@ -198,6 +208,12 @@ class GlossVideo(models.Model):
                 self.videofile = saved_file_path
 
                 old_file.storage.delete(old_file.name)
+                self.rename_videofile_references(old_file.name, saved_file_path)
+
+    def rename_videofile_references(self, old_name, new_name):
+        """The content of a renamed videofile has not changed, its jobs and renditions are those of the new name."""
+        for model in (PosterJob, TranscodeJob, VideoRendition):
+            model.objects.filter(glossvideo=self, videofile=old_name).update(videofile=new_name)
 
     def create_filename(self):
         """Returns a correctly named filename"""
@@ -251,6 +267,42 @@ class GlossVideo(models.Model):
 
         True
 
+    def get_current_renditions(self):
+        """
+        Returns the VideoRenditions transcoded from the current videofile. Those of a replaced videofile are ignored
+        until the TranscodeJob of the new one replaces them.
+        """
+        return [rendition for rendition in self.renditions.all() if rendition.videofile == self.videofile.name]
+
+    @staticmethod
+    def choose_rendition(renditions, height=None):
+        """
+        Returns the smallest MP4 VideoRendition of renditions at least height pixels high, settings.VIDEO_PLAYER_HEIGHT
+        by default, or the highest one if none is that high. None if there are none.
+        """
+        renditions = [rendition for rendition in renditions if not rendition.is_hls()]
+        if not renditions:
+            return None
+        height = min(height or settings.VIDEO_PLAYER_HEIGHT, max(rendition.height for rendition in renditions))
+        return min((rendition for rendition in renditions if rendition.height >= height),
+                   key=lambda rendition: rendition.size)
+
+    def get_rendition(self, height=None):
+        """Returns the smallest suitable VideoRendition of the current videofile, see choose_rendition()."""
+        return self.choose_rendition(self.get_current_renditions(), height)
+
+    def get_sources(self):
+        """Returns the (URL, content type) of the sources of a video player, the preferred first."""
+        renditions = self.get_current_renditions()
+        # The segments of a playlist are not signed, see renditions.py.
+        sources = [(rendition.file.url, rendition.get_content_type()) for rendition in renditions
+                   if rendition.is_hls() and not rendition.file.storage.has_signed_urls()]
+        rendition = self.choose_rendition(renditions)
+        if rendition is not None:
+            sources.append((rendition.file.url, rendition.get_content_type()))
+        sources.append((self.get_absolute_url(), self.get_content_type()))
+        return sources
+
     def has_poster(self):
         """Returns true if the glossvideo has a poster file."""
         if self.posterfile:
@@ -268,6 +320,124 @@ class GlossVideo(models.Model):
         return self.videofile.name
 
 
+class PosterThumbnail(models.Model):
+    """A scaled down image of the poster of a GlossVideo, generated with the poster by the run_poster_jobs command."""
+
+    class Format(models.TextChoices):
+        JPEG = "jpeg", "JPEG"
+        WEBP = "webp", "WebP"
+
+    glossvideo = models.ForeignKey(GlossVideo, related_name="thumbnails", on_delete=models.CASCADE)
+    #: The width of the thumbnail in pixels, the height keeps the aspect ratio of the video.
+    width = models.PositiveIntegerField()
+    format = models.CharField(max_length=10, choices=Format.choices)
+    file = models.FileField(upload_to=os.path.join("posters", "thumbnails"), storage=GlossVideoDynamicStorage())
+
+    class Meta:
+        ordering = ['glossvideo', 'width', 'format']
+        unique_together = ('glossvideo', 'width', 'format')
+        verbose_name = _('Poster thumbnail')
+        verbose_name_plural = _('Poster thumbnails')
+
+    def __str__(self):
+        return self.file.name
+
+
+class VideoJob(models.Model):
+    """A background job on the videofile of a GlossVideo, see jobs.py."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        FINISHED = "finished", _("Finished")
+        FAILED = "failed", _("Failed")
+
+    #: The name of the videofile the job is for, a new job is queued when the file changes.
+    videofile = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING, db_index=True)
+    #: Error message of a failed job.
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+        ordering = ['-created_at']
+
+    @classmethod
+    def get_timeout(cls):
+        """Returns how many seconds a job can run, a running job older than this has lost its worker."""
+        raise NotImplementedError
+
+    def __str__(self):
+        return "%s: %s" % (self.videofile, self.get_status_display())
+
+
+class PosterJob(VideoJob):
+    """The extraction of the poster and the thumbnails of the videofile of a GlossVideo, see posters.py."""
+    glossvideo = models.ForeignKey(GlossVideo, related_name="poster_jobs", on_delete=models.CASCADE)
+
+    class Meta(VideoJob.Meta):
+        verbose_name = _('Poster job')
+        verbose_name_plural = _('Poster jobs')
+
+    @classmethod
+    def get_timeout(cls):
+        # ffprobe, the extraction, the scaling of each thumbnail, and the copies of the files.
+        return (3 + 2 * len(settings.POSTER_THUMBNAIL_WIDTHS)) * settings.FFMPEG_TIMEOUT
+
+
+class TranscodeJob(VideoJob):
+    """The transcoding of the videofile of a GlossVideo into its VideoRenditions, see renditions.py."""
+    glossvideo = models.ForeignKey(GlossVideo, related_name="transcode_jobs", on_delete=models.CASCADE)
+
+    class Meta(VideoJob.Meta):
+        verbose_name = _('Transcode job')
+        verbose_name_plural = _('Transcode jobs')
+
+    @classmethod
+    def get_timeout(cls):
+        # Each rendition and the HLS segments, ffprobe of each rendition, and the copies of the files.
+        renditions = len(settings.VIDEO_RENDITIONS)
+        return (renditions + 1) * settings.VIDEO_TRANSCODE_TIMEOUT + (renditions + 1) * settings.FFMPEG_TIMEOUT
+
+
+class VideoRendition(models.Model):
+    """A smaller version of the videofile of a GlossVideo, transcoded by the run_transcode_jobs command."""
+
+    class Name(models.TextChoices):
+        WEB = "web", _("Web")
+        MOBILE = "mobile", _("Mobile")
+        HLS = "hls", _("HLS")
+
+    glossvideo = models.ForeignKey(GlossVideo, related_name="renditions", on_delete=models.CASCADE)
+    name = models.CharField(max_length=20, choices=Name.choices)
+    #: The MP4 file, or the playlist of the segments of HLS.
+    file = models.FileField(upload_to="renditions", storage=GlossVideoDynamicStorage())
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    #: The size of the file in bytes, of all the segments for HLS.
+    size = models.PositiveBigIntegerField()
+    #: The name of the videofile the rendition was transcoded from.
+    videofile = models.CharField(max_length=255)
+
+    class Meta:
+        ordering = ['glossvideo', 'height', 'name']
+        unique_together = ('glossvideo', 'name')
+        verbose_name = _('Video rendition')
+        verbose_name_plural = _('Video renditions')
+
+    def is_hls(self):
+        return self.name == self.Name.HLS
+
+    def get_content_type(self):
+        return 'application/vnd.apple.mpegurl' if self.is_hls() else 'video/mp4'
+
+    def __str__(self):
+        return self.file.name
+
+
 class GlossVideoToken(models.Model):
     token = models.UUIDField(default=uuid.uuid4)
     video = models.ForeignKey(to=GlossVideo, on_delete=models.CASCADE)
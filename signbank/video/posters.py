@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Posters and thumbnails of the GlossVideos, extracted from their videofiles with ffmpeg by PosterJobs, see jobs.py.
+
+The run_poster_jobs command runs the queued jobs, and the backfill_posters command queues the videos that have no
+poster and runs them in a pool of processes. The backfill leaves the posters the editors chose alone, and a job keeps
+a poster that was saved after the job was queued, i.e. one an editor chose for the current videofile.
+
+The poster is the frame at settings.POSTER_FRAME_POSITION of the duration of the video, saved as the JPEG posterfile
+of the GlossVideo, and it is scaled to a PosterThumbnail of each of settings.POSTER_THUMBNAIL_WIDTHS in each of the
+PosterThumbnail formats.
+"""
+from __future__ import unicode_literals
+
+import os
+import tempfile
+from functools import partial
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+
+from .jobs import (delete_files_on_commit, get_duration, queue_job, queue_missing_jobs, run_command, run_job,
+                   run_jobs_in_pool, save_file)
+from .models import GlossVideo, PosterJob, PosterThumbnail
+
+#: The file extensions of the PosterThumbnail formats.
+THUMBNAIL_EXTENSIONS = {
+    PosterThumbnail.Format.JPEG: 'jpg',
+    PosterThumbnail.Format.WEBP: 'webp',
+}
+
+
+def queue_poster_job(glossvideo):
+    """Queues a PosterJob for the current videofile of glossvideo and returns it, None if it has one already."""
+    return queue_job(PosterJob, glossvideo)
+
+
+def queue_missing_poster_jobs():
+    """Queues a PosterJob for the videos with no poster and no pending, running or finished job of their videofile."""
+    return queue_missing_jobs(PosterJob, GlossVideo.objects.filter(posterfile=''))
+
+
+def delete_thumbnail_files_on_commit(glossvideo):
+    """Deletes the files of the PosterThumbnails of glossvideo once the transaction deleting them is committed."""
+    delete_files_on_commit(PosterThumbnail._meta.get_field('file').storage,
+                           list(glossvideo.thumbnails.values_list('file', flat=True)))
+
+
+def extract_poster(video_path, poster_path):
+    """Writes the poster frame of the video into the JPEG file poster_path."""
+    position = get_duration(video_path) * settings.POSTER_FRAME_POSITION
+    run_command(settings.FFMPEG_BINARY, '-v', 'error', '-y', '-ss', '%.3f' % position, '-i', video_path,
+                '-frames:v', '1', '-q:v', '2', poster_path)
+
+
+def scale_poster(poster_path, thumbnail_path, width):
+    """Writes the poster scaled to width into thumbnail_path, the format follows its extension."""
+    run_command(settings.FFMPEG_BINARY, '-v', 'error', '-y', '-i', poster_path,
+                '-vf', 'scale=%d:-2' % width, thumbnail_path)
+
+
+def is_saved_after(storage, name, time):
+    """Returns True if the file name in storage was saved after time."""
+    try:
+        return storage.get_modified_time(name) > time
+    except (OSError, NotImplementedError):
+        return False
+
+
+def save_poster(glossvideo, poster_path, thumbnail_paths, queued_at=None):
+    """
+    Replaces the posterfile and the PosterThumbnails of glossvideo, thumbnail_paths is {(width, format): path}.
+    A posterfile saved after queued_at is kept with its thumbnails, returns False then.
+    """
+    storage = glossvideo.posterfile.storage
+    saved_names = []
+    try:
+        with open(poster_path, 'rb') as poster_file:
+            poster_name = save_file(GlossVideo._meta.get_field('posterfile'), glossvideo, 'jpg', File(poster_file))
+        saved_names.append(poster_name)
+        thumbnails = []
+        for (width, thumbnail_format), path in sorted(thumbnail_paths.items()):
+            extension = "%d.%s" % (width, THUMBNAIL_EXTENSIONS[thumbnail_format])
+            with open(path, 'rb') as thumbnail_file:
+                name = save_file(PosterThumbnail._meta.get_field('file'), glossvideo, extension, File(thumbnail_file))
+            saved_names.append(name)
+            thumbnails.append(PosterThumbnail(glossvideo=glossvideo, width=width, format=thumbnail_format, file=name))
+
+        with transaction.atomic():
+            # Locked so that a poster an editor saves meanwhile is not replaced.
+            old_poster = GlossVideo.objects.select_for_update().filter(pk=glossvideo.pk).values_list(
+                'posterfile', flat=True).get()
+            if old_poster and queued_at is not None and is_saved_after(storage, old_poster, queued_at):
+                kept = True
+            else:
+                kept = False
+                old_names = list(glossvideo.thumbnails.values_list('file', flat=True))
+                old_names += [old_poster] if old_poster else []
+                glossvideo.thumbnails.all().delete()
+                # Not saved with save(), that renames the videofile and queues a new job.
+                GlossVideo.objects.filter(pk=glossvideo.pk).update(posterfile=poster_name)
+                glossvideo.posterfile = poster_name
+                PosterThumbnail.objects.bulk_create(thumbnails)
+                # The old files are in use until the new ones are committed.
+                delete_files_on_commit(storage, old_names)
+    except Exception:
+        # The old poster is kept, the new files are not needed.
+        for name in saved_names:
+            storage.delete(name)
+        raise
+    if kept:
+        for name in saved_names:
+            storage.delete(name)
+        return False
+    return True
+
+
+def make_poster(glossvideo, video_path, queued_at=None):
+    """Extracts the poster and the thumbnails of glossvideo from the video at video_path."""
+    with tempfile.TemporaryDirectory() as directory:
+        poster_path = os.path.join(directory, 'poster.jpg')
+        extract_poster(video_path, poster_path)
+        thumbnail_paths = {}
+        for width in settings.POSTER_THUMBNAIL_WIDTHS:
+            for thumbnail_format, extension in THUMBNAIL_EXTENSIONS.items():
+                path = os.path.join(directory, "%d.%s" % (width, extension))
+                scale_poster(poster_path, path, width)
+                thumbnail_paths[(width, thumbnail_format)] = path
+        save_poster(glossvideo, poster_path, thumbnail_paths, queued_at)
+
+
+def run_poster_job(job):
+    """Extracts the poster and the thumbnails of the GlossVideo of job, unless an editor chose a poster since."""
+    return run_job(job, partial(make_poster, queued_at=job.created_at))
+
+
+def run_poster_jobs_in_pool(processes):
+    """Runs the queued PosterJobs in processes processes and returns the (finished, failed) counts."""
+    return run_jobs_in_pool(PosterJob, run_poster_job, processes)
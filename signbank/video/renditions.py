@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Smaller renditions of the GlossVideos, transcoded from their videofiles with ffmpeg by TranscodeJobs, see jobs.py.
+
+Uploaded videos are often large phone recordings. Each video is transcoded to an H.264 MP4 VideoRendition of each of
+settings.VIDEO_RENDITIONS, scaled down to its height, without sound as the players are muted, and with the index at
+the start of the file so that playing can start before it is downloaded. Renditions that are not smaller than the
+original are not kept. With settings.VIDEO_RENDITION_HLS the web rendition, if it is configured and kept, is also
+cut into HLS segments for adaptive streaming. The playlists refer to their segments by relative names, which carry
+no signature, so HLS is not supported when the storage signs its URLs (S3 with AWS_QUERYSTRING_AUTH). The new files
+are saved before the rows of the old renditions are replaced in one transaction, and the old files are deleted once
+it is committed. The files of the renditions of a deleted GlossVideo are deleted after its deletion is committed,
+see signals.py of the dictionary.
+
+The renditions are stored next to the originals in the GlossVideoDynamicStorage. The video players and
+protected_media play the smallest suitable one of the current videofile, see GlossVideo.get_rendition(). The
+renditions of a videofile renamed by GlossVideo.rename_video() are kept. The run_transcode_jobs command runs the
+queued jobs, and the backfill_renditions command queues the videos that have no renditions of their current file and
+runs them in a pool of processes.
+"""
+from __future__ import unicode_literals
+
+import glob
+import mimetypes
+import os
+import posixpath
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from .jobs import (delete_files_on_commit, get_dimensions, queue_job, queue_missing_jobs, run_command, run_job,
+                   run_jobs_in_pool, save_file)
+from .models import GlossVideo, TranscodeJob, VideoRendition
+
+#: The length of the HLS segments in seconds.
+HLS_SEGMENT_SECONDS = 4
+
+
+def queue_transcode_job(glossvideo):
+    """Queues a TranscodeJob for the current videofile of glossvideo and returns it, None if it has one already."""
+    return queue_job(TranscodeJob, glossvideo)
+
+
+def queue_missing_transcode_jobs():
+    """Queues a TranscodeJob for the videos with no pending, running or finished job of their videofile."""
+    return queue_missing_jobs(TranscodeJob)
+
+
+def is_hls_supported():
+    """Returns True if HLS renditions are made, see settings.VIDEO_RENDITION_HLS."""
+    return settings.VIDEO_RENDITION_HLS and not VideoRendition._meta.get_field('file').storage.has_signed_urls()
+
+
+def transcode(video_path, rendition_path, height, crf):
+    """Writes the video scaled down to height, if it is higher, into the MP4 file rendition_path."""
+    run_command(settings.FFMPEG_BINARY, '-v', 'error', '-y', '-i', video_path,
+                '-vf', "scale=-2:'min(%d,trunc(ih/2)*2)'" % height, '-c:v', 'libx264', '-preset', 'medium',
+                '-crf', str(crf), '-pix_fmt', 'yuv420p', '-movflags', '+faststart', '-an', rendition_path,
+                timeout=settings.VIDEO_TRANSCODE_TIMEOUT)
+
+
+def segment(rendition_path, directory):
+    """Cuts the MP4 rendition into HLS segments in directory, returns the paths of the playlist and the segments."""
+    playlist_path = os.path.join(directory, 'playlist.m3u8')
+    run_command(settings.FFMPEG_BINARY, '-v', 'error', '-y', '-i', rendition_path, '-c', 'copy', '-f', 'hls',
+                '-hls_time', str(HLS_SEGMENT_SECONDS), '-hls_playlist_type', 'vod',
+                '-hls_segment_filename', os.path.join(directory, 'segment%03d.ts'), playlist_path,
+                timeout=settings.VIDEO_TRANSCODE_TIMEOUT)
+    return playlist_path, sorted(glob.glob(os.path.join(directory, 'segment*.ts')))
+
+
+def get_segment_names(rendition):
+    """Returns the names of the HLS segments of the playlist of rendition in the storage."""
+    with rendition.file.open('rb') as playlist_file:
+        lines = playlist_file.read().decode('utf-8').splitlines()
+    directory = posixpath.dirname(rendition.file.name)
+    return [posixpath.join(directory, line.strip()) for line in lines if line.strip() and not line.startswith('#')]
+
+
+def get_file_names(renditions):
+    """Returns the names of the files of renditions in the storage, with the segments of HLS."""
+    names = []
+    for rendition in renditions:
+        if rendition.is_hls() and rendition.file.storage.exists(rendition.file.name):
+            names += get_segment_names(rendition)
+        names.append(rendition.file.name)
+    return names
+
+
+def delete_rendition_files_on_commit(glossvideo):
+    """Deletes the files of the VideoRenditions of glossvideo once the transaction deleting them is committed."""
+    delete_files_on_commit(VideoRendition._meta.get_field('file').storage,
+                           get_file_names(glossvideo.renditions.all()))
+
+
+def save_rendition_file(glossvideo, extension, content, saved_names):
+    """Saves content as a file of a rendition of glossvideo, and returns its name, which is added to saved_names."""
+    name = save_file(VideoRendition._meta.get_field('file'), glossvideo, extension, content)
+    saved_names.append(name)
+    return name
+
+
+def save_hls(glossvideo, playlist_path, segment_paths, width, height, saved_names):
+    """Saves the HLS segments and their playlist, which refers to the names the storage gave them."""
+    with open(playlist_path) as playlist_file:
+        playlist = playlist_file.read()
+    size = 0
+    for number, segment_path in enumerate(segment_paths):
+        with open(segment_path, 'rb') as segment_file:
+            name = save_rendition_file(glossvideo, "hls.%03d.ts" % number, File(segment_file), saved_names)
+        size += os.path.getsize(segment_path)
+        playlist = playlist.replace(os.path.basename(segment_path), posixpath.basename(name))
+    return VideoRendition(
+        glossvideo=glossvideo, name=VideoRendition.Name.HLS, width=width, height=height, size=size,
+        videofile=glossvideo.videofile.name,
+        file=save_rendition_file(glossvideo, "hls.m3u8", ContentFile(playlist.encode('utf-8')), saved_names))
+
+
+def save_renditions(glossvideo, video_path, directory, saved_names):
+    """Transcodes the video at video_path in directory, saves the files and returns the unsaved VideoRenditions."""
+    original_size = os.path.getsize(video_path)
+    renditions = []
+    web, web_path = None, None
+    for name, options in settings.VIDEO_RENDITIONS.items():
+        path = os.path.join(directory, "%s.mp4" % name)
+        transcode(video_path, path, options['height'], options['crf'])
+        size = os.path.getsize(path)
+        if size >= original_size:
+            # The original is played instead.
+            continue
+        width, height = get_dimensions(path)
+        with open(path, 'rb') as rendition_file:
+            rendition = VideoRendition(
+                glossvideo=glossvideo, name=name, width=width, height=height, size=size,
+                videofile=glossvideo.videofile.name,
+                file=save_rendition_file(glossvideo, "%s.mp4" % name, File(rendition_file), saved_names))
+        renditions.append(rendition)
+        if name == VideoRendition.Name.WEB:
+            web, web_path = rendition, path
+    if is_hls_supported() and web is not None:
+        # The segments are cut from the web rendition, without it they would be larger than the original.
+        hls_directory = os.path.join(directory, 'hls')
+        os.mkdir(hls_directory)
+        renditions.append(save_hls(glossvideo, *segment(web_path, hls_directory), web.width, web.height,
+                                   saved_names))
+    return renditions
+
+
+def make_renditions(glossvideo, video_path):
+    """Transcodes the video at video_path into the VideoRenditions of glossvideo, replacing the old ones."""
+    storage = VideoRendition._meta.get_field('file').storage
+    saved_names = []
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            renditions = save_renditions(glossvideo, video_path, directory, saved_names)
+        old_names = get_file_names(glossvideo.renditions.all())
+        with transaction.atomic():
+            glossvideo.renditions.all().delete()
+            VideoRendition.objects.bulk_create(renditions)
+            # The old files are in use until the new renditions are committed.
+            delete_files_on_commit(storage, old_names)
+    except Exception:
+        # The old renditions are kept, the files of the new ones are not needed.
+        for name in saved_names:
+            storage.delete(name)
+        raise
+
+
+def run_transcode_job(job):
+    """Transcodes the videofile of the GlossVideo of job into its VideoRenditions."""
+    return run_job(job, make_renditions)
+
+
+def run_transcode_jobs_in_pool(processes):
+    """Runs the queued TranscodeJobs in processes processes and returns the (finished, failed) counts."""
+    return run_jobs_in_pool(TranscodeJob, run_transcode_job, processes)
+
+
+def get_rendition_of_file(name, height=None):
+    """
+    Returns the smallest suitable VideoRendition of the videofile name, see GlossVideo.choose_rendition(). Files that
+    are not videos have none, they are not looked up.
+    """
+    if not (mimetypes.guess_type(name)[0] or '').startswith('video/'):
+        return None
+    return GlossVideo.choose_rendition(VideoRendition.objects.filter(glossvideo__videofile=name, videofile=name),
+                                       height)
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from guardian.shortcuts import assign_perm
+
+from signbank.dictionary.models import Dataset, Gloss, SignLanguage
+from signbank.video.models import GlossVideo, PosterJob, PosterThumbnail
+from signbank.video.jobs import claim_next_job
+from signbank.video.posters import queue_missing_poster_jobs, run_poster_job
+
+
+def fake_run(args, **kwargs):
+    """Writes the output file of ffmpeg, and answers ffprobe with a duration of 4 seconds."""
+    if args[0] == 'ffprobe':
+        return subprocess.CompletedProcess(args, 0, stdout="4.000000\n", stderr="")
+    with open(args[-1], 'wb') as output:
+        output.write(b"image")
+    return subprocess.CompletedProcess(args, 0, stdout="", stderr="")
+
+
+class PosterTestCase(TestCase):
+    def setUp(self):
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage)
+        self.gloss = Gloss.objects.create(idgloss="HAT", dataset=self.dataset)
+        self.glossvideos = []
+
+    def tearDown(self):
+        for glossvideo in self.glossvideos:
+            glossvideo.refresh_from_db()
+            for thumbnail in glossvideo.thumbnails.all():
+                thumbnail.file.delete(save=False)
+            glossvideo.posterfile.delete(save=False)
+            glossvideo.videofile.delete(save=False)
+
+    def create_glossvideo(self, name="hat.mp4", content=b"video"):
+        with self.captureOnCommitCallbacks(execute=True):
+            glossvideo = GlossVideo.objects.create(gloss=self.gloss, videofile=SimpleUploadedFile(name, content))
+        self.glossvideos.append(glossvideo)
+        return glossvideo
+
+    def list_poster_files(self, storage):
+        return {name for directory in ("posters", "posters/thumbnails") if storage.exists(directory)
+                for name in storage.listdir(directory)[1]}
+
+    def test_queue(self):
+        """Tests that a job is queued for the renamed videofile of a new video, and not for images."""
+        glossvideo = self.create_glossvideo()
+        job = PosterJob.objects.get()
+        self.assertEqual(job.glossvideo, glossvideo)
+        self.assertEqual(job.videofile, glossvideo.videofile.name)
+        self.assertEqual(job.status, PosterJob.Status.PENDING)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            glossvideo.save()
+        self.assertEqual(PosterJob.objects.count(), 1)
+
+        self.create_glossvideo(name="hat.png")
+        self.assertEqual(PosterJob.objects.count(), 1)
+
+    @mock.patch("signbank.video.jobs.subprocess.run", side_effect=fake_run)
+    def test_run(self, run):
+        """Tests that the job saves the poster from the middle of the video and its thumbnails."""
+        glossvideo = self.create_glossvideo()
+        job = claim_next_job(PosterJob)
+        self.assertEqual(job.status, PosterJob.Status.RUNNING)
+        self.assertIsNone(claim_next_job(PosterJob))
+        run_poster_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, PosterJob.Status.FINISHED)
+        self.assertIn(('-ss', '2.000'), [call.args[0][4:6] for call in run.call_args_list])
+        glossvideo.refresh_from_db()
+        self.assertTrue(glossvideo.posterfile.name.startswith("posters/"))
+        self.assertRegex(glossvideo.posterfile.name, r"_%s\.\w+\.jpg$" % glossvideo.pk)
+        self.assertEqual(glossvideo.posterfile.read(), b"image")
+        glossvideo.posterfile.close()
+        self.assertEqual(
+            sorted(glossvideo.thumbnails.values_list('width', 'format')),
+            sorted((width, thumbnail_format) for width in [160, 320, 640]
+                   for thumbnail_format in ["jpeg", "webp"]))
+        self.assertTrue(glossvideo.thumbnails.get(width=320, format="webp").file.name.endswith(".320.webp"))
+
+        # A new poster replaces the old one and its thumbnails, the old files are deleted after the commit.
+        old_names = [glossvideo.posterfile.name] + [thumbnail.file.name for thumbnail in glossvideo.thumbnails.all()]
+        storage = glossvideo.posterfile.storage
+        with self.captureOnCommitCallbacks() as callbacks:
+            run_poster_job(PosterJob.objects.create(glossvideo=glossvideo, videofile=glossvideo.videofile.name))
+        self.assertEqual(PosterThumbnail.objects.count(), 6)
+        glossvideo.refresh_from_db()
+        new_names = [glossvideo.posterfile.name] + [thumbnail.file.name for thumbnail in glossvideo.thumbnails.all()]
+        self.assertFalse(set(old_names) & set(new_names))
+        self.assertTrue(all(storage.exists(name) for name in old_names + new_names))
+        for callback in callbacks:
+            callback()
+        self.assertTrue(all(storage.exists(name) for name in new_names))
+        self.assertFalse(any(storage.exists(name) for name in old_names))
+
+    @mock.patch("signbank.video.jobs.subprocess.run", side_effect=fake_run)
+    def test_rename(self, run):
+        """Tests that renaming the videofile keeps its job, and does not queue a job replacing the poster."""
+        glossvideo = self.create_glossvideo()
+        run_poster_job(claim_next_job(PosterJob))
+        glossvideo.refresh_from_db()
+        poster = glossvideo.posterfile.name
+        old_name = glossvideo.videofile.name
+        self.gloss.idgloss = "CAP"
+        self.gloss.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            GlossVideo.rename_glosses_videos(self.gloss)
+        glossvideo.refresh_from_db()
+        self.assertNotEqual(glossvideo.videofile.name, old_name)
+        job = PosterJob.objects.get()
+        self.assertEqual(job.videofile, glossvideo.videofile.name)
+        self.assertEqual(job.status, PosterJob.Status.FINISHED)
+        self.assertEqual(glossvideo.posterfile.name, poster)
+
+    @mock.patch("signbank.video.jobs.subprocess.run", side_effect=fake_run)
+    def test_run_keeps_chosen_poster(self, run):
+        """Tests that a job keeps the poster an editor saved after it was queued."""
+        glossvideo = self.create_glossvideo()
+        glossvideo.posterfile.save("hat.jpg", ContentFile(b"poster"))
+        poster = glossvideo.posterfile.name
+        storage = glossvideo.posterfile.storage
+        files = self.list_poster_files(storage)
+        run_poster_job(claim_next_job(PosterJob))
+        self.assertEqual(PosterJob.objects.get().status, PosterJob.Status.FINISHED)
+        glossvideo.refresh_from_db()
+        self.assertEqual(glossvideo.posterfile.name, poster)
+        self.assertFalse(glossvideo.thumbnails.exists())
+        # The files the job saved are deleted.
+        self.assertEqual(self.list_poster_files(storage), files)
+
+    @mock.patch("signbank.video.jobs.subprocess.run", side_effect=fake_run)
+    def test_run_keeps_poster_on_failure(self, run):
+        """Tests that a job that fails while saving keeps the old poster and its files, and deletes the new files."""
+        glossvideo = self.create_glossvideo()
+        GlossVideo.objects.filter(pk=glossvideo.pk).update(posterfile="posters/hat.jpg")
+        glossvideo.posterfile.storage.save("posters/hat.jpg", ContentFile(b"poster"))
+        # The poster is of an older videofile.
+        PosterJob.objects.update(created_at=timezone.now())
+        storage = glossvideo.posterfile.storage
+        files = self.list_poster_files(storage)
+        with mock.patch("signbank.video.posters.PosterThumbnail.objects.bulk_create", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                run_poster_job(claim_next_job(PosterJob))
+        glossvideo.refresh_from_db()
+        self.assertEqual(glossvideo.posterfile.name, "posters/hat.jpg")
+        self.assertTrue(storage.exists("posters/hat.jpg"))
+        # The files of the new poster and its thumbnails are deleted.
+        self.assertEqual(self.list_poster_files(storage), files)
+
+    @mock.patch("signbank.video.jobs.subprocess.run", side_effect=fake_run)
+    def test_delete(self, run):
+        """Tests that the thumbnail files of a deleted video are deleted after the commit."""
+        glossvideo = self.create_glossvideo()
+        run_poster_job(claim_next_job(PosterJob))
+        names = list(glossvideo.thumbnails.values_list('file', flat=True))
+        storage = glossvideo.posterfile.storage
+        self.assertTrue(all(storage.exists(name) for name in names))
+        self.glossvideos.remove(glossvideo)
+        glossvideo.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            glossvideo.delete()
+        self.assertFalse(any(storage.exists(name) for name in names))
+        glossvideo.posterfile.delete(save=False)
+        glossvideo.videofile.delete(save=False)
+
+    def test_lost_worker(self):
+        """Tests that a job still running after its timeout is claimed again."""
+        self.create_glossvideo()
+        job = claim_next_job(PosterJob)
+        self.assertIsNone(claim_next_job(PosterJob))
+        PosterJob.objects.update(started_at=timezone.now() - datetime.timedelta(seconds=PosterJob.get_timeout() - 10))
+        self.assertIsNone(claim_next_job(PosterJob))
+        PosterJob.objects.update(started_at=timezone.now() - datetime.timedelta(seconds=PosterJob.get_timeout() + 10))
+        self.assertEqual(claim_next_job(PosterJob), job)
+        self.assertIsNone(claim_next_job(PosterJob))
+
+    @mock.patch("signbank.video.jobs.subprocess.run",
+                side_effect=subprocess.CalledProcessError(1, ["ffprobe"], stderr="Invalid data found"))
+    def test_failure(self, run):
+        """Tests that failed jobs are marked failed with the error of ffmpeg, and queued again by the backfill."""
+        self.create_glossvideo()
+        job = claim_next_job(PosterJob)
+        with self.assertRaises(RuntimeError):
+            run_poster_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, PosterJob.Status.FAILED)
+        self.assertIn("Invalid data found", job.error)
+
+        self.assertEqual(queue_missing_poster_jobs(), 1)
+        self.assertEqual(queue_missing_poster_jobs(), 0)
+
+    def test_backfill(self):
+        """Tests that the backfill queues jobs for the videos without one, and not for videos with a poster."""
+        glossvideo = self.create_glossvideo()
+        with_poster = self.create_glossvideo(name="hat2.mp4")
+        GlossVideo.objects.filter(pk=with_poster.pk).update(posterfile="posters/hat.jpg")
+        PosterJob.objects.all().delete()
+        self.assertEqual(queue_missing_poster_jobs(), 1)
+        self.assertEqual(PosterJob.objects.get().videofile, glossvideo.videofile.name)
+        self.assertEqual(queue_missing_poster_jobs(), 0)
+
+    def test_poster_view(self):
+        """Tests that the poster view redirects to the poster, and queues it if there is none yet."""
+        glossvideo = self.create_glossvideo()
+        PosterJob.objects.all().delete()
+        user = User.objects.create_user(username="test", email=None, password="test")
+        assign_perm('view_dataset', user, self.dataset)
+        client = Client()
+        client.force_login(user)
+        url = reverse('video:glossvideo_poster', kwargs={'videoid': glossvideo.pk})
+        self.assertEqual(client.get(url).status_code, 404)
+        self.assertEqual(PosterJob.objects.count(), 1)
+
+        GlossVideo.objects.filter(pk=glossvideo.pk).update(posterfile="posters/hat.jpg")
+        response = client.get(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].endswith("posters/hat.jpg"))
+
+    @unittest.skipUnless(shutil.which('ffmpeg') and shutil.which('ffprobe'), "ffmpeg is not installed")
+    def test_ffmpeg(self):
+        """Tests the extraction with ffmpeg from a generated video."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "hat.mp4")
+            subprocess.run(['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc=duration=1:size=320x240:rate=10',
+                            '-pix_fmt', 'yuv420p', path], check=True)
+            with open(path, 'rb') as video_file:
+                glossvideo = self.create_glossvideo(content=video_file.read())
+        run_poster_job(claim_next_job(PosterJob))
+        self.assertEqual(PosterJob.objects.get().status, PosterJob.Status.FINISHED)
+        glossvideo.refresh_from_db()
+        self.assertTrue(glossvideo.posterfile)
+        self.assertEqual(glossvideo.thumbnails.count(), 6)
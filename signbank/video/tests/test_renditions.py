@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import re
+import subprocess
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from signbank.dictionary.models import Dataset, Gloss, SignLanguage
+from signbank.video.jobs import claim_next_job
+from signbank.video.models import GlossVideo, GlossVideoDynamicStorage, TranscodeJob, VideoRendition
+from signbank.video.renditions import get_rendition_of_file, get_segment_names, run_transcode_job
+
+#: The (width, height) of the renditions the fake ffprobe answers with.
+DIMENSIONS = {'web.mp4': (640, 480), 'mobile.mp4': (480, 360)}
+
+
+def fake_run(args, **kwargs):
+    """Writes the renditions and segments of ffmpeg, a byte per pixel of height, and answers ffprobe."""
+    if args[0] == 'ffprobe':
+        return subprocess.CompletedProcess(args, 0, stdout="%d,%d\n" % DIMENSIONS[os.path.basename(args[-1])],
+                                           stderr="")
+    if 'hls' in args:
+        directory = os.path.dirname(args[-1])
+        for number in range(2):
+            with open(os.path.join(directory, "segment%03d.ts" % number), 'wb') as segment_file:
+                segment_file.write(b"segment")
+        with open(args[-1], 'w') as playlist_file:
+            playlist_file.write("#EXTM3U\n#EXTINF:4.0,\nsegment000.ts\n#EXTINF:1.0,\nsegment001.ts\n#EXT-X-ENDLIST\n")
+    else:
+        height = int(re.search(r"min\((\d+),", args[args.index('-vf') + 1]).group(1))
+        with open(args[-1], 'wb') as rendition_file:
+            rendition_file.write(b"r" * height)
+    return subprocess.CompletedProcess(args, 0, stdout="", stderr="")
+
+
+@mock.patch("signbank.video.jobs.subprocess.run", side_effect=fake_run)
+class RenditionTestCase(TestCase):
+    def setUp(self):
+        signlanguage = SignLanguage.objects.create(pk=2, name="testsignlanguage", language_code_3char="tst")
+        self.dataset = Dataset.objects.create(name="testdataset", signlanguage=signlanguage)
+        gloss = Gloss.objects.create(idgloss="HAT", dataset=self.dataset)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.glossvideo = GlossVideo.objects.create(gloss=gloss,
+                                                        videofile=SimpleUploadedFile("hat.mp4", b"v" * 1000))
+
+    def tearDown(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            GlossVideo.objects.filter(pk=self.glossvideo.pk).delete()
+        self.glossvideo.videofile.delete(save=False)
+
+    def test_transcode(self, run):
+        """Tests that the video is transcoded into the renditions, and the smallest suitable one is played."""
+        job = claim_next_job(TranscodeJob)
+        self.assertEqual(job.videofile, self.glossvideo.videofile.name)
+        run_transcode_job(job)
+        self.assertEqual(TranscodeJob.objects.get().status, TranscodeJob.Status.FINISHED)
+
+        web, mobile = [self.glossvideo.renditions.get(name=name) for name in ["web", "mobile"]]
+        self.assertEqual((web.width, web.height, web.size), (640, 480, 480))
+        self.assertEqual((mobile.width, mobile.height, mobile.size), (480, 360, 360))
+        self.assertTrue(web.file.name.endswith(".web.mp4"))
+        self.assertEqual(web.file.read(), b"r" * 480)
+        web.file.close()
+
+        self.assertEqual(self.glossvideo.get_rendition(), web)
+        self.assertEqual(self.glossvideo.get_rendition(360), mobile)
+        self.assertEqual(self.glossvideo.get_rendition(1080), web)
+        self.assertEqual(self.glossvideo.get_sources(), [
+            (web.file.url, "video/mp4"), (self.glossvideo.get_absolute_url(), "video/mp4")])
+
+        # Transcoding again replaces the renditions, the old files are deleted after the commit.
+        old_names = [web.file.name, mobile.file.name]
+        with self.captureOnCommitCallbacks(execute=True):
+            run_transcode_job(TranscodeJob.objects.create(glossvideo=self.glossvideo,
+                                                          videofile=self.glossvideo.videofile.name))
+        self.assertEqual(self.glossvideo.renditions.count(), 2)
+        new_names = list(self.glossvideo.renditions.values_list('file', flat=True))
+        storage = web.file.storage
+        self.assertFalse(set(old_names) & set(new_names))
+        self.assertTrue(all(storage.exists(name) for name in new_names))
+        self.assertFalse(any(storage.exists(name) for name in old_names))
+
+    def test_failure(self, run):
+        """Tests that a job that fails keeps the old renditions, and deletes the files it saved."""
+        run_transcode_job(claim_next_job(TranscodeJob))
+        names = sorted(self.glossvideo.renditions.values_list('file', flat=True))
+        storage = self.glossvideo.renditions.first().file.storage
+        files = storage.listdir('renditions')[1]
+        with mock.patch("signbank.video.renditions.VideoRendition.objects.bulk_create", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                run_transcode_job(TranscodeJob.objects.create(glossvideo=self.glossvideo,
+                                                              videofile=self.glossvideo.videofile.name))
+        self.assertEqual(sorted(self.glossvideo.renditions.values_list('file', flat=True)), names)
+        self.assertEqual(storage.listdir('renditions')[1], files)
+
+    def test_replaced_videofile(self, run):
+        """Tests that the renditions of a replaced videofile are not played."""
+        run_transcode_job(claim_next_job(TranscodeJob))
+        self.glossvideo.videofile.name = "glossvideo/other.mp4"
+        self.assertIsNone(self.glossvideo.get_rendition())
+        self.assertEqual(self.glossvideo.get_sources(), [("/media/glossvideo/other.mp4", "video/mp4")])
+
+    def test_renamed_videofile(self, run):
+        """Tests that the renditions of a renamed videofile are played, and it is not transcoded again."""
+        run_transcode_job(claim_next_job(TranscodeJob))
+        self.glossvideo.gloss.idgloss = "CAP"
+        self.glossvideo.gloss.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.glossvideo.save()
+        self.assertIn("CAP", self.glossvideo.videofile.name)
+        self.assertEqual(TranscodeJob.objects.get().videofile, self.glossvideo.videofile.name)
+        self.assertIsNone(claim_next_job(TranscodeJob))
+        self.assertEqual(self.glossvideo.get_rendition(height=360).name, "mobile")
+
+    def test_larger_than_original(self, run):
+        """Tests that renditions that are not smaller than the original are not kept."""
+        renditions = {'web': {'height': 2000, 'crf': 26}, 'mobile': {'height': 360, 'crf': 28}}
+        with self.settings(VIDEO_RENDITIONS=renditions):
+            run_transcode_job(claim_next_job(TranscodeJob))
+        self.assertEqual(list(self.glossvideo.renditions.values_list('name', flat=True)), ["mobile"])
+
+    @override_settings(VIDEO_RENDITION_HLS=True)
+    def test_hls_without_web(self, run):
+        """Tests that HLS is not cut when the web rendition is not kept, or not configured."""
+        for renditions in [{'web': {'height': 2000, 'crf': 26}, 'mobile': {'height': 360, 'crf': 28}},
+                           {'mobile': {'height': 360, 'crf': 28}}]:
+            with self.settings(VIDEO_RENDITIONS=renditions):
+                run_transcode_job(TranscodeJob.objects.create(glossvideo=self.glossvideo,
+                                                              videofile=self.glossvideo.videofile.name))
+            self.assertEqual(list(self.glossvideo.renditions.values_list('name', flat=True)), ["mobile"])
+
+    @override_settings(VIDEO_RENDITION_HLS=True)
+    def test_hls(self, run):
+        """Tests that the HLS playlist refers to the stored segments, and that it is the first source."""
+        run_transcode_job(claim_next_job(TranscodeJob))
+        hls = self.glossvideo.renditions.get(name="hls")
+        self.assertEqual((hls.width, hls.height, hls.size), (640, 480, 14))
+        segment_names = get_segment_names(hls)
+        self.assertEqual(len(segment_names), 2)
+        self.assertTrue(all(hls.file.storage.exists(name) for name in segment_names))
+        self.assertEqual(self.glossvideo.get_sources()[0], (hls.file.url, "application/vnd.apple.mpegurl"))
+
+        # The files are deleted with the GlossVideo after the commit.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.glossvideo.gloss.delete()
+        self.assertFalse(VideoRendition.objects.exists())
+        self.assertFalse(any(hls.file.storage.exists(name) for name in segment_names + [hls.file.name]))
+
+    @override_settings(VIDEO_RENDITION_HLS=True)
+    def test_hls_signed_urls(self, run):
+        """Tests that HLS is not made or played with a storage that signs its URLs, the segments would not be."""
+        with mock.patch.object(GlossVideoDynamicStorage, 'has_signed_urls', return_value=True):
+            run_transcode_job(claim_next_job(TranscodeJob))
+            self.assertEqual(sorted(self.glossvideo.renditions.values_list('name', flat=True)), ["mobile", "web"])
+            VideoRendition.objects.create(glossvideo=self.glossvideo, name="hls", file="renditions/hat.m3u8",
+                                          width=640, height=480, size=10, videofile=self.glossvideo.videofile.name)
+            self.assertEqual(self.glossvideo.get_sources()[0][1], "video/mp4")
+
+    def test_protected_media(self, run):
+        """Tests that protected_media serves the smallest suitable rendition, or the original if asked."""
+        run_transcode_job(claim_next_job(TranscodeJob))
+        client = Client()
+        client.force_login(User.objects.create_user(username="test", email=None, password="test"))
+        url = reverse('dictionary:protected_media', kwargs={'filename': self.glossvideo.videofile.name})
+        with self.settings(WRITABLE_FOLDER=settings.MEDIA_ROOT):
+            for data, content in [({}, b"r" * 480), ({'height': '360'}, b"r" * 360),
+                                  ({'original': '1'}, b"v" * 1000)]:
+                response = client.get(url, data)
+                self.assertEqual(b''.join(response.streaming_content), content)
+
+    def test_rendition_of_file(self, run):
+        """Tests that renditions are looked up with one query, and not for files that are not videos."""
+        run_transcode_job(claim_next_job(TranscodeJob))
+        with self.assertNumQueries(1):
+            self.assertEqual(get_rendition_of_file(self.glossvideo.videofile.name, 360).name, "mobile")
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_rendition_of_file("glossvideo/hat.png"))
@@ -8,21 +8,23 @@ from django.contrib import messages
 from django.contrib.auth.decorators import permission_required
 from django.core.exceptions import PermissionDenied, ValidationError
 from django.core.files.base import ContentFile
-from django.http import HttpResponse, HttpResponseNotAllowed, HttpResponseNotFound
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed, HttpResponseNotFound
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse, reverse_lazy
 from django.utils.translation import ugettext as _
 from django.views.generic.edit import FormView
 from django.views.generic.list import ListView
 from djqscsv import render_to_csv_response
-from guardian.shortcuts import get_objects_for_user, get_perms
 from storages.backends.s3boto3 import S3Boto3Storage
 
-from ..dictionary.models import Dataset, FieldChoice, Gloss
+from ..dictionary.datasetpermissions import get_allowed_dataset_ids, has_dataset_perm
+from ..dictionary.fieldchoices import get_field_choices, get_fieldchoice
+from ..dictionary.models import Dataset, Gloss
 from .forms import (GlossVideoForGlossForm, GlossVideoForm,
                     GlossVideoPosterForm, GlossVideoUpdateForm,
                     MultipleVideoUploadForm)
 from .models import GlossVideo, GlossVideoDynamicStorage, GlossVideoToken
+from .posters import queue_poster_job
 
 
 def get_signed_video_url_from_glossvideotoken(request, token, videoid):
@@ -74,7 +76,7 @@ def upload_glossvideo_gloss(request):
         if form.is_valid():
             gloss = form.cleaned_data['gloss']
 
-            if 'view_dataset' not in get_perms(request.user, gloss.dataset):
+            if not has_dataset_perm(request.user, 'view_dataset', gloss.dataset_id):
                 # If user has no permissions to dataset, raise PermissionDenied to show 403 template.
                 msg = _("You do not have permissions to upload videos for this lexicon.")
                 messages.error(request, msg)
@@ -111,14 +113,13 @@ def add_recorded_video_view(request):
 
     if request.method == 'POST':
         # Load the data into the form
-        video_type = FieldChoice.objects.filter(field='video_type', english_name='main').values_list('machine_value').\
-                                                first()
+        video_type = get_field_choices().get_by_name('video_type', 'main')
         post_values = request.POST.copy()
-        post_values['video_type'] = video_type[0]
+        post_values['video_type'] = video_type.machine_value
         form = GlossVideoForGlossForm(post_values, request.FILES)
         if form.is_valid():
             gloss = form.cleaned_data['gloss']
-            if 'view_dataset' not in get_perms(request.user, gloss.dataset):
+            if not has_dataset_perm(request.user, 'view_dataset', gloss.dataset_id):
                 # If user has no permissions to dataset, raise PermissionDenied to show 403 template.
                 msg = _("You do not have permissions to change order for videos of this lexicon.")
                 messages.error(request, msg)
@@ -155,7 +156,7 @@ def add_poster(request):
         # Get glossvideos pk from the submitted form data
         glossvideo_pk = form.data['pk']
         glossvideo = GlossVideo.objects.get(pk=glossvideo_pk)
-        if 'view_dataset' not in get_perms(request.user, glossvideo.gloss.dataset):
+        if not has_dataset_perm(request.user, 'view_dataset', glossvideo.gloss.dataset_id):
             # If user has no permissions to dataset, raise PermissionDenied to show 403 template.
             msg = _("You do not have permissions to add/change poster images for glosses videos of this lexicon.")
             messages.error(request, msg)
@@ -185,9 +186,9 @@ class AddVideosView(FormView):
 
     def get_form(self, formclass=None):
         form = super(AddVideosView, self).get_form()
-        allowed_datasets = get_objects_for_user(self.request.user, 'dictionary.view_dataset')
+        allowed_datasets = get_allowed_dataset_ids(self.request.user)
         # Make sure we only list datasets the user has permissions to.
-        form.fields["dataset"].queryset = form.fields["dataset"].queryset.filter(id__in=[x.id for x in allowed_datasets])
+        form.fields["dataset"].queryset = form.fields["dataset"].queryset.filter(id__in=allowed_datasets)
         return form
 
     def post(self, request, *args, **kwargs):
@@ -197,7 +198,7 @@ class AddVideosView(FormView):
         if form.is_valid():
             data = form.cleaned_data
             dataset = data['dataset']
-            if 'view_dataset' not in get_perms(request.user, data["dataset"]):
+            if not has_dataset_perm(request.user, 'view_dataset', data["dataset"]):
                 # If user has no permissions to dataset, raise PermissionDenied to show 403 template.
                 msg = _("You do not have permissions to upload videos for this lexicon.")
                 messages.error(request, msg)
@@ -243,12 +244,12 @@ class UploadedGlossvideosListView(ListView):
         context['page'] = page
         # Set get params in form
         form = GlossVideoUpdateForm(self.request.GET)
-        allowed_datasets = get_objects_for_user(self.request.user, 'dictionary.view_dataset')
+        allowed_datasets = get_allowed_dataset_ids(self.request.user)
         # Make sure we only list datasets the user has permissions to.
         form.fields["dataset"].queryset = form.fields["dataset"].queryset.filter(
-            id__in=[x.id for x in allowed_datasets])
+            id__in=allowed_datasets)
         if 'dataset' in self.request.GET and self.request.GET.get('dataset'):
-            if 'view_dataset' in get_perms(self.request.user, Dataset.objects.get(id=self.request.GET.get('dataset'))):
+            if has_dataset_perm(self.request.user, 'view_dataset', Dataset.objects.get(id=self.request.GET.get('dataset'))):
                 # If user does have permissions to selected dataset, Set queryset for form.gloss
                 form.fields["gloss"].queryset = Gloss.objects.filter(dataset__id=self.request.GET.get("dataset"))
             context['gloss_choices'] = Gloss.objects.filter(dataset=self.request.GET.get('dataset'))
@@ -275,7 +276,7 @@ class UploadedGlossvideosListView(ListView):
 
     def render_to_response(self, context, **response_kwargs):
         if 'dataset' in self.request.GET and self.request.GET.get('dataset'):
-            if 'view_dataset' not in get_perms(self.request.user, Dataset.objects.get(id=self.request.GET.get('dataset'))):
+            if not has_dataset_perm(self.request.user, 'view_dataset', Dataset.objects.get(id=self.request.GET.get('dataset'))):
                 msg = _("You do not have permissions to view the selected lexicon.")
                 messages.error(self.request, msg)
                 raise PermissionDenied(msg)
@@ -298,9 +299,8 @@ def update_glossvideo(request):
                     if 'gloss' in item and 'glossvideo' in item:
                         glossvideo = GlossVideo.objects.get(pk=item['glossvideo'])
                         glossvideo.gloss = Gloss.objects.get(pk=item['gloss'])
-                        glossvideo.video_type = FieldChoice.objects.get(
-                            machine_value=item['video_type'])
-                        if 'view_dataset' in get_perms(request.user, glossvideo.gloss.dataset):
+                        glossvideo.video_type = get_fieldchoice(item['video_type'])
+                        if has_dataset_perm(request.user, 'view_dataset', glossvideo.gloss.dataset_id):
                             # Set version number if there is not already one
                             if glossvideo.version is None:
                                 glossvideo.version = glossvideo.next_version()
@@ -330,10 +330,9 @@ def update_glossvideo(request):
                     gloss_id = None
                 if gloss_id:
                     glossvideo.gloss = Gloss.objects.get(pk=gloss_id)
-                    glossvideo.video_type = FieldChoice.objects.get(
-                        machine_value=post['video_type'])
+                    glossvideo.video_type = get_fieldchoice(post['video_type'])
                     # Make sure that the user has rights to edit this datasets glosses.
-                    if 'view_dataset' in get_perms(request.user, glossvideo.gloss.dataset):
+                    if has_dataset_perm(request.user, 'view_dataset', glossvideo.gloss.dataset_id):
                         # Set version number.
                         # Set version number if there is not already one
                         if glossvideo.version is None:
@@ -356,17 +355,19 @@ update_glossvideo_view = permission_required('video.change_glossvideo')(update_g
 
 
 def poster(request, videoid):
-    """Generate a still frame for a video (if needed) and
-    generate a redirect to the static server for this frame"""
+    """Redirect to the poster of a video, or queue its extraction if it has none yet."""
 
     video = get_object_or_404(GlossVideo, pk=videoid)
-    if 'view_dataset' not in get_perms(request.user, video.gloss.dataset):
+    if not has_dataset_perm(request.user, 'view_dataset', video.gloss.dataset_id):
         # If user has no permissions to dataset, raise PermissionDenied to show 403 template.
         msg = _("You do not have permissions to add/change poster images for this lexicon.")
         messages.error(request, msg)
         raise PermissionDenied(msg)
 
-    return redirect(video.poster_url())
+    if not video.posterfile:
+        queue_poster_job(video)
+        raise Http404(_("The poster of this video has not been generated yet."))
+    return redirect(video.posterfile.url)
 
 
 poster_view = poster
@@ -388,7 +389,7 @@ def change_glossvideo_order(request):
     videoid = request.POST["videoid"]
     direction = request.POST["direction"]
     video = GlossVideo.objects.get(pk=videoid)
-    if 'view_dataset' not in get_perms(request.user, video.gloss.dataset):
+    if not has_dataset_perm(request.user, 'view_dataset', video.gloss.dataset_id):
         # If user has no permissions to dataset, raise PermissionDenied to show 403 template.
         msg = _("You do not have permissions to change order of videos for this lexicon.")
         messages.error(request, msg)
@@ -414,7 +415,7 @@ def change_glossvideo_publicity(request):
         videoid = request.POST["videoid"]
         is_public = request.POST["is_public"]
         video = GlossVideo.objects.get(pk=videoid)
-        if 'view_dataset' not in get_perms(request.user, video.gloss.dataset):
+        if not has_dataset_perm(request.user, 'view_dataset', video.gloss.dataset_id):
             # If user has no permissions to dataset, raise PermissionDenied to show 403 template.
             msg = _("You do not have permissions to change order of videos for this lexicon.")
             messages.error(request, msg)